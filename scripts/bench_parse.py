@@ -0,0 +1,64 @@
+import argparse
+import os
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.methods.card import parse_card_html
+
+
+def _load(paths: list[str]) -> list[tuple[bytes, str]]:
+    cards = []
+    for p in paths:
+        path = Path(p)
+        files = sorted(path.glob("*.html")) if path.is_dir() else [path]
+        for f in files:
+            cards.append((f.read_bytes(), f"https://hh.ru/vacancy/{f.stem}"))
+    return cards
+
+
+def bench(cards: list[tuple[bytes, str]], workers: int, backend: str | None = None) -> float:
+    """Возвращает карточек/сек при парсинге в пуле из workers процессов (0 — в текущем процессе)."""
+    htmls = [c[0] for c in cards]
+    urls = [c[1] for c in cards]
+    parse = partial(parse_card_html, backend=backend)
+    t0 = time.perf_counter()
+    if workers == 0:
+        for h, u in zip(htmls, urls):
+            parse(h, u)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(parse, htmls, urls, chunksize=4))
+    return len(cards) / (time.perf_counter() - t0)
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Бенчмарк парсинга карточек: карточек/сек в зависимости от числа ядер")
+    ap.add_argument("html", nargs="+", help="Сохранённые HTML карточек (файлы или папки с *.html)")
+    ap.add_argument("--repeat", type=int, default=20, help="Сколько раз повторить корпус")
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--backend", help="HTML-бэкенд: selectolax | lxml | html.parser | auto")
+    args = ap.parse_args()
+
+    cards = _load(args.html) * args.repeat
+    if not cards:
+        print("Нет HTML для бенчмарка")
+        return
+
+    print(f"Карточек: {len(cards)}")
+    print("workers | cards/sec | speedup")
+    print("-------------------------------")
+    base = bench(cards, 0, args.backend)
+    print(f"{'inline':<7} | {base:>9.1f} | {1.0:>6.2f}x")
+    w = 1
+    while w <= args.max_workers:
+        rate = bench(cards, w, args.backend)
+        print(f"{w:<7} | {rate:>9.1f} | {rate / base:>6.2f}x")
+        w *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import json
+import sys
+
+from psycopg import ClientCursor
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.bd.bd_pool import get_pool
+from hhru_parser.bd.bd_vacancy import (
+    init_db, SALARY_BY_EXP_SQL, SCHEDULE_DISTRIBUTION_SQL, TOP_COMPANIES_SQL, EXISTING_IDS_SQL,
+)
+from hhru_parser.bd.bd_search import search_sql
+from hhru_parser.bd.bd_skills import TOP_SKILLS_SQL, SKILL_SALARY_SQL
+
+_SEARCH = {"query": "python разработчик", "skills": ["SQL"], "salary_min": None, "currency": "RUB", "limit": 20}
+
+# запрос → (параметры, индекс, который должен оказаться в плане)
+CHECKS = {
+    "salary_by_experience": (SALARY_BY_EXP_SQL, ("RUB",), "vacancies_salary_stats_idx"),
+    "schedule_distribution": (SCHEDULE_DISTRIBUTION_SQL, None, "vacancies_schedule_idx"),
+    "top_companies": (TOP_COMPANIES_SQL, (15,), "vacancies_company_idx"),
+    "existing_ids": (EXISTING_IDS_SQL, (["1", "2", "3"],), "vacancies_card_ids_idx"),
+    "search_text": (search_sql("python разработчик", None, None), _SEARCH, "vacancies_search_idx"),
+    "search_description": (search_sql("python разработчик", None, None), _SEARCH, "vacancy_descriptions_search_idx"),
+    "search_skills": (search_sql(None, ["SQL"], None), _SEARCH, "vacancies_skills_idx"),
+    "top_skills": (TOP_SKILLS_SQL, (20,), "stats_skill_top_idx"),
+    "skill_salary": (SKILL_SALARY_SQL, ([1, 2, 3], "RUB"), "stats_skill_salary_hist_pkey"),
+}
+
+
+# vacancies секционирована: в плане индексы секций (vacancies_2026_01_updated_at_idx …),
+# сверяем по корневому индексу секционированной таблицы
+ROOT_INDEX_SQL = """
+SELECT c.relname, coalesce(r.relname, c.relname)
+FROM pg_class c
+LEFT JOIN pg_class r ON r.oid = pg_partition_root(c.oid)
+WHERE c.relname = ANY(%s::text[]) AND c.relkind IN ('i', 'I');
+"""
+
+
+def _nodes(plan: dict):
+    yield plan
+    for sub in plan.get("Plans", ()):
+        yield from _nodes(sub)
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="EXPLAIN запросов статистики, existing_ids и поиска: используются ли индексы")
+    ap.add_argument("--allow-seqscan", action="store_true",
+                    help="Не запрещать seq scan (на маленькой таблице планировщик честно выберет его)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Печатать планы целиком")
+    args = ap.parse_args()
+
+    init_db()
+    failed = 0
+    with get_pool().connection() as conn, ClientCursor(conn) as cur:
+        for name, (sql, params, index) in CHECKS.items():
+            with conn.transaction():
+                if not args.allow_seqscan:
+                    cur.execute("SET LOCAL enable_seqscan = off")
+                cur.execute("EXPLAIN (FORMAT JSON) " + sql.rstrip().rstrip(";"), params)
+                plan = cur.fetchone()[0][0]["Plan"]
+            used = [(n["Node Type"], n.get("Index Name")) for n in _nodes(plan) if n.get("Index Name")]
+            cur.execute(ROOT_INDEX_SQL, ([idx for _, idx in used],))
+            roots = dict(cur.fetchall())
+            ok = any(roots.get(idx, idx) == index for _, idx in used)
+            failed += not ok
+            shown = [f"{t} on {i}" + (f" ({roots[i]})" if roots.get(i, i) != i else "") for t, i in used]
+            print(f"[{'OK' if ok else 'FAIL'}] {name}: ожидается {index}, в плане: "
+                  f"{', '.join(shown) or 'индексов нет'}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2, ensure_ascii=False))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import sys
+from datetime import datetime, timezone
+
+import psycopg
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.bd.bd_pool import get_pool
+from hhru_parser.bd.bd_partitions import CREATED_AT_SQL
+from hhru_parser.bd.bd_vacancy import VACANCY_MIGRATIONS
+
+# Миграции vacancies с нуля в отдельной схеме (в одной транзакции, с откатом в конце):
+# набор ограничений до секционирования (шаг 4) и после всех шагов, плюс проверка,
+# что тот же url под другим id по-прежнему не записывается.
+SCHEMA = "check_migrations"
+PARTITIONING = 4
+
+CONSTRAINTS_SQL = """
+SELECT c.conrelid::regclass::text, c.contype, array_agg(a.attname::text ORDER BY k.n)
+FROM pg_constraint c
+JOIN pg_namespace ns ON ns.oid = c.connamespace
+CROSS JOIN unnest(c.conkey) WITH ORDINALITY AS k(attnum, n)
+JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+WHERE ns.nspname = %s AND c.contype IN ('p', 'u')
+  AND c.conrelid IN ('vacancies'::regclass, coalesce(to_regclass('vacancy_ids'), 0::regclass))
+GROUP BY c.oid, 1, 2;
+"""
+
+# таблица → (тип, колонки): p — первичный ключ, u — UNIQUE
+BEFORE = {("vacancies", "p", ("id",)), ("vacancies", "u", ("url",))}
+AFTER = {("vacancies", "p", ("id", "created_at")),
+         ("vacancy_ids", "p", ("id",)), ("vacancy_ids", "u", ("url",))}
+
+
+def _constraints(cur) -> set:
+    cur.execute(CONSTRAINTS_SQL, (SCHEMA,))
+    return {(table, kind, tuple(cols)) for table, kind, cols in cur.fetchall()}
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Проверка миграций vacancies: ключи и UNIQUE (url) "
+                                             "до и после секционирования")
+    ap.parse_args()
+
+    checks = []
+    now = datetime.now(timezone.utc)
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        with conn.transaction():
+            cur.execute(f"CREATE SCHEMA {SCHEMA}")
+            cur.execute(f"SET LOCAL search_path = {SCHEMA}")
+            for version, _, statements in VACANCY_MIGRATIONS:
+                if version == PARTITIONING:
+                    got = _constraints(cur)
+                    checks.append(("до секционирования: PK (id), UNIQUE (url)", got == BEFORE))
+                for sql in statements:
+                    cur.execute(sql)
+            got = _constraints(cur)
+            checks.append(("после: PK (id, created_at), vacancy_ids PK (id) и UNIQUE (url)", got == AFTER))
+
+            dup = {"ids": ["check-1", "check-2"], "urls": ["https://hh.ru/vacancy/check"] * 2, "ts": [now, now]}
+            try:
+                with conn.transaction():
+                    cur.execute(CREATED_AT_SQL, dup)
+                rejected = False
+            except psycopg.errors.UniqueViolation:
+                rejected = True
+            checks.append(("тот же url под другим id отклонён", rejected))
+            raise psycopg.Rollback()
+
+    for name, ok in checks:
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    sys.exit(0 if all(ok for _, ok in checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.methods.backends import DEFAULT_BACKEND, available_backends, get_backend
+from hhru_parser.methods.card import CardParser
+
+# встроенный корпус: синтетические карточки и выдачи + эталонный вывод html.parser
+FIXTURES = Path(__file__).parent / "fixtures"
+EXPECTED = FIXTURES / "expected.json"
+
+
+def _files(path: str | Path | None) -> list[Path]:
+    if not path:
+        return []
+    p = Path(path)
+    return sorted(p.glob("*.html")) if p.is_dir() else [p]
+
+
+def _plain(obj):
+    """Через JSON: кортежи → списки, чтобы сравнивать с expected.json как есть."""
+    return json.loads(json.dumps(obj, ensure_ascii=False))
+
+
+def _vacancy(v) -> dict:
+    d = asdict(v)
+    # raw_json["parser"] — имя бэкенда (происхождение), у разных бэкендов различается по определению
+    d["raw_json"] = {k: x for k, x in (d["raw_json"] or {}).items() if k != "parser"}
+    return d
+
+
+def parse_card(parser: CardParser, f: Path) -> dict:
+    return _plain(_vacancy(parser.parse_vacancy(parser.backend.card(f.read_bytes()), f"https://hh.ru/vacancy/{f.stem}")))
+
+
+def parse_serp(parser: CardParser, f: Path) -> dict:
+    serp = parser.backend.serp(f.read_bytes())
+    return _plain({"total_found": parser._extract_total_found(serp),
+                   "links": parser._extract_links(serp),
+                   "hits": [_vacancy(parser.vacancy_from_hit(h)) for h in serp.hits]})
+
+
+def check_cards(files: list[Path], backends: list[str], show: int, expected: dict | None) -> int:
+    """Сравнивает Vacancy каждого бэкенда с эталонным html.parser (и с expected.json) поле за полем."""
+    parsers = {b: CardParser(parser_backend=b) for b in [DEFAULT_BACKEND, *backends]}
+    mismatches = {b: 0 for b in parsers}
+    timings = {b: 0.0 for b in parsers}
+    for f in files:
+        results = {}
+        for name, parser in parsers.items():
+            t0 = time.perf_counter()
+            results[name] = parse_card(parser, f)
+            timings[name] += time.perf_counter() - t0
+        ref = results[DEFAULT_BACKEND]
+        pairs = [(b, ref, results[b]) for b in backends]
+        if expected is not None:
+            pairs.append((DEFAULT_BACKEND, expected.get(f.name), ref))
+        for b, want, got in pairs:
+            if want is None:
+                diff = "нет в expected.json"
+            else:
+                diff = {k: (want.get(k), got.get(k)) for k in want.keys() | got.keys() if want.get(k) != got.get(k)}
+            if diff:
+                mismatches[b] += 1
+                if mismatches[b] <= show:
+                    print(f"[{b}] {f.name}: {diff}")
+
+    print(f"\n== Карточки: {len(files)} файлов ==")
+    for name, t in timings.items():
+        ms = t * 1000 / max(1, len(files))
+        print(f"{name:<12} | {ms:>7.2f} мс/карточку | расхождений: {mismatches[name]}")
+    return sum(mismatches.values())
+
+
+def check_serp(files: list[Path], backends: list[str], show: int, expected: dict | None) -> int:
+    parsers = {b: CardParser(parser_backend=b) for b in [DEFAULT_BACKEND, *backends]}
+    bad = 0
+    for f in files:
+        results = {name: parse_serp(parser, f) for name, parser in parsers.items()}
+        ref = results[DEFAULT_BACKEND]
+        pairs = [(b, ref, results[b]) for b in backends]
+        if expected is not None:
+            pairs.append((DEFAULT_BACKEND, expected.get(f.name), ref))
+        for b, want, got in pairs:
+            if want != got:
+                bad += 1
+                if bad <= show:
+                    want = want or {"total_found": None, "links": [], "hits": []}
+                    print(f"[{b}] {f.name}: total/links/hits differ: {want['total_found']} vs {got['total_found']}, "
+                          f"{len(want['links'])} vs {len(got['links'])} ссылок, "
+                          f"{len(want['hits'])} vs {len(got['hits'])} сниппетов")
+    print(f"\n== Выдача: {len(files)} файлов, расхождений: {bad} ==")
+    return bad
+
+
+def update_expected(cards: list[Path], serps: list[Path]) -> None:
+    parser = CardParser(parser_backend=DEFAULT_BACKEND)
+    data = {"cards": {f.name: parse_card(parser, f) for f in cards},
+            "serp": {f.name: parse_serp(parser, f) for f in serps}}
+    EXPECTED.write_text(json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"{EXPECTED}: {len(cards)} карточек, {len(serps)} выдач")
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Паритет HTML-бэкендов на сохранённых страницах hh.ru "
+                                             "(по умолчанию — на корпусе scripts/fixtures)")
+    ap.add_argument("--cards", help="Папка (или файл) с сохранёнными карточками *.html, имя файла = id")
+    ap.add_argument("--serp", help="Папка (или файл) с сохранёнными страницами выдачи *.html")
+    ap.add_argument("--backend", action="append", help="Проверяемый бэкенд (по умолчанию все установленные)")
+    ap.add_argument("--show", type=int, default=10, help="Сколько расхождений печатать")
+    ap.add_argument("--update-expected", action="store_true",
+                    help="Перезаписать fixtures/expected.json выводом html.parser (после намеренной правки парсинга)")
+    args = ap.parse_args()
+
+    builtin = not args.cards and not args.serp
+    cards = _files(FIXTURES / "cards" if builtin else args.cards)
+    serps = _files(FIXTURES / "serp" if builtin else args.serp)
+    if args.update_expected:
+        if not builtin:
+            ap.error("--update-expected только для встроенного корпуса")
+        update_expected(cards, serps)
+        return
+
+    backends = args.backend or [b for b in available_backends() if b != DEFAULT_BACKEND]
+    backends = [b for b in backends if get_backend(b).name == b and b != DEFAULT_BACKEND]
+    if not backends:
+        print("Нет альтернативных бэкендов для сравнения (установите lxml и/или selectolax)")
+    expected = json.loads(EXPECTED.read_text(encoding="utf-8")) if builtin else {}
+
+    bad = (check_cards(cards, backends, args.show, expected.get("cards"))
+           + check_serp(serps, backends, args.show, expected.get("serp")))
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
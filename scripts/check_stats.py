@@ -0,0 +1,93 @@
+import argparse
+import math
+import sys
+from datetime import datetime, timezone
+
+import psycopg
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.bd.bd_pool import get_pool
+from hhru_parser.bd.bd_partitions import assign_created_at
+from hhru_parser.bd.bd_stats import REBUILD_SQL, SALARY_BIN_BASE
+from hhru_parser.bd.bd_skills import REBUILD_SQL as SKILLS_REBUILD_SQL, sync_vacancy_skills
+from hhru_parser.bd.bd_vacancy import init_db, UPSERT_SQL, _vacancy_row
+
+# проверочная карточка; всё пишется в одной транзакции и откатывается в конце
+CARD = {
+    "id": "check-stats-1",
+    "url": "https://hh.ru/vacancy/check-stats-1",
+    "title": "Python-разработчик",
+    "company_name": "Проверка",
+    "salary_from": 100000,
+    "salary_to": 100000,
+    "salary_currency": "RUB",
+    "exp_bucket": "1-3",
+    "skills": ["Python", "SQL"],
+}
+SAME_BIN_SALARY = 100050
+
+# агрегат → ключ; сравниваются только строки с n <> 0 (обнулённые ключи триггеры не удаляют)
+AGGREGATES = {
+    "stats_salary_hist": ("currency", "exp_bucket", "bin"),
+    "stats_schedule": ("schedule",),
+    "stats_company": ("company_name",),
+}
+SKILL_AGGREGATES = {
+    "stats_skill": ("skill_id",),
+    "stats_skill_salary_hist": ("skill_id", "currency", "bin"),
+}
+
+
+def _bin(salary: float) -> int:
+    return math.floor(math.log(salary) / math.log(SALARY_BIN_BASE))
+
+
+def _upsert(cur, v: dict) -> None:
+    row = _vacancy_row(v, datetime.now(timezone.utc))
+    assign_created_at(cur, [row])
+    cur.execute(UPSERT_SQL, row)
+    sync_vacancy_skills(cur, [row["id"]], {row["id"]: row["skills"]})
+
+
+def _snapshot(cur, table: str, key: tuple[str, ...]) -> dict:
+    total = ", total" if table.endswith("_hist") else ""
+    cur.execute(f"SELECT {', '.join(key)}, n{total} FROM {table} WHERE n <> 0")
+    return {r[:len(key)]: r[len(key):] for r in cur.fetchall()}
+
+
+def _same(a: dict, b: dict) -> bool:
+    return a.keys() == b.keys() and all(
+        all(math.isclose(x, y, rel_tol=1e-9, abs_tol=1e-6) for x, y in zip(a[k], b[k])) for k in a)
+
+
+def _compare(cur, aggregates: dict, rebuild: list[str]) -> list[tuple[str, bool]]:
+    """Агрегаты после правок через триггеры против пересчёта с нуля (rebuild)."""
+    incremental = {t: _snapshot(cur, t, key) for t, key in aggregates.items()}
+    for sql in rebuild:
+        cur.execute(sql)
+    return [(f"{t} совпадает с пересчётом", _same(incremental[t], _snapshot(cur, t, key)))
+            for t, key in aggregates.items()]
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Проверка агрегатов статистики и навыков: после вставки и смены "
+                                             "зарплаты в пределах корзины они совпадают с пересчётом с нуля")
+    ap.parse_args()
+    assert _bin(CARD["salary_from"]) == _bin(SAME_BIN_SALARY)
+
+    init_db()
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        with conn.transaction():
+            _upsert(cur, CARD)
+            _upsert(cur, {**CARD, "salary_from": SAME_BIN_SALARY, "salary_to": SAME_BIN_SALARY})
+            checks = _compare(cur, AGGREGATES, REBUILD_SQL) + _compare(cur, SKILL_AGGREGATES, SKILLS_REBUILD_SQL)
+            raise psycopg.Rollback()
+
+    for name, ok in checks:
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    sys.exit(0 if all(ok for _, ok in checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import sys
+from datetime import datetime, timezone
+
+import psycopg
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.bd.bd_pool import get_pool
+from hhru_parser.bd.bd_partitions import assign_created_at
+from hhru_parser.bd.bd_vacancy import init_db, UPSERT_SQL, _vacancy_row
+
+# проверочная карточка; всё пишется в одной транзакции и откатывается в конце
+CARD = {
+    "id": "check-upsert-1",
+    "url": "https://hh.ru/vacancy/check-upsert-1",
+    "title": "Python-разработчик",
+    "company_name": "Проверка",
+    "salary_from": 100000,
+    "salary_to": 150000,
+    "salary_currency": "RUB",
+    "description": "Проверка upsert",
+    "skills": ["Python", "SQL"],
+}
+
+VALIDATORS_SQL = "SELECT etag, last_modified FROM vacancies WHERE id = %s;"
+
+
+def _upsert(cur, v: dict) -> list[tuple[bool]]:
+    row = _vacancy_row(v, datetime.now(timezone.utc))
+    assign_created_at(cur, [row])
+    cur.execute(UPSERT_SQL, row)
+    return cur.fetchall()
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Проверка upsert: перепарсинг неизменной карточки ничего не пишет "
+                                             "и сохраняет etag/last_modified; новые валидаторы записываются")
+    ap.parse_args()
+
+    init_db()
+    validators = {"etag": 'W/"1"', "last_modified": "Mon, 05 Oct 2026 10:00:00 GMT"}
+    checks = []
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        with conn.transaction():
+            checks.append(("вставка", _upsert(cur, {**CARD, **validators}) == [(True,)]))
+            # перепарсинг из архива: то же содержимое, валидаторов нет
+            checks.append(("перепарсинг не пишет строку", _upsert(cur, CARD) == []))
+            cur.execute(VALIDATORS_SQL, (CARD["id"],))
+            checks.append(("перепарсинг сохраняет валидаторы",
+                           cur.fetchone() == (validators["etag"], validators["last_modified"])))
+            # обновление с ответом 200: содержимое то же, валидаторы новые
+            fresh = {"etag": 'W/"2"', "last_modified": "Tue, 06 Oct 2026 10:00:00 GMT"}
+            checks.append(("новые валидаторы пишутся", _upsert(cur, {**CARD, **fresh}) == [(False,)]))
+            cur.execute(VALIDATORS_SQL, (CARD["id"],))
+            checks.append(("новые валидаторы сохранены", cur.fetchone() == (fresh["etag"], fresh["last_modified"])))
+            checks.append(("повтор с теми же валидаторами не пишет", _upsert(cur, {**CARD, **fresh}) == []))
+            raise psycopg.Rollback()
+
+    for name, ok in checks:
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    sys.exit(0 if all(ok for _, ok in checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
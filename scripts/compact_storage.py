@@ -0,0 +1,29 @@
+import argparse
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.bd.bd_storage import compact_storage
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1024 / 1024:.1f} MB"
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Перевести старые строки vacancies на компактное хранение "
+                                             "(raw_json без копии записи, длинные описания — отдельно)")
+    ap.add_argument("--batch-size", type=int, default=1000, help="Строк в одной транзакции")
+    ap.add_argument("--vacuum", choices=["plain", "full", "none"], default="plain",
+                    help="VACUUM после миграции: plain — место переиспользуется, full — вернуть ОС (блокирует таблицу)")
+    args = ap.parse_args()
+
+    res = compact_storage(batch_size=args.batch_size, vacuum=None if args.vacuum == "none" else args.vacuum)
+    print(f"Переписано строк: {res['rows']} за {res['batches']} пачек | {res['total_time']}s")
+    print(f"Данные (raw_json + описания): {_mb(res['data_bytes_before'])} → {_mb(res['data_bytes_after'])} "
+          f"(освобождено {_mb(res['data_bytes_before'] - res['data_bytes_after'])})")
+    print(f"На диске: {_mb(res['disk_before']['total'])} → {_mb(res['disk_after']['total'])} "
+          f"(освобождено {_mb(res['disk_reclaimed'])})")
+
+
+if __name__ == "__main__":
+    main()
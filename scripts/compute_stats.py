@@ -1,14 +1,31 @@
 import argparse
+import time
 from hhru_parser.logging_setup import setup_logging
-from hhru_parser.bd.bd_vacancy import compute_basic_stats
+from hhru_parser.bd.bd_vacancy import compute_basic_stats, init_db
+from hhru_parser.bd.bd_stats import rebuild_stats, trend_stats, TREND_PERIODS
 
 def main():
     setup_logging()
     ap = argparse.ArgumentParser()
     ap.add_argument("--currency", default="RUB", help="Валюта для расчёта зарплат (по умолчанию RUB)")
+    ap.add_argument("--exact", action="store_true",
+                    help="Точный расчёт по всей таблице vacancies (по умолчанию — из агрегатов, медиана ±1%%)")
+    ap.add_argument("--rebuild", action="store_true", help="Пересчитать агрегаты с нуля перед выводом")
+    ap.add_argument("--trend", choices=TREND_PERIODS,
+                    help="Динамика по неделям/месяцам вместо сводки за всё время")
+    ap.add_argument("--days", type=int, default=30, help="Глубина --trend в днях (по умолчанию 30)")
+    ap.add_argument("--top", type=int, default=5, help="Компаний на период в --trend")
     args = ap.parse_args()
 
-    stats = compute_basic_stats(currency=args.currency)
+    init_db()
+    if args.rebuild:
+        rebuild_stats()
+    if args.trend:
+        print_trends(args)
+        return
+    t0 = time.perf_counter()
+    stats = compute_basic_stats(currency=args.currency, exact=args.exact)
+    took = time.perf_counter() - t0
 
     print("\n== ЗП по группам опыта ==")
     print("bucket   | count |   avg    |  median  | currency")
@@ -24,5 +41,28 @@ def main():
     for row in stats["top_companies"]:
         print(f"- {row['company_name']}: {row['count']}")
 
+    print(f"\n({'точно' if args.exact else 'из агрегатов'}, {took * 1000:.1f} мс)")
+
+def print_trends(args):
+    t0 = time.perf_counter()
+    trends = trend_stats(period=args.trend, days=args.days, currency=args.currency, top=args.top)
+    took = time.perf_counter() - t0
+
+    print(f"\n== Медиана ЗП по группам опыта ({args.currency}) ==")
+    print("period     | bucket  | count |  median")
+    print("---------------------------------------")
+    for row in trends["salary_by_experience"]:
+        print(f"{row['period']} | {row['exp_bucket']:<7} | {row['count']:>5} | {row['median']:>8}")
+
+    print("\n== Формат работы ==")
+    for row in trends["schedule_mix"]:
+        print(f"{row['period']} | {row['schedule']}: {row['count']} ({row['share'] * 100:.1f}%)")
+
+    print(f"\n== Топ-{args.top} компаний ==")
+    for row in trends["top_companies"]:
+        print(f"{row['period']} | {row['company_name']}: {row['count']}")
+
+    print(f"\n(по {args.trend}, с {trends['since']:%Y-%m-%d}, {took * 1000:.1f} мс)")
+
 if __name__ == "__main__":
     main()
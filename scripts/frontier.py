@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.main import run_frontier_enqueue, run_frontier_worker
+from hhru_parser.bd.bd_frontier import init_frontier_async, frontier_stats_async
+from hhru_parser.bd.bd_pool import close_async_pool
+
+
+def _stats() -> dict:
+    async def _run():
+        try:
+            await init_frontier_async()
+            return await frontier_stats_async()
+        finally:
+            await close_async_pool()
+    return asyncio.run(_run())
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Распределённый обход: очередь карточек (frontier) в Postgres")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    enq = sub.add_parser("enqueue", help="Обойти выдачу и поставить карточки в очередь")
+    enq.add_argument("queries", nargs="*", help="Строки поиска")
+    enq.add_argument("--queries-file", help="Файл со строками поиска (по одной на строку)")
+    enq.add_argument("-n", "--limit", type=int, default=2000, help="Сколько карточек на запрос")
+    enq.add_argument("--cookies-file", help="Путь к JSON-файлу с куками hh.ru")
+
+    work = sub.add_parser("work", help="Качать карточки из очереди")
+    work.add_argument("--worker-id", help="Имя воркера (по умолчанию host:pid)")
+    work.add_argument("--batch", type=int, help="Сколько строк забирать за раз")
+    work.add_argument("--lease-minutes", type=float, default=5.0, help="Аренда строки, мин")
+    work.add_argument("--max-attempts", type=int, default=5, help="После стольких попыток — failed")
+    work.add_argument("--idle-timeout", type=float, default=0.0,
+                      help="Ждать новую работу N сек, когда очередь пуста (0 — выйти сразу)")
+    work.add_argument("--cookies-file", help="Путь к JSON-файлу с куками hh.ru")
+    work.add_argument("--bulk", action="store_true", help="Писать в БД через COPY (bulk upsert)")
+    work.add_argument("--parse-executor", choices=["thread", "process"], help="Парсить карточки в пуле потоков/процессов")
+    work.add_argument("--parse-workers", type=int, help="Размер пула парсинга")
+    work.add_argument("--parser-backend", choices=["auto", "selectolax", "lxml", "html.parser"], help="HTML-бэкенд")
+    work.add_argument("--archive-dir", help="Сохранять сырой HTML карточек в архив")
+    work.add_argument("--adaptive-concurrency", action="store_true", help="Адаптивный параллелизм")
+    work.add_argument("--concurrency-ceiling", type=int, default=12, help="Верхняя граница параллелизма")
+
+    sub.add_parser("stats", help="Сколько строк в каждом статусе")
+    args = ap.parse_args()
+
+    if args.cmd == "enqueue":
+        queries = list(args.queries)
+        if args.queries_file:
+            queries += [ln.strip() for ln in Path(args.queries_file).read_text(encoding="utf-8").splitlines()
+                        if ln.strip() and not ln.startswith("#")]
+        if not queries:
+            enq.error("нужен хотя бы один запрос (аргументы или --queries-file)")
+        meta = run_frontier_enqueue(queries, limit=args.limit, cookies_file=args.cookies_file)
+        for q, m in meta["queries"].items():
+            print(f"- {q}: найдено {m['total_found']} | страниц {m['pages']} | в очередь {m['queued']}")
+        print(f"\nFrontier: {json.dumps(meta['frontier'], ensure_ascii=False)}")
+    elif args.cmd == "work":
+        meta = run_frontier_worker(
+            args.worker_id, batch=args.batch, lease_minutes=args.lease_minutes,
+            max_attempts=args.max_attempts, idle_timeout=args.idle_timeout,
+            cookies_file=args.cookies_file, bulk=args.bulk,
+            parse_executor=args.parse_executor, parse_workers=args.parse_workers,
+            parser_backend=args.parser_backend, archive_dir=args.archive_dir,
+            adaptive_concurrency=args.adaptive_concurrency, concurrency_ceiling=args.concurrency_ceiling,
+        )
+        print(f"{meta['worker']}: загружено {meta['ok']} | снято {meta['gone']} | "
+              f"блок {meta['blocked']} | ошибок {meta['error']} | {meta['total_time']}s")
+        print(f"Frontier: {json.dumps(meta['frontier'], ensure_ascii=False)}")
+    else:
+        print(json.dumps(_stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+from datetime import datetime
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.bd.bd_vacancy import init_db
+from hhru_parser.bd.bd_partitions import ensure_partitions, list_partitions, detach_partitions
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Помесячные секции vacancies: список, создание наперёд, архивация")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Секции с размером и числом строк")
+    p_ensure = sub.add_parser("ensure", help="Создать секции наперёд")
+    p_ensure.add_argument("--months-ahead", type=int, default=2)
+    p_detach = sub.add_parser("detach", help="Отсоединить секции старше месяца --before")
+    p_detach.add_argument("--before", required=True, type=lambda s: datetime.strptime(s, "%Y-%m"),
+                          help="YYYY-MM: секции раньше этого месяца")
+    p_detach.add_argument("--drop", action="store_true", help="Удалить, а не оставить отдельной таблицей")
+    args = ap.parse_args()
+
+    init_db()
+    if args.cmd == "list":
+        for p in list_partitions():
+            print(f"{p['name']:<20} {p['rows']:>9} строк {p['bytes'] / 1024 / 1024:>9.1f} MB  {p['bounds']}")
+    elif args.cmd == "ensure":
+        print(f"Создано секций: {ensure_partitions(args.months_ahead)}")
+    else:
+        done = detach_partitions(args.before, drop=args.drop)
+        print(f"{'Удалено' if args.drop else 'Отсоединено'}: {', '.join(done) or 'нечего'}")
+
+
+if __name__ == "__main__":
+    main()
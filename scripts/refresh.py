@@ -0,0 +1,31 @@
+import argparse
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.main import run_refresh
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Обновить устаревшие вакансии условными запросами (ETag/Last-Modified)")
+    ap.add_argument("--max-age-hours", type=float, default=24.0, help="Обновлять записи старше N часов")
+    ap.add_argument("-n", "--limit", type=int, default=500, help="Сколько записей проверить за запуск")
+    ap.add_argument("--cookies-file", help="Путь к JSON-файлу с куками hh.ru")
+    ap.add_argument("--bulk", action="store_true", help="Писать в БД через COPY (bulk upsert)")
+    args = ap.parse_args()
+
+    meta = run_refresh(
+        max_age_hours=args.max_age_hours,
+        limit=args.limit,
+        cookies_file=args.cookies_file,
+        bulk=args.bulk,
+    )
+    print(
+        f"Проверено: {meta['checked']} | изменилось: {meta['ok']} | без изменений (304): {meta['not_modified']} | "
+        f"снято: {meta['gone']} | ошибок: {meta['blocked'] + meta['error']} | {meta['total_time']}s"
+    )
+    w = meta["writes"]
+    print(f"Записано: новых {w['inserted']}, изменено {w['updated']}, без изменений {w['unchanged']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+from datetime import datetime
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.main import run_reparse
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Перепарсить карточки из архива HTML и записать в БД (без сети)")
+    ap.add_argument("--archive-dir", required=True, help="Папка архива (см. --archive-dir в test_requests.py)")
+    ap.add_argument("--since", help="Только загрузки не раньше этой даты (ISO, напр. 2024-05-01)")
+    ap.add_argument("--batch-size", type=int, default=500, help="Размер пачки записи в БД")
+    ap.add_argument("--workers", type=int, help="Парсить в пуле из N процессов")
+    ap.add_argument("--parser-backend", choices=["auto", "selectolax", "lxml", "html.parser"])
+    ap.add_argument("--row", action="store_true", help="Построчный upsert вместо COPY")
+    args = ap.parse_args()
+
+    since = datetime.fromisoformat(args.since) if args.since else None
+    if since and since.tzinfo is None:
+        since = since.astimezone()
+
+    res = run_reparse(
+        args.archive_dir,
+        batch_size=args.batch_size,
+        since=since,
+        parser_backend=args.parser_backend,
+        workers=args.workers,
+        bulk=not args.row,
+    )
+    w = res["writes"]
+    print(f"Перепарсено: {res['parsed']} | ошибок: {res['failed']} | "
+          f"записано: новых {w['inserted']}, изменено {w['updated']}, без изменений {w['unchanged']} | "
+          f"{res['total_time']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import argparse
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.main import run_retry
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Повторить отложенные карточки (403/429, сетевые ошибки прошлых прогонов)")
+    ap.add_argument("-n", "--limit", type=int, default=500, help="Сколько карточек повторить за запуск")
+    ap.add_argument("--cookies-file", help="Путь к JSON-файлу с куками hh.ru")
+    ap.add_argument("--bulk", action="store_true", help="Писать в БД через COPY (bulk upsert)")
+    args = ap.parse_args()
+
+    meta = run_retry(limit=args.limit, cookies_file=args.cookies_file, bulk=args.bulk)
+    print(
+        f"К повтору: {meta['due']} | загружено: {meta['ok']} | снято: {meta['gone']} | "
+        f"снова не удалось: {meta['blocked'] + meta['error']} | {meta['total_time']}s"
+    )
+    for reason, st in meta["queue"].items():
+        print(f"  {reason}: в очереди {st['pending']} (пора {st['due']}), исчерпано попыток {st['exhausted']}")
+
+
+if __name__ == "__main__":
+    main()
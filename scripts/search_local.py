@@ -0,0 +1,40 @@
+import argparse
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.bd.bd_vacancy import init_db
+from hhru_parser.bd.bd_search import search_local
+
+
+def _salary(r: dict) -> str:
+    if r["salary_from"] is None and r["salary_to"] is None:
+        return "з/п не указана"
+    return f"{r['salary_from'] or ''}–{r['salary_to'] or ''} {r['salary_currency'] or ''}".strip()
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Поиск по уже собранным вакансиям (без обращения к hh.ru)")
+    ap.add_argument("query", nargs="?", help='Запрос: слова, "точная фраза", -исключить, or')
+    ap.add_argument("--skill", action="append", default=[], help="Обязательный навык (можно несколько раз)")
+    ap.add_argument("--salary-min", type=int, help="Минимальная зарплата (середина вилки)")
+    ap.add_argument("--currency", default="RUB", help="Валюта для --salary-min")
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+    if not args.query and not args.skill and args.salary_min is None:
+        ap.error("нужен запрос, --skill или --salary-min")
+
+    init_db()
+    results = search_local(args.query, skills=args.skill, salary_min=args.salary_min,
+                           currency=args.currency, limit=args.limit)
+    for i, r in enumerate(results, 1):
+        print(f"{i:>3}. [{r['rank']:.3f}] {r['title']} — {r['company_name'] or '?'} | {_salary(r)}")
+        print(f"     {r['url']}")
+        if r["skills"]:
+            print(f"     навыки: {', '.join(r['skills'])}")
+        if r["snippet"]:
+            print(f"     {' '.join(r['snippet'].split())}")
+    print(f"\nНайдено: {len(results)}")
+
+
+if __name__ == "__main__":
+    main()
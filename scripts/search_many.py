@@ -0,0 +1,77 @@
+import argparse
+from pathlib import Path
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.main import run_batch
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Пакетный парсинг: много запросов в одной сессии с общим бюджетом")
+    ap.add_argument("queries", nargs="*", help="Строки поиска")
+    ap.add_argument("--queries-file", help="Файл со строками поиска (по одной на строку)")
+    ap.add_argument("-n", "--limit", type=int, default=100, help="Сколько карточек на запрос")
+    ap.add_argument("--parallel-queries", type=int, default=4, help="Сколько выдач листать одновременно")
+    ap.add_argument("--cookies-file", help="Путь к JSON-файлу с куками hh.ru")
+    ap.add_argument("--batch-size", type=int, default=200, help="Размер пачки записи в БД")
+    ap.add_argument("--bulk", action="store_true", help="Писать в БД через COPY (bulk upsert)")
+    ap.add_argument("--parse-executor", choices=["thread", "process"], help="Парсить карточки в пуле потоков/процессов")
+    ap.add_argument("--parse-workers", type=int, help="Размер пула парсинга (по умолчанию — число ядер)")
+    ap.add_argument("--parser-backend", choices=["auto", "selectolax", "lxml", "html.parser"],
+                    help="HTML-бэкенд (по умолчанию — HHRU_PARSER_BACKEND или html.parser)")
+    ap.add_argument("--serp-only", action="store_true",
+                    help="Только поля из выдачи (название, компания, зарплата, город) без загрузки карточек")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Только новое с прошлого прогона: выдача по дате до --stop-after известных id подряд")
+    ap.add_argument("--stop-after", type=int, default=20, help="Сколько известных id подряд означают конец нового")
+    ap.add_argument("--split", action="store_true",
+                    help="Делить запросы шире --result-cap на шарды по фасетам (опыт, график, занятость, дата)")
+    ap.add_argument("--result-cap", type=int, default=2000, help="Сколько результатов можно пролистать в одной выдаче")
+    ap.add_argument("--split-areas", help="id регионов hh через запятую для деления по региону (список должен быть полным)")
+    ap.add_argument("--archive-dir", help="Сохранять сырой HTML выдачи и карточек в архив")
+    ap.add_argument("--adaptive-concurrency", action="store_true",
+                    help="Подбирать число одновременных запросов по p95 задержки и доле 403/429")
+    ap.add_argument("--concurrency-ceiling", type=int, default=12, help="Верхняя граница параллелизма")
+    args = ap.parse_args()
+
+    queries = list(args.queries)
+    if args.queries_file:
+        queries += [ln.strip() for ln in Path(args.queries_file).read_text(encoding="utf-8").splitlines()
+                    if ln.strip() and not ln.startswith("#")]
+    if not queries:
+        ap.error("нужен хотя бы один запрос (аргументы или --queries-file)")
+
+    meta = run_batch(
+        queries,
+        limit=args.limit,
+        cookies_file=args.cookies_file,
+        parallel_queries=args.parallel_queries,
+        batch_size=args.batch_size,
+        bulk=args.bulk,
+        parse_executor=args.parse_executor,
+        parse_workers=args.parse_workers,
+        parser_backend=args.parser_backend,
+        archive_dir=args.archive_dir,
+        serp_only=args.serp_only,
+        incremental=args.incremental,
+        stop_after=args.stop_after,
+        split=args.split,
+        split_areas=[a.strip() for a in args.split_areas.split(",") if a.strip()] if args.split_areas else None,
+        result_cap=args.result_cap,
+        adaptive_concurrency=args.adaptive_concurrency,
+        concurrency_ceiling=args.concurrency_ceiling,
+    )
+
+    for q, m in meta["queries"].items():
+        if "error" in m:
+            print(f"- {q}: ошибка {m['error']}")
+        else:
+            print(f"- {q}: найдено {m['total_found']} | загружено {m['count']} | страниц {m['pages']} | {m['total_time']}s")
+    w = meta["writes"]
+    print(f"\nКарточек: {meta['count']} | уникальных id: {meta['unique_ids']} | "
+          f"сохранено: {meta['saved']} (новых {w['inserted']}, изменено {w['updated']}, "
+          f"без изменений {w['unchanged']}) | {meta['total_time']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import argparse
+
+from hhru_parser.logging_setup import setup_logging
+from hhru_parser.bd.bd_vacancy import init_db
+from hhru_parser.bd.bd_skills import top_skills, rebuild_skills
+
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Нормализованные навыки: топ по числу вакансий и зарплаты по навыкам")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_top = sub.add_parser("top", help="Топ навыков (из агрегатов)")
+    p_top.add_argument("--limit", type=int, default=20)
+    p_top.add_argument("--currency", default="RUB", help="Валюта для зарплат по навыку")
+    p_rebuild = sub.add_parser("rebuild", help="Пересобрать навыки из vacancies.skills (после правки словаря синонимов)")
+    p_rebuild.add_argument("--batch-size", type=int, default=1000, help="Вакансий в одной транзакции")
+    p_rebuild.add_argument("--stats", action="store_true", help="Заодно пересчитать агрегаты с нуля")
+    args = ap.parse_args()
+
+    init_db()
+    if args.cmd == "rebuild":
+        res = rebuild_skills(batch_size=args.batch_size, stats=args.stats)
+        print(f"Вакансий: {res['rows']} за {res['batches']} пачек | {res['total_time']}s")
+        return
+
+    print("skill                     | vacancies | with salary |   avg    |  median")
+    print("-----------------------------------------------------------------------")
+    for r in top_skills(limit=args.limit, currency=args.currency):
+        print(f"{r['skill'][:25]:<25} | {r['count']:>9} | {r['salary_count']:>11} | "
+              f"{r['avg'] or '-':>8} | {r['median'] or '-':>8}")
+    print(f"(зарплаты в {args.currency}, медиана ±1%)")
+
+
+if __name__ == "__main__":
+    main()
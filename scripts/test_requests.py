@@ -12,6 +12,22 @@ def main():
     ap.add_argument("--test_query", required=True, help="Строка поиска на hh.ru")
     ap.add_argument("-n", "--limit", type=int, default=5, help="Сколько карточек обрабатывать")
     ap.add_argument("--cookies-file", help="Путь к JSON-файлу с куками hh.ru")
+    ap.add_argument("--batch-size", type=int, default=200, help="Размер пачки записи в БД")
+    ap.add_argument("--bulk", action="store_true", help="Писать в БД через COPY (bulk upsert)")
+    ap.add_argument("--parse-executor", choices=["thread", "process"], help="Парсить карточки в пуле потоков/процессов")
+    ap.add_argument("--parse-workers", type=int, help="Размер пула парсинга (по умолчанию — число ядер)")
+    ap.add_argument("--parser-backend", choices=["auto", "selectolax", "lxml", "html.parser"],
+                    help="HTML-бэкенд (по умолчанию HHRU_PARSER_BACKEND или html.parser)")
+    ap.add_argument("--adaptive-concurrency", action="store_true",
+                    help="Подбирать число одновременных запросов по p95 задержки и доле 403/429")
+    ap.add_argument("--concurrency-floor", type=int, default=1, help="Нижняя граница параллелизма")
+    ap.add_argument("--concurrency-ceiling", type=int, default=12, help="Верхняя граница параллелизма")
+    ap.add_argument("--serp-only", action="store_true",
+                    help="Только поля из выдачи (название, компания, зарплата, город) без загрузки карточек")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Только новое с прошлого прогона: выдача по дате до --stop-after известных id подряд")
+    ap.add_argument("--stop-after", type=int, default=20, help="Сколько известных id подряд означают конец нового")
+    ap.add_argument("--archive-dir", help="Сохранять сырой HTML выдачи и карточек в архив (для reparse.py)")
     args = ap.parse_args()
 
     # необязательно, но удобно: проверим путь к кукам заранее
@@ -25,6 +41,18 @@ def main():
         query=args.test_query,
         limit=args.limit,
         cookies_file=args.cookies_file,
+        batch_size=args.batch_size,
+        bulk=args.bulk,
+        parse_executor=args.parse_executor,
+        parse_workers=args.parse_workers,
+        parser_backend=args.parser_backend,
+        archive_dir=args.archive_dir,
+        serp_only=args.serp_only,
+        incremental=args.incremental,
+        stop_after=args.stop_after,
+        adaptive_concurrency=args.adaptive_concurrency,
+        concurrency_floor=args.concurrency_floor,
+        concurrency_ceiling=args.concurrency_ceiling,
     )
 
     if not items:
@@ -36,8 +64,14 @@ def main():
         f"Processed: {meta.get('count')} | "
         f"avg={meta.get('avg_sec')}s | "
         f"median={meta.get('med_sec')}s | "
-        f"total={meta.get('total_time')}s\n"
+        f"total={meta.get('total_time')}s | "
+        f"retried={meta.get('retried_ok')} deferred={meta.get('deferred')}"
     )
+    w = meta.get("writes") or {}
+    print(f"Writes: inserted={w.get('inserted')} updated={w.get('updated')} unchanged={w.get('unchanged')}\n")
+    conc = meta.get("concurrency") or {}
+    for ch in conc.get("changes", []):
+        print(f"  concurrency {ch['from']} → {ch['to']} at {ch['at']} ({ch['reason']})")
 
     for it in items:
         sal = it.get("salary_text") or "no information"
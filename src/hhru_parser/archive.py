@@ -0,0 +1,122 @@
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd — опционально, иначе gzip из stdlib
+    zstandard = None
+
+
+class HtmlArchive:
+    """
+    Архив сырого HTML на диске.
+
+    blobs/<sha[:2]>/<sha>.<zst|gz> — сжатые страницы, адресуемые sha256 содержимого
+    (одинаковый HTML хранится один раз);
+    index/<YYYY-MM-DD>.jsonl — журнал загрузок: kind (card|serp), key (id вакансии
+    или "запрос|страница"), url, fetched_at, sha256, codec, encoding, size.
+    """
+
+    def __init__(self, root: str | os.PathLike, codec: str | None = None, level: int | None = None):
+        self.log = logging.getLogger(__name__)
+        self.root = Path(root)
+        self.codec = codec or ("zst" if zstandard is not None else "gz")
+        if self.codec == "zst" and zstandard is None:
+            raise RuntimeError("zstandard не установлен — используйте codec='gz'")
+        self.level = level if level is not None else (3 if self.codec == "zst" else 6)
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        (self.root / "index").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.deduped = 0
+
+    # ---------------- запись ----------------
+    def put(self, kind: str, key: str, url: str, html: bytes, encoding: str | None = None,
+            fetched_at: datetime | None = None) -> str:
+        sha = hashlib.sha256(html).hexdigest()
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        path = self._blob_path(sha, self.codec)
+        if path.exists():
+            self.deduped += 1
+        else:
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(path.suffix + f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(self._compress(html))
+            os.replace(tmp, path)
+            self.written += 1
+
+        rec = {
+            "kind": kind,
+            "key": key,
+            "url": url,
+            "fetched_at": fetched_at.isoformat(),
+            "sha256": sha,
+            "codec": self.codec,
+            "encoding": encoding,
+            "size": len(html),
+        }
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock, open(self.root / "index" / f"{fetched_at:%Y-%m-%d}.jsonl", "a", encoding="utf-8") as f:
+            f.write(line)
+        return sha
+
+    # ---------------- чтение ----------------
+    def records(self, kind: str | None = None, since: datetime | None = None) -> Iterator[Dict]:
+        for idx in sorted((self.root / "index").glob("*.jsonl")):
+            with open(idx, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    rec = json.loads(line)
+                    if kind and rec["kind"] != kind:
+                        continue
+                    if since and datetime.fromisoformat(rec["fetched_at"]) < since:
+                        continue
+                    yield rec
+
+    def latest(self, kind: str = "card", since: datetime | None = None) -> Dict[str, Dict]:
+        """Последняя загрузка на каждый key (для карточек — на каждый id вакансии)."""
+        out: Dict[str, Dict] = {}
+        for rec in self.records(kind, since):
+            prev = out.get(rec["key"])
+            if prev is None or rec["fetched_at"] >= prev["fetched_at"]:
+                out[rec["key"]] = rec
+        return out
+
+    def read(self, rec: Dict) -> bytes:
+        data = self._blob_path(rec["sha256"], rec["codec"]).read_bytes()
+        return self._decompress(data, rec["codec"])
+
+    def iter_cards(self, since: datetime | None = None) -> Iterator[Tuple[Dict, bytes]]:
+        """Стримит (запись, html) по последней версии каждой карточки."""
+        for rec in self.latest("card", since).values():
+            try:
+                yield rec, self.read(rec)
+            except FileNotFoundError:
+                self.log.warning("Архив: нет blob %s для %s", rec["sha256"], rec["key"])
+
+    # ---------------- helpers ----------------
+    def _blob_path(self, sha: str, codec: str) -> Path:
+        return self.root / "blobs" / sha[:2] / f"{sha}.{codec}"
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zst":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == "zst":
+            if zstandard is None:
+                raise RuntimeError("zstandard не установлен — не могу прочитать .zst")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+from datetime import timedelta
+
+from .bd_pool import get_async_pool
+from .bd_migrate import migrate_async
+
+# Frontier — общая очередь карточек к загрузке для воркеров на любых узлах.
+# Обход выдачи только кладёт сюда id/url; воркеры забирают пачки через
+# FOR UPDATE SKIP LOCKED под аренду (lease_until), качают, пишут в vacancies
+# и отмечают done. Упавший воркер не теряет работу: по истечении аренды
+# строку заберёт другой.
+#
+# status: pending → leased → done | gone | failed (attempts >= max_attempts)
+
+FRONTIER_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS frontier (
+      id TEXT PRIMARY KEY,
+      url TEXT NOT NULL,
+      query TEXT,
+      status TEXT NOT NULL DEFAULT 'pending',
+      attempts INTEGER NOT NULL DEFAULT 0,
+      lease_until TIMESTAMPTZ,
+      worker TEXT,
+      last_error TEXT,
+      enqueued_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+      updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS frontier_status_idx ON frontier (status, enqueued_at)",
+]
+
+# карточки, уже лежащие в vacancies (кроме неполных serp-строк), в очередь не попадают
+# (тот же дедуп, что existing_ids), а ON CONFLICT не даёт двум узлам поставить один id дважды
+ENQUEUE_SQL = """
+INSERT INTO frontier (id, url, query)
+SELECT t.id, t.url, %(query)s
+FROM unnest(%(ids)s::text[], %(urls)s::text[]) AS t(id, url)
+WHERE NOT EXISTS (SELECT 1 FROM vacancies v WHERE v.id = t.id AND v.source <> 'serp')
+ON CONFLICT (id) DO NOTHING
+RETURNING id;
+"""
+
+CLAIM_SQL = """
+WITH c AS (
+  SELECT id FROM frontier
+  WHERE status = 'pending'
+     OR (status = 'leased' AND lease_until < now())
+  ORDER BY enqueued_at
+  LIMIT %(limit)s
+  FOR UPDATE SKIP LOCKED
+)
+UPDATE frontier f
+SET status = 'leased',
+    lease_until = now() + %(lease)s,
+    worker = %(worker)s,
+    attempts = f.attempts + 1,
+    updated_at = now()
+FROM c
+WHERE f.id = c.id
+RETURNING f.id, f.url, f.attempts;
+"""
+
+# завершать может только владелец аренды: если она истекла и строку забрал
+# другой воркер, его результат не перетираем
+COMPLETE_SQL = """
+UPDATE frontier
+SET status = %(status)s, lease_until = NULL, last_error = NULL, updated_at = now()
+WHERE id = ANY(%(ids)s) AND worker = %(worker)s AND status = 'leased';
+"""
+
+RELEASE_SQL = """
+UPDATE frontier
+SET status = CASE WHEN attempts >= %(max_attempts)s THEN 'failed' ELSE 'pending' END,
+    lease_until = NULL,
+    last_error = %(error)s,
+    updated_at = now()
+WHERE id = ANY(%(ids)s) AND worker = %(worker)s AND status = 'leased';
+"""
+
+STATS_SQL = "SELECT status, count(*) FROM frontier GROUP BY status;"
+
+
+async def init_frontier_async():
+    await migrate_async("frontier", [(1, "base", FRONTIER_SCHEMA_SQL)])
+
+
+async def frontier_enqueue_async(links: list[tuple[str, str]], query: str | None = None) -> int:
+    """links — [(id, url), ...]. Вернёт, сколько реально поставлено в очередь."""
+    if not links:
+        return 0
+    ids, urls = [l[0] for l in links], [l[1] for l in links]
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(ENQUEUE_SQL, {"ids": ids, "urls": urls, "query": query})
+        return len(await cur.fetchall())
+
+
+async def frontier_claim_async(worker: str, limit: int = 20,
+                               lease: timedelta = timedelta(minutes=5)) -> list[tuple[str, str, int]]:
+    """Забирает до limit строк под аренду: [(id, url, attempts), ...]."""
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        async with conn.transaction():
+            await cur.execute(CLAIM_SQL, {"limit": limit, "lease": lease, "worker": worker})
+            return await cur.fetchall()
+
+
+async def frontier_complete_async(ids: list[str], worker: str, status: str = "done") -> None:
+    if not ids:
+        return
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(COMPLETE_SQL, {"ids": ids, "worker": worker, "status": status})
+
+
+async def frontier_release_async(ids: list[str], worker: str, error: str | None = None,
+                                 max_attempts: int = 5) -> None:
+    """Вернуть в очередь (или в failed, если попытки исчерпаны)."""
+    if not ids:
+        return
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(RELEASE_SQL, {"ids": ids, "worker": worker, "error": error,
+                                        "max_attempts": max_attempts})
+
+
+async def frontier_stats_async() -> dict[str, int]:
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(STATS_SQL)
+        return {status: n for status, n in await cur.fetchall()}
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import logging
+
+from .bd_pool import get_pool, get_async_pool
+
+log = logging.getLogger(__name__)
+
+# Версионные миграции схемы: у каждой части схемы (component: vacancies, frontier, ...)
+# свой список шагов (version, name, [sql, ...]). Применённые шаги записываются в
+# schema_version и больше не выполняются; в рамках процесса после первой проверки
+# компонент не трогает БД вовсе. Шаг — одна транзакция под advisory-локом, так что
+# несколько воркеров, стартующих одновременно, не применят его дважды.
+#
+# Новое изменение схемы — новый шаг в конце списка; уже выпущенные шаги не правим.
+
+Migration = tuple[int, str, list[str]]
+
+SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+  component TEXT NOT NULL,
+  version INTEGER NOT NULL,
+  name TEXT NOT NULL,
+  applied_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (component, version)
+)
+"""
+
+CURRENT_SQL = "SELECT coalesce(max(version), 0) FROM schema_version WHERE component = %s;"
+
+LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('schema_version'), hashtext(%s));"
+
+RECORD_SQL = "INSERT INTO schema_version (component, version, name) VALUES (%s, %s, %s);"
+
+_current: set[str] = set()  # компоненты, уже приведённые к последней версии в этом процессе
+
+
+def _pending(migrations: list[Migration], version: int) -> list[Migration]:
+    return [m for m in migrations if m[0] > version]
+
+
+def migrate(component: str, migrations: list[Migration]) -> list[int]:
+    """Применяет недостающие шаги; вернёт их версии (пусто — схема актуальна)."""
+    if component in _current:
+        return []
+    applied: list[int] = []
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(SCHEMA_VERSION_SQL)
+        cur.execute(CURRENT_SQL, (component,))
+        if _pending(migrations, cur.fetchone()[0]):
+            for version, name, statements in migrations:
+                with conn.transaction():
+                    cur.execute(LOCK_SQL, (component,))
+                    cur.execute(CURRENT_SQL, (component,))
+                    if version <= cur.fetchone()[0]:
+                        continue
+                    for sql in statements:
+                        cur.execute(sql)
+                    cur.execute(RECORD_SQL, (component, version, name))
+                log.info("Схема %s: применена миграция %d (%s)", component, version, name)
+                applied.append(version)
+    _current.add(component)
+    return applied
+
+
+async def migrate_async(component: str, migrations: list[Migration]) -> list[int]:
+    if component in _current:
+        return []
+    applied: list[int] = []
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(SCHEMA_VERSION_SQL)
+        await cur.execute(CURRENT_SQL, (component,))
+        if _pending(migrations, (await cur.fetchone())[0]):
+            for version, name, statements in migrations:
+                async with conn.transaction():
+                    await cur.execute(LOCK_SQL, (component,))
+                    await cur.execute(CURRENT_SQL, (component,))
+                    if version <= (await cur.fetchone())[0]:
+                        continue
+                    for sql in statements:
+                        await cur.execute(sql)
+                    await cur.execute(RECORD_SQL, (component, version, name))
+                log.info("Схема %s: применена миграция %d (%s)", component, version, name)
+                applied.append(version)
+    _current.add(component)
+    return applied
@@ -0,0 +1,209 @@
+from __future__ import annotations
+import logging
+from datetime import datetime
+
+from .bd_pool import get_pool, get_async_pool
+from .bd_stats import apply_delta_sql
+
+log = logging.getLogger(__name__)
+
+# vacancies секционирована по месяцам created_at (vacancies_YYYY_MM + vacancies_default
+# на всякий случай). Запросы с условием на created_at (тренды за последние N дней)
+# читают только нужные секции; старые месяцы отсоединяются/удаляются целиком.
+#
+# Уникальность id у секционированной таблицы возможна только вместе с ключом секции,
+# поэтому первичный ключ — (id, created_at), а постоянный created_at каждого id хранит
+# реестр vacancy_ids: upsert берёт дату оттуда и конфликтует по (id, created_at).
+# По той же причине UNIQUE (url) со старой таблицы переехал в реестр: url там следует
+# за последней записью вакансии, и тот же url под другим id по-прежнему даёт ошибку.
+
+ENSURE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION ensure_vacancy_partitions(from_ts timestamptz, to_ts timestamptz)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+  m date := date_trunc('month', from_ts AT TIME ZONE 'UTC')::date;
+  part text;
+  created integer := 0;
+BEGIN
+  WHILE m < (to_ts AT TIME ZONE 'UTC')::date LOOP
+    part := format('vacancies_%s', to_char(m, 'YYYY_MM'));
+    IF to_regclass(part) IS NULL THEN
+      BEGIN
+        EXECUTE format('CREATE TABLE %I PARTITION OF vacancies FOR VALUES FROM (%L) TO (%L)',
+                       part, m::timestamp AT TIME ZONE 'UTC',
+                       (m + interval '1 month')::timestamp AT TIME ZONE 'UTC');
+        created := created + 1;
+      EXCEPTION WHEN check_violation THEN
+        -- строки этого месяца уже попали в vacancies_default: секцию не создать, пока их не перенести
+        RAISE WARNING 'секция % не создана: в vacancies_default есть строки этого месяца', part;
+      END;
+    END IF;
+    m := (m + interval '1 month')::date;
+  END LOOP;
+  RETURN created;
+END $$
+"""
+
+# реестр пишется только для новых id и при смене url
+CREATED_AT_SQL = """
+WITH ins AS (
+  INSERT INTO vacancy_ids (id, url, created_at)
+  SELECT * FROM unnest(%(ids)s::text[], %(urls)s::text[], %(ts)s::timestamptz[])
+  ON CONFLICT (id) DO UPDATE SET url = EXCLUDED.url
+  WHERE vacancy_ids.url IS DISTINCT FROM EXCLUDED.url
+  RETURNING id, created_at
+)
+SELECT id, created_at FROM ins
+UNION ALL
+SELECT id, created_at FROM vacancy_ids WHERE id = ANY(%(ids)s);
+"""
+
+# id, вставленные параллельной транзакцией, CTE выше не видит — дочитываем отдельно
+CREATED_AT_MISSING_SQL = "SELECT id, created_at FROM vacancy_ids WHERE id = ANY(%s);"
+
+ENSURE_SQL = "SELECT ensure_vacancy_partitions(now(), now() + make_interval(months => %s));"
+
+LIST_SQL = """
+SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), pg_total_relation_size(c.oid),
+       coalesce(s.n_live_tup, 0)
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+WHERE i.inhparent = 'vacancies'::regclass
+ORDER BY c.relname;
+"""
+
+
+REGISTRY_URL_SQL = [
+    "ALTER TABLE vacancy_ids ADD COLUMN IF NOT EXISTS url TEXT",
+    "UPDATE vacancy_ids r SET url = v.url FROM vacancies v WHERE v.id = r.id",
+    "ALTER TABLE vacancy_ids ADD CONSTRAINT vacancy_ids_url_key UNIQUE (url)",
+]
+
+
+def partition_migration(columns: list[str], after_copy: list[str]) -> list[str]:
+    """
+    Шаг миграции: обычная vacancies → секционированная. columns — все невычисляемые
+    колонки (salary_mid пересчитается сам); after_copy — что создать на новой таблице
+    после переноса данных (триггеры агрегатов статистики).
+    """
+    cols = ", ".join(columns)
+    return [
+        "CREATE TABLE IF NOT EXISTS vacancy_ids (id TEXT PRIMARY KEY, created_at TIMESTAMPTZ NOT NULL)",
+        "ALTER TABLE vacancies RENAME TO vacancies_heap",
+        """
+        CREATE TABLE vacancies (LIKE vacancies_heap INCLUDING DEFAULTS INCLUDING GENERATED)
+        PARTITION BY RANGE (created_at)
+        """,
+        ENSURE_FUNCTION_SQL,
+        """
+        SELECT ensure_vacancy_partitions(
+          coalesce((SELECT min(created_at) FROM vacancies_heap), now()), now() + interval '3 months')
+        """,
+        "CREATE TABLE IF NOT EXISTS vacancies_default PARTITION OF vacancies DEFAULT",
+        f"INSERT INTO vacancies ({cols}) SELECT {cols} FROM vacancies_heap",
+        "INSERT INTO vacancy_ids (id, created_at) SELECT id, created_at FROM vacancies_heap ON CONFLICT DO NOTHING",
+        # вместе со старой таблицей уходят её индексы, ограничения и триггеры — имена освобождаются
+        "DROP TABLE vacancies_heap",
+        # ключ начинается с id — поиск по id (existing_ids, touch) идёт по нему во всех секциях
+        "ALTER TABLE vacancies ADD PRIMARY KEY (id, created_at)",
+        "CREATE INDEX IF NOT EXISTS vacancies_url_idx ON vacancies (url)",
+        *after_copy,
+    ]
+
+
+def _apply_created_at(rows, pairs) -> set[str]:
+    """Проставляет строкам постоянный created_at из реестра; вернёт id, для которых даты нет."""
+    created = dict(pairs)
+    missing: set[str] = set()
+    for row in rows:
+        ts = created.get(row["id"])
+        if ts is None:
+            missing.add(row["id"])
+        else:
+            row["created_at"] = ts
+    return missing
+
+
+def created_at_params(rows) -> dict:
+    last = {r["id"]: r for r in rows}
+    return {"ids": list(last), "urls": [r["url"] for r in last.values()],
+            "ts": [r["created_at"] for r in last.values()]}
+
+
+def assign_created_at(cur, rows) -> None:
+    rows = list(rows)
+    if not rows:
+        return
+    cur.execute(CREATED_AT_SQL, created_at_params(rows))
+    missing = _apply_created_at(rows, cur.fetchall())
+    if missing:
+        cur.execute(CREATED_AT_MISSING_SQL, (list(missing),))
+        _apply_created_at(rows, cur.fetchall())
+
+
+async def assign_created_at_async(cur, rows) -> None:
+    rows = list(rows)
+    if not rows:
+        return
+    await cur.execute(CREATED_AT_SQL, created_at_params(rows))
+    missing = _apply_created_at(rows, await cur.fetchall())
+    if missing:
+        await cur.execute(CREATED_AT_MISSING_SQL, (list(missing),))
+        _apply_created_at(rows, await cur.fetchall())
+
+
+def ensure_partitions(months_ahead: int = 2) -> int:
+    """Создать секции с текущего месяца на months_ahead вперёд; вернёт число новых."""
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(ENSURE_SQL, (months_ahead + 1,))
+        created = cur.fetchone()[0]
+    if created:
+        log.info("Секции vacancies: создано %d", created)
+    return created
+
+
+async def ensure_partitions_async(months_ahead: int = 2) -> int:
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(ENSURE_SQL, (months_ahead + 1,))
+        created = (await cur.fetchone())[0]
+    if created:
+        log.info("Секции vacancies: создано %d", created)
+    return created
+
+
+def list_partitions() -> list[dict]:
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(LIST_SQL)
+        return [{"name": name, "bounds": bounds, "bytes": size, "rows": rows}
+                for name, bounds, size, rows in cur.fetchall()]
+
+
+def detach_partitions(before: datetime, drop: bool = False) -> list[str]:
+    """
+    Отсоединить помесячные секции, целиком лежащие раньше before (архив: таблица остаётся
+    отдельной, её можно выгрузить pg_dump -t); drop=True — удалить. Их id уходят и из
+    vacancy_ids: снова встреченная вакансия запишется как новая, в текущую секцию, —
+    из vacancy_descriptions и из vacancy_skills (агрегаты навыков следуют сами).
+    Из агрегатов статистики (bd_stats) строки секции вычитаются в той же транзакции.
+    """
+    cutoff = before.strftime("%Y_%m")
+    done: list[str] = []
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        for part in list_partitions():
+            name = part["name"]
+            if name == "vacancies_default" or name[len("vacancies_"):] >= cutoff:
+                continue
+            with conn.transaction():
+                cur.execute(f'ALTER TABLE vacancies DETACH PARTITION "{name}"')
+                cur.execute(f'DELETE FROM vacancy_ids v USING "{name}" p WHERE v.id = p.id')
+                cur.execute(f'DELETE FROM vacancy_descriptions v USING "{name}" p WHERE v.id = p.id')
+                cur.execute(f'DELETE FROM vacancy_skills v USING "{name}" p WHERE v.vacancy_id = p.id')
+                # DETACH триггеры не вызывает — вычитаем секцию из агрегатов сами
+                cur.execute(apply_delta_sql(f'SELECT -1 AS sign, * FROM "{name}"'))
+            if drop:
+                cur.execute(f'DROP TABLE "{name}"')
+            done.append(name)
+            log.info("Секция %s %s", name, "удалена" if drop else "отсоединена")
+    return done
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv(usecwd=True), override=False)
+
+log = logging.getLogger(__name__)
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+# async-пул привязан к event loop, в котором создан
+_apool: Optional[AsyncConnectionPool] = None
+_apool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# пользовательские хуки жизненного цикла соединений (см. set_pool_hooks)
+_hooks: dict[str, Optional[Callable[[psycopg.Connection], None]]] = {
+    "configure": None,
+    "check": None,
+    "reset": None,
+}
+
+
+def _database_url() -> str:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL not set")
+    return url
+
+
+def _configure(conn: psycopg.Connection) -> None:
+    # все функции bd_* рассчитаны на autocommit, транзакции открываются явно
+    conn.autocommit = True
+    if _hooks["configure"]:
+        _hooks["configure"](conn)
+    log.debug("Пул БД: новое соединение %s", conn.info.backend_pid)
+
+
+def _check(conn: psycopg.Connection) -> None:
+    # по умолчанию без лишнего SELECT 1 на каждую выдачу; при нужде — check=ConnectionPool.check_connection
+    if _hooks["check"]:
+        _hooks["check"](conn)
+
+
+def _reset(conn: psycopg.Connection) -> None:
+    if _hooks["reset"]:
+        _hooks["reset"](conn)
+
+
+async def _configure_async(conn: psycopg.AsyncConnection) -> None:
+    await conn.set_autocommit(True)
+    log.debug("Async-пул БД: новое соединение %s", conn.info.backend_pid)
+
+
+def _pool_sizes(min_size: int | None, max_size: int | None, timeout: float | None) -> tuple[int, int, float]:
+    min_size = min_size if min_size is not None else int(os.getenv("DB_POOL_MIN", "1"))
+    max_size = max_size if max_size is not None else int(os.getenv("DB_POOL_MAX", "10"))
+    timeout = timeout if timeout is not None else float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    return min_size, max(min_size, max_size), timeout
+
+
+def set_pool_hooks(configure: Optional[Callable[[psycopg.Connection], None]] = None,
+                   check: Optional[Callable[[psycopg.Connection], None]] = None,
+                   reset: Optional[Callable[[psycopg.Connection], None]] = None) -> None:
+    """
+    Хуки соединений: configure — при создании, check — перед выдачей из пула,
+    reset — при возврате в пул. Действуют и на уже открытый пул.
+    """
+    _hooks.update(configure=configure, check=check, reset=reset)
+
+
+def open_pool(min_size: int | None = None, max_size: int | None = None,
+              timeout: float | None = None) -> ConnectionPool:
+    """
+    Открывает общий пул (идемпотентно). Размеры по умолчанию берутся из
+    DB_POOL_MIN / DB_POOL_MAX / DB_POOL_TIMEOUT.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            return _pool
+        min_size, max_size, timeout = _pool_sizes(min_size, max_size, timeout)
+        _pool = ConnectionPool(
+            _database_url(),
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout,
+            configure=_configure,
+            check=_check,
+            reset=_reset,
+            name="hhru_parser",
+            open=True,
+        )
+        log.info("Пул БД открыт: min=%d max=%d", min_size, max_size)
+        return _pool
+
+
+def get_pool() -> ConnectionPool:
+    if _pool is None or _pool.closed:
+        return open_pool()
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            log.info("Пул БД закрыт: %s", pool_stats())
+            _pool.close()
+        _pool = None
+
+
+def pool_stats() -> dict:
+    """Снимок статистики пула: соединения, ожидания (requests_wait_ms), время использования (usage_ms)."""
+    if _pool is None or _pool.closed:
+        return {}
+    return dict(_pool.get_stats())
+
+
+async def open_async_pool(min_size: int | None = None, max_size: int | None = None,
+                          timeout: float | None = None) -> AsyncConnectionPool:
+    """
+    Async-пул для текущего event loop (идемпотентно). Если пул остался от другого
+    loop (например, после предыдущего asyncio.run) — создаётся новый.
+    """
+    global _apool, _apool_loop
+    loop = asyncio.get_running_loop()
+    if _apool is not None and not _apool.closed and _apool_loop is loop:
+        return _apool
+    min_size, max_size, timeout = _pool_sizes(min_size, max_size, timeout)
+    pool = AsyncConnectionPool(
+        _database_url(),
+        min_size=min_size,
+        max_size=max_size,
+        timeout=timeout,
+        configure=_configure_async,
+        name="hhru_parser_async",
+        open=False,
+    )
+    await pool.open()
+    _apool, _apool_loop = pool, loop
+    log.info("Async-пул БД открыт: min=%d max=%d", min_size, max_size)
+    return pool
+
+
+async def get_async_pool() -> AsyncConnectionPool:
+    return await open_async_pool()
+
+
+async def close_async_pool() -> None:
+    global _apool, _apool_loop
+    pool, _apool, _apool_loop = _apool, None, None
+    if pool is not None and not pool.closed:
+        log.info("Async-пул БД закрыт: %s", dict(pool.get_stats()))
+        await pool.close()
+
+
+def async_pool_stats() -> dict:
+    if _apool is None or _apool.closed:
+        return {}
+    return dict(_apool.get_stats())
+
+
+atexit.register(close_pool)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from .bd_pool import get_async_pool
+from .bd_migrate import migrate_async
+
+# Отложенные повторы карточек, не скачанных из-за 403/429 или сетевых ошибок.
+# Каждая неудача увеличивает attempts и отодвигает next_attempt_at экспоненциально:
+# base * 2^attempts, не больше max_delay. Успешно скачанные (уже есть в vacancies)
+# и снятые строки удаляются. Таблица создаётся при первом обращении: HTTPParser.search*
+# и scripts/search_many.py работают и на базе, которую main не инициализировал.
+
+RETRY_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS card_retries (
+      id TEXT PRIMARY KEY,
+      url TEXT NOT NULL,
+      query TEXT,
+      reason TEXT NOT NULL,
+      attempts INTEGER NOT NULL DEFAULT 1,
+      next_attempt_at TIMESTAMPTZ NOT NULL,
+      created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+      updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS card_retries_next_idx ON card_retries (next_attempt_at)",
+]
+
+RECORD_SQL = """
+INSERT INTO card_retries (id, url, query, reason, attempts, next_attempt_at)
+SELECT t.id, t.url, %(query)s, t.reason, %(attempts)s,
+       now() + make_interval(secs => least(%(max_delay)s, %(base)s * power(2, %(attempts)s)))
+FROM unnest(%(ids)s::text[], %(urls)s::text[], %(reasons)s::text[]) AS t(id, url, reason)
+ON CONFLICT (id) DO UPDATE SET
+  reason = EXCLUDED.reason,
+  attempts = card_retries.attempts + 1,
+  next_attempt_at = now() + make_interval(
+    secs => least(%(max_delay)s, %(base)s * power(2, card_retries.attempts + 1))),
+  updated_at = now();
+"""
+
+DUE_SQL = """
+SELECT id, url, query, reason, attempts
+FROM card_retries
+WHERE next_attempt_at <= now() AND attempts < %(max_attempts)s
+ORDER BY next_attempt_at
+LIMIT %(limit)s;
+"""
+
+PRUNE_SQL = "DELETE FROM card_retries r USING vacancies v WHERE r.id = v.id AND v.source <> 'serp';"
+
+RESOLVE_SQL = "DELETE FROM card_retries WHERE id = ANY(%s);"
+
+STATS_SQL = """
+SELECT reason,
+       count(*) FILTER (WHERE attempts < %(max_attempts)s) AS pending,
+       count(*) FILTER (WHERE attempts >= %(max_attempts)s) AS exhausted,
+       count(*) FILTER (WHERE attempts < %(max_attempts)s AND next_attempt_at <= now()) AS due
+FROM card_retries
+GROUP BY reason;
+"""
+
+
+async def init_retry_async():
+    """Создаёт card_retries; повторный вызов в процессе БД не трогает (см. bd_migrate)."""
+    await migrate_async("card_retries", [(1, "base", RETRY_SCHEMA_SQL)])
+
+
+async def record_card_failures_async(failures: list[tuple[str, str, str]], query: str | None = None,
+                                     attempts: int = 1, base_delay: float = 10.0,
+                                     max_delay: float = 6 * 3600) -> None:
+    """failures — [(id, url, reason), ...]; attempts — сколько попыток уже сделано в этом прогоне."""
+    if not failures:
+        return
+    await init_retry_async()
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(RECORD_SQL, {
+            "ids": [f[0] for f in failures],
+            "urls": [f[1] for f in failures],
+            "reasons": [f[2] for f in failures],
+            "query": query,
+            "attempts": attempts,
+            "base": base_delay,
+            "max_delay": max_delay,
+        })
+
+
+async def due_card_retries_async(limit: int = 500, max_attempts: int = 10) -> list[tuple[str, str, str, str, int]]:
+    """Повторы, чьё время пришло: [(id, url, query, reason, attempts), ...]. Уже скачанные — вычищаются."""
+    await init_retry_async()
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(PRUNE_SQL)
+        await cur.execute(DUE_SQL, {"limit": limit, "max_attempts": max_attempts})
+        return await cur.fetchall()
+
+
+async def resolve_card_retries_async(ids: list[str]) -> None:
+    if not ids:
+        return
+    await init_retry_async()
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(RESOLVE_SQL, (ids,))
+
+
+async def card_retry_stats_async(max_attempts: int = 10) -> dict[str, dict[str, int]]:
+    await init_retry_async()
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(STATS_SQL, {"max_attempts": max_attempts})
+        return {reason: {"pending": p, "exhausted": e, "due": d} for reason, p, e, d in await cur.fetchall()}
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import logging
+import time
+
+from .bd_pool import get_pool
+
+log = logging.getLogger(__name__)
+
+# Локальный поиск по собранным вакансиям, без нового обхода hh.ru.
+# search_tsv — генерируемые tsvector-колонки: у vacancies — заголовок (вес A) и короткое
+# описание, у vacancy_descriptions — длинное описание (вес B); Postgres пересчитывает их
+# сам при любой записи. Конфигурация russian стеммит кириллицу русским стеммером, а
+# латиницу (asciiword) — английским, так что «разработчик»/«разработчики» и
+# «developer»/«developers» находятся одним запросом. Навыки — GIN по skills (@>).
+
+FTS_CONFIG = "russian"
+
+
+def _tsv(column: str, weight: str) -> str:
+    return f"setweight(to_tsvector('{FTS_CONFIG}', coalesce({column}, '')), '{weight}')"
+
+
+SEARCH_MIGRATION_SQL = [
+    f"""
+    ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS ({_tsv("title", "A")} || {_tsv("description", "B")}) STORED
+    """,
+    f"""
+    ALTER TABLE vacancy_descriptions ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS ({_tsv("description", "B")}) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS vacancies_search_idx ON vacancies USING gin (search_tsv)",
+    "CREATE INDEX IF NOT EXISTS vacancy_descriptions_search_idx ON vacancy_descriptions USING gin (search_tsv)",
+    "CREATE INDEX IF NOT EXISTS vacancies_skills_idx ON vacancies USING gin (skills)",
+]
+
+# совпадение в заголовке/коротком описании или в длинном описании: две выборки по своим
+# GIN-индексам, объединённые по id (OR через JOIN индексы бы не использовал)
+_TEXT_HITS = f"""
+SELECT id FROM vacancies WHERE search_tsv @@ websearch_to_tsquery('{FTS_CONFIG}', %(query)s)
+UNION
+SELECT id FROM vacancy_descriptions WHERE search_tsv @@ websearch_to_tsquery('{FTS_CONFIG}', %(query)s)
+"""
+
+_SKILL_HITS = "SELECT id FROM vacancies WHERE skills @> %(skills)s::text[]"
+
+
+def search_sql(query: str | None, skills: list[str] | None, salary_min: int | None) -> str:
+    """SQL для search_local: набор условий зависит от того, какие фильтры заданы."""
+    where = []
+    if query and skills:
+        where.append("v.skills @> %(skills)s::text[]")
+    if salary_min is not None:
+        where.append("v.salary_currency = %(currency)s AND v.salary_mid >= %(salary_min)s")
+    if query:
+        hits = _TEXT_HITS
+        tsquery = f", websearch_to_tsquery('{FTS_CONFIG}', %(query)s) q"
+        rank = "ts_rank(v.search_tsv, q) + coalesce(ts_rank(d.search_tsv, q), 0)"
+        # ts_headline дорогой — только для уже отобранных строк
+        snippet = f"ts_headline('{FTS_CONFIG}', coalesce(description, ''), q, 'MaxWords=25, MinWords=10')"
+    else:
+        hits = _SKILL_HITS if skills else "SELECT id FROM vacancies"
+        tsquery, rank, snippet = "", "0", "left(description, 200)"
+    return f"""
+    WITH hits AS ({hits}),
+    top AS (
+      SELECT v.id, v.url, v.title, v.company_name, v.salary_from, v.salary_to, v.salary_currency,
+             v.skills, v.updated_at, coalesce(d.description, v.description) AS description,
+             {rank} AS rank
+      FROM hits
+      JOIN vacancies v ON v.id = hits.id
+      LEFT JOIN vacancy_descriptions d ON d.id = v.id{tsquery}
+      {"WHERE " + " AND ".join(where) if where else ""}
+      ORDER BY rank DESC, v.updated_at DESC
+      LIMIT %(limit)s
+    )
+    SELECT id, url, title, company_name, salary_from, salary_to, salary_currency, skills, rank, {snippet}
+    FROM top{tsquery}
+    ORDER BY rank DESC, updated_at DESC;
+    """
+
+
+def search_local(query: str | None = None, skills: list[str] | None = None, salary_min: int | None = None,
+                 currency: str = "RUB", limit: int = 20) -> list[dict]:
+    """
+    Поиск по уже собранным вакансиям. query — строка в синтаксисе websearch
+    («python -junior», "точная фраза", or); skills — все перечисленные навыки
+    (точное совпадение тега); salary_min — по середине вилки (salary_mid) в currency.
+    Результаты — по релевантности (ts_rank), при равной — свежие первыми.
+    """
+    query = (query or "").strip() or None
+    skills = [s.strip() for s in skills or () if s.strip()] or None
+    params = {"query": query, "skills": skills, "salary_min": salary_min, "currency": currency, "limit": limit}
+    t0 = time.perf_counter()
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(search_sql(query, skills, salary_min), params)
+        rows = cur.fetchall()
+    log.debug("Локальный поиск %r: %d результатов за %.3f сек", query, len(rows), time.perf_counter() - t0)
+    return [
+        {"id": id_, "url": url, "title": title, "company_name": company,
+         "salary_from": s_from, "salary_to": s_to, "salary_currency": cur_,
+         "skills": sk or [], "rank": round(rank, 4), "snippet": snippet}
+        for id_, url, title, company, s_from, s_to, cur_, sk, rank, snippet in rows
+    ]
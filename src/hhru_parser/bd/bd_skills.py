@@ -0,0 +1,238 @@
+from __future__ import annotations
+import logging
+import time
+
+from .bd_pool import get_pool
+from .bd_migrate import Migration
+from .bd_stats import SALARY_BIN, DELTAS, trigger_sql, hist_summary
+from ..methods.skills import normalize_skills
+
+log = logging.getLogger(__name__)
+
+# Измерение навыков: skills — нормализованные навыки (methods/skills.py), vacancy_skills —
+# связь с вакансиями, заполняется при upsert. В vacancy_skills продублированы валюта и
+# salary_mid вакансии: тогда агрегаты по навыкам (число вакансий, гистограмма зарплат —
+# как в bd_stats) ведут statement-level триггеры на одной таблице, без UNNEST по vacancies.
+
+SKILLS_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS skills (
+      id SERIAL PRIMARY KEY,
+      name TEXT NOT NULL UNIQUE,
+      title TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vacancy_skills (
+      vacancy_id TEXT NOT NULL,
+      skill_id INTEGER NOT NULL REFERENCES skills (id),
+      currency TEXT,
+      salary_mid DOUBLE PRECISION,
+      PRIMARY KEY (vacancy_id, skill_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS vacancy_skills_skill_idx ON vacancy_skills (skill_id) INCLUDE (vacancy_id)",
+    "CREATE TABLE IF NOT EXISTS stats_skill (skill_id INTEGER PRIMARY KEY, n BIGINT NOT NULL)",
+    # топ-N навыков — index-only scan по этому индексу
+    "CREATE INDEX IF NOT EXISTS stats_skill_top_idx ON stats_skill (n DESC, skill_id)",
+    """
+    CREATE TABLE IF NOT EXISTS stats_skill_salary_hist (
+      skill_id INTEGER NOT NULL,
+      currency TEXT NOT NULL,
+      bin INTEGER NOT NULL,
+      n BIGINT NOT NULL,
+      total DOUBLE PRECISION NOT NULL,
+      PRIMARY KEY (skill_id, currency, bin) INCLUDE (n, total)
+    )
+    """,
+]
+
+
+def _apply_sql(delta: str) -> str:
+    return f"""
+    INSERT INTO stats_skill (skill_id, n)
+    SELECT skill_id, sum(sign) FROM ({delta}) d
+    GROUP BY 1 HAVING sum(sign) <> 0 ORDER BY 1
+    ON CONFLICT (skill_id) DO UPDATE SET n = stats_skill.n + EXCLUDED.n;
+
+    INSERT INTO stats_skill_salary_hist (skill_id, currency, bin, n, total)
+    SELECT skill_id, currency, {SALARY_BIN}, sum(sign), sum(sign * salary_mid)
+    FROM ({delta}) d
+    WHERE currency IS NOT NULL AND salary_mid > 0
+    GROUP BY 1, 2, 3 HAVING sum(sign) <> 0 OR sum(sign * salary_mid) <> 0
+    ORDER BY 1, 2, 3
+    ON CONFLICT (skill_id, currency, bin) DO UPDATE
+      SET n = stats_skill_salary_hist.n + EXCLUDED.n, total = stats_skill_salary_hist.total + EXCLUDED.total;
+    """
+
+
+REBUILD_SQL = [
+    "LOCK TABLE vacancy_skills IN SHARE MODE",
+    "TRUNCATE stats_skill, stats_skill_salary_hist",
+    _apply_sql("SELECT 1 AS sign, * FROM vacancy_skills"),
+]
+
+SKILLS_TRIGGERS_SQL = [
+    sql for op in DELTAS for sql in trigger_sql(op, "vacancy_skills", "vacancy_skills_stats", _apply_sql)
+]
+
+SKILLS_MIGRATIONS: list[Migration] = [
+    (1, "skills dimension + aggregates", [*SKILLS_SCHEMA_SQL, *SKILLS_TRIGGERS_SQL]),
+    # как в bd_stats: смена зарплаты в пределах корзины теряла дельту total
+    (2, "same-bin salary deltas", [*SKILLS_TRIGGERS_SQL, *REBUILD_SQL]),
+]
+
+# --- синхронизация vacancy_skills с пачкой вакансий ---
+SKILLS_UPSERT_SQL = """
+INSERT INTO skills (name, title)
+SELECT * FROM unnest(%(names)s::text[], %(titles)s::text[]) ORDER BY 1
+ON CONFLICT (name) DO NOTHING;
+"""
+
+_PAIRS = "unnest(%(pair_ids)s::text[], %(pair_names)s::text[]) p(vacancy_id, name)"
+
+# связи, которых больше нет в навыках вакансии
+VS_DELETE_SQL = f"""
+DELETE FROM vacancy_skills vs USING skills k
+WHERE vs.vacancy_id = ANY(%(ids)s) AND k.id = vs.skill_id
+  AND NOT EXISTS (SELECT 1 FROM {_PAIRS} WHERE p.vacancy_id = vs.vacancy_id AND p.name = k.name);
+"""
+
+VS_INSERT_SQL = f"""
+INSERT INTO vacancy_skills (vacancy_id, skill_id, currency, salary_mid)
+SELECT p.vacancy_id, k.id, v.salary_currency, v.salary_mid
+FROM {_PAIRS}
+JOIN skills k ON k.name = p.name
+JOIN vacancies v ON v.id = p.vacancy_id
+ORDER BY 1, 2
+ON CONFLICT (vacancy_id, skill_id) DO NOTHING;
+"""
+
+# зарплата могла измениться и без смены навыков (в том числе serp-строкой)
+VS_SALARY_SQL = """
+UPDATE vacancy_skills vs SET currency = v.salary_currency, salary_mid = v.salary_mid
+FROM vacancies v
+WHERE vs.vacancy_id = ANY(%s) AND v.id = vs.vacancy_id
+  AND (vs.currency, vs.salary_mid) IS DISTINCT FROM (v.salary_currency, v.salary_mid);
+"""
+
+
+def skill_params(skills_by_id: dict[str, list[str] | None]) -> dict:
+    """{id вакансии: сырые теги} → параметры SKILLS_UPSERT_SQL / VS_DELETE_SQL / VS_INSERT_SQL."""
+    titles: dict[str, str] = {}
+    pair_ids, pair_names = [], []
+    for vacancy_id, raw in skills_by_id.items():
+        for name, title in normalize_skills(raw):
+            titles.setdefault(name, title)
+            pair_ids.append(vacancy_id)
+            pair_names.append(name)
+    return {"ids": list(skills_by_id), "pair_ids": pair_ids, "pair_names": pair_names,
+            "names": list(titles), "titles": list(titles.values())}
+
+
+def sync_vacancy_skills(cur, ids: list[str], skills_by_id: dict[str, list[str] | None]) -> None:
+    """
+    После записи вакансий ids: для skills_by_id (вакансии с известными навыками —
+    не serp-строки) привести vacancy_skills к их навыкам, для всех ids — обновить зарплату.
+    """
+    p = skill_params(skills_by_id)
+    if p["names"]:
+        cur.execute(SKILLS_UPSERT_SQL, p)
+    if p["ids"]:
+        cur.execute(VS_DELETE_SQL, p)
+        cur.execute(VS_INSERT_SQL, p)
+    if ids:
+        cur.execute(VS_SALARY_SQL, (ids,))
+
+
+async def sync_vacancy_skills_async(cur, ids: list[str], skills_by_id: dict[str, list[str] | None]) -> None:
+    p = skill_params(skills_by_id)
+    if p["names"]:
+        await cur.execute(SKILLS_UPSERT_SQL, p)
+    if p["ids"]:
+        await cur.execute(VS_DELETE_SQL, p)
+        await cur.execute(VS_INSERT_SQL, p)
+    if ids:
+        await cur.execute(VS_SALARY_SQL, (ids,))
+
+
+# --- отчёты ---
+TOP_SKILLS_SQL = """
+SELECT s.skill_id, k.title, s.n FROM (
+  SELECT skill_id, n FROM stats_skill WHERE n > 0 ORDER BY n DESC, skill_id LIMIT %s
+) s
+JOIN skills k ON k.id = s.skill_id
+ORDER BY s.n DESC, k.title;
+"""
+
+SKILL_SALARY_SQL = """
+SELECT skill_id, bin, n, total FROM stats_skill_salary_hist
+WHERE skill_id = ANY(%s) AND currency = %s AND n > 0
+ORDER BY skill_id, bin;
+"""
+
+
+def top_skills(limit: int = 20, currency: str = "RUB") -> list[dict]:
+    """
+    Топ навыков по числу вакансий и зарплата по каждому (из агрегатов, медиана ±1%):
+    [{skill, count, salary_count, avg, median, currency}]. salary_* — None, если
+    вакансий с зарплатой в currency нет.
+    """
+    t0 = time.perf_counter()
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(TOP_SKILLS_SQL, (limit,))
+        top = cur.fetchall()
+        cur.execute(SKILL_SALARY_SQL, ([skill_id for skill_id, _, _ in top], currency))
+        bins: dict[int, list[tuple[int, int, float]]] = {}
+        for skill_id, b, n, total in cur.fetchall():
+            bins.setdefault(skill_id, []).append((b, n, total))
+
+    rows = []
+    for skill_id, title, n in top:
+        count, avg, median = hist_summary(bins[skill_id]) if skill_id in bins else (0, None, None)
+        rows.append({"skill": title, "count": int(n), "salary_count": count, "avg": avg,
+                     "median": median, "currency": currency})
+    log.debug("Топ навыков из агрегатов за %.3f сек", time.perf_counter() - t0)
+    return rows
+
+
+# --- полная перенормализация (первое заполнение, правка словаря SKILL_ALIASES) ---
+BATCH_SQL = """
+SELECT id, skills FROM vacancies
+WHERE id > %(after)s
+ORDER BY id
+LIMIT %(limit)s;
+"""
+
+ORPHANS_SQL = """
+DELETE FROM vacancy_skills vs
+WHERE NOT EXISTS (SELECT 1 FROM vacancies v WHERE v.id = vs.vacancy_id);
+"""
+
+
+def rebuild_skills(batch_size: int = 1000, stats: bool = False) -> dict:
+    """
+    Пересобрать vacancy_skills из vacancies.skills пачками по id (агрегаты следуют через
+    триггеры). stats=True — в конце ещё и пересчитать агрегаты с нуля.
+    """
+    t0 = time.perf_counter()
+    after, rows, batches = "", 0, 0
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        while True:
+            cur.execute(BATCH_SQL, {"after": after, "limit": batch_size})
+            batch = cur.fetchall()
+            if not batch:
+                break
+            with conn.transaction():
+                sync_vacancy_skills(cur, [vacancy_id for vacancy_id, _ in batch], dict(batch))
+            after = batch[-1][0]
+            rows += len(batch)
+            batches += 1
+        with conn.transaction():
+            cur.execute(ORPHANS_SQL)
+            if stats:
+                for sql in REBUILD_SQL:
+                    cur.execute(sql)
+    took = round(time.perf_counter() - t0, 2)
+    log.info("Навыки пересобраны: %d вакансий за %d пачек, %.2f сек", rows, batches, took)
+    return {"rows": rows, "batches": batches, "total_time": took}
@@ -0,0 +1,254 @@
+from __future__ import annotations
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from .bd_pool import get_pool
+from .bd_migrate import Migration
+
+log = logging.getLogger(__name__)
+
+# Сводный слой для compute_basic_stats: агрегаты, которые ведут триггеры на vacancies.
+# Statement-level триггеры с transition tables получают все строки пачки разом
+# (upsert построчно, COPY-merge, компактизация — любой путь записи), вычитают старые
+# версии и прибавляют новые; в агрегатах пишутся только ключи с ненулевой дельтой.
+#
+# Медиана — по мёржируемому скетчу: гистограмма зарплат в лог-корзинах шириной
+# SALARY_BIN_BASE (1%), в каждой — число и сумма. Медиана = среднее в корзине, где
+# накопленное число переходит за половину: ошибка меньше ширины корзины.
+# Точный расчёт (PERCENTILE_CONT по всей таблице) — compute_basic_stats(exact=True).
+
+SALARY_BIN_BASE = 1.01
+# ln() определён только для положительных: зарплаты salary_mid > 0 — и в агрегатах, и в точных запросах
+SALARY_BIN = f"floor(ln(salary_mid) / ln({SALARY_BIN_BASE}))::int"
+
+_KEYS = {
+    "exp_bucket": "COALESCE(NULLIF(exp_bucket, ''), 'unknown')",
+    "schedule": "COALESCE(NULLIF(schedule, ''), 'unknown')",
+    "company_name": "COALESCE(NULLIF(company_name, ''), 'unknown')",
+}
+
+STATS_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS stats_salary_hist (
+      currency TEXT NOT NULL,
+      exp_bucket TEXT NOT NULL,
+      bin INTEGER NOT NULL,
+      n BIGINT NOT NULL,
+      total DOUBLE PRECISION NOT NULL,
+      PRIMARY KEY (currency, exp_bucket, bin)
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS stats_schedule (schedule TEXT PRIMARY KEY, n BIGINT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS stats_company (company_name TEXT PRIMARY KEY, n BIGINT NOT NULL)",
+]
+
+
+def apply_delta_sql(delta: str) -> str:
+    """
+    Применение дельты (sign, строка vacancies) ко всем агрегатам. ORDER BY по ключу —
+    одинаковый порядок блокировок у параллельных пачек, без взаимных блокировок.
+    У гистограммы смена зарплаты внутри корзины даёт n = 0, но ненулевой total — её не отбрасываем.
+    """
+    return f"""
+    INSERT INTO stats_salary_hist (currency, exp_bucket, bin, n, total)
+    SELECT salary_currency, {_KEYS["exp_bucket"]}, {SALARY_BIN}, sum(sign), sum(sign * salary_mid)
+    FROM ({delta}) d
+    WHERE salary_currency IS NOT NULL AND salary_mid > 0
+    GROUP BY 1, 2, 3 HAVING sum(sign) <> 0 OR sum(sign * salary_mid) <> 0
+    ORDER BY 1, 2, 3
+    ON CONFLICT (currency, exp_bucket, bin) DO UPDATE
+      SET n = stats_salary_hist.n + EXCLUDED.n, total = stats_salary_hist.total + EXCLUDED.total;
+
+    INSERT INTO stats_schedule (schedule, n)
+    SELECT {_KEYS["schedule"]}, sum(sign) FROM ({delta}) d
+    GROUP BY 1 HAVING sum(sign) <> 0 ORDER BY 1
+    ON CONFLICT (schedule) DO UPDATE SET n = stats_schedule.n + EXCLUDED.n;
+
+    INSERT INTO stats_company (company_name, n)
+    SELECT {_KEYS["company_name"]}, sum(sign) FROM ({delta}) d
+    GROUP BY 1 HAVING sum(sign) <> 0 ORDER BY 1
+    ON CONFLICT (company_name) DO UPDATE SET n = stats_company.n + EXCLUDED.n;
+    """
+
+
+DELTAS = {
+    "insert": "SELECT 1 AS sign, * FROM new_rows",
+    "update": "SELECT -1 AS sign, * FROM old_rows UNION ALL SELECT 1, * FROM new_rows",
+    "delete": "SELECT -1 AS sign, * FROM old_rows",
+}
+_REFERENCING = {
+    "insert": "NEW TABLE AS new_rows",
+    "update": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "OLD TABLE AS old_rows",
+}
+
+
+def trigger_sql(op: str, table: str = "vacancies", name: str = "vacancy_stats", apply=apply_delta_sql) -> list[str]:
+    """Функция и statement-level триггер {name}_{op} на table, применяющие apply(дельта)."""
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {name}_{op}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+          {apply(DELTAS[op])}
+          RETURN NULL;
+        END $$
+        """,
+        f"DROP TRIGGER IF EXISTS {name}_{op} ON {table}",
+        f"""
+        CREATE TRIGGER {name}_{op} AFTER {op.upper()} ON {table}
+        REFERENCING {_REFERENCING[op]}
+        FOR EACH STATEMENT EXECUTE FUNCTION {name}_{op}()
+        """,
+    ]
+
+
+# пересчёт с нуля: заполнение при первой миграции и --rebuild (на случай ручных правок в обход триггеров)
+REBUILD_SQL = [
+    "LOCK TABLE vacancies IN SHARE MODE",
+    "TRUNCATE stats_salary_hist, stats_schedule, stats_company",
+    apply_delta_sql("SELECT 1 AS sign, * FROM vacancies"),
+]
+
+STATS_TRIGGERS_SQL = [sql for op in DELTAS for sql in trigger_sql(op)]
+
+STATS_MIGRATIONS: list[Migration] = [
+    (1, "aggregates + triggers", [*STATS_SCHEMA_SQL, *STATS_TRIGGERS_SQL, *REBUILD_SQL]),
+    # триггеры теряли total при смене зарплаты в пределах корзины — новые функции и пересчёт
+    (2, "same-bin salary deltas", [*STATS_TRIGGERS_SQL, *REBUILD_SQL]),
+]
+
+SALARY_HIST_SQL = """
+SELECT exp_bucket, bin, n, total FROM stats_salary_hist
+WHERE currency = %s AND n > 0
+ORDER BY exp_bucket, bin;
+"""
+
+SCHEDULE_SQL = "SELECT schedule, n FROM stats_schedule WHERE n > 0 ORDER BY n DESC, schedule;"
+
+COMPANIES_SQL = "SELECT company_name, n FROM stats_company WHERE n > 0 ORDER BY n DESC, company_name LIMIT %s;"
+
+EXP_ORDER = {"0-1": 1, "1-3": 2, "3-6": 3, "6+": 4}
+
+
+def hist_summary(bins: list[tuple[int, int, float]]) -> tuple[int, float, float]:
+    """[(bin, n, total), ...] по возрастанию → (count, avg, ~median)."""
+    count = sum(n for _, n, _ in bins)
+    total = sum(t for _, _, t in bins)
+    half, acc = count / 2, 0
+    median = None
+    for _, n, t in bins:
+        acc += n
+        if acc >= half:
+            median = t / n
+            break
+    return count, float(round(total / count)), float(round(median))
+
+
+def summary_stats(currency: str = "RUB", top_companies: int = 15) -> dict:
+    """Та же форма, что у compute_basic_stats, но из агрегатов: время не зависит от размера vacancies."""
+    t0 = time.perf_counter()
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(SALARY_HIST_SQL, (currency,))
+        by_exp: dict[str, list[tuple[int, int, float]]] = {}
+        for exp_bucket, b, n, total in cur.fetchall():
+            by_exp.setdefault(exp_bucket, []).append((b, n, total))
+        cur.execute(SCHEDULE_SQL)
+        schedule_rows = [{"schedule": s, "count": int(n)} for s, n in cur.fetchall()]
+        cur.execute(COMPANIES_SQL, (top_companies,))
+        top_companies_rows = [{"company_name": c, "count": int(n)} for c, n in cur.fetchall()]
+
+    salary_rows = []
+    for exp_bucket in sorted(by_exp, key=lambda e: (EXP_ORDER.get(e, 5), e)):
+        count, avg, median = hist_summary(by_exp[exp_bucket])
+        salary_rows.append({"exp_bucket": exp_bucket, "count": count, "avg": avg,
+                            "median": median, "currency": currency})
+    log.debug("Статистика из агрегатов за %.3f сек", time.perf_counter() - t0)
+    return {
+        "salary_by_experience": salary_rows,
+        "schedule_distribution": schedule_rows,
+        "top_companies": top_companies_rows,
+    }
+
+
+def rebuild_stats() -> None:
+    """Пересчитать агрегаты по всей таблице (на время пересчёта запись в vacancies ждёт)."""
+    t0 = time.perf_counter()
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        with conn.transaction():
+            for sql in REBUILD_SQL:
+                cur.execute(sql)
+    log.info("Агрегаты статистики пересчитаны за %.2f сек", time.perf_counter() - t0)
+
+
+# --- тренды: по неделям/месяцам created_at (когда вакансия впервые попала в базу) ---
+# условие created_at >= since отсекает старые помесячные секции ещё при планировании
+TREND_PERIODS = ("week", "month")
+
+_PERIOD = "date_trunc(%(period)s, created_at AT TIME ZONE 'UTC')"
+
+TREND_SALARY_SQL = f"""
+SELECT {_PERIOD} AS period, {_KEYS["exp_bucket"]} AS exp_bucket, COUNT(*),
+       ROUND(PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY salary_mid))::float AS median
+FROM vacancies
+WHERE created_at >= %(since)s AND salary_currency = %(currency)s AND salary_mid > 0
+GROUP BY 1, 2
+ORDER BY 1, 2;
+"""
+
+TREND_SCHEDULE_SQL = f"""
+SELECT {_PERIOD} AS period, {_KEYS["schedule"]} AS schedule, COUNT(*) AS n
+FROM vacancies
+WHERE created_at >= %(since)s
+GROUP BY 1, 2
+ORDER BY 1, n DESC, 2;
+"""
+
+TREND_COMPANIES_SQL = f"""
+WITH c AS (
+  SELECT {_PERIOD} AS period, {_KEYS["company_name"]} AS company_name, COUNT(*) AS n
+  FROM vacancies
+  WHERE created_at >= %(since)s
+  GROUP BY 1, 2
+)
+SELECT period, company_name, n FROM (
+  SELECT *, row_number() OVER (PARTITION BY period ORDER BY n DESC, company_name) AS rn FROM c
+) t
+WHERE rn <= %(top)s
+ORDER BY period, n DESC, company_name;
+"""
+
+
+def trend_stats(period: str = "week", days: int = 30, currency: str = "RUB", top: int = 5) -> dict:
+    """
+    Динамика за последние days дней по периодам (week/month): медиана зарплаты по группам
+    опыта, доли форматов работы, топ компаний. Читает только секции vacancies за эти дни.
+    """
+    if period not in TREND_PERIODS:
+        raise ValueError(f"period: ожидается одно из {TREND_PERIODS}, получено {period!r}")
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    params = {"period": period, "since": since, "currency": currency, "top": top}
+    t0 = time.perf_counter()
+    with get_pool().connection() as conn, conn.cursor() as cur:
+        cur.execute(TREND_SALARY_SQL, params)
+        salary_rows = [{"period": p.date(), "exp_bucket": e, "count": int(n), "median": m, "currency": currency}
+                       for p, e, n, m in cur.fetchall()]
+        cur.execute(TREND_SCHEDULE_SQL, params)
+        schedule = cur.fetchall()
+        cur.execute(TREND_COMPANIES_SQL, params)
+        company_rows = [{"period": p.date(), "company_name": c, "count": int(n)} for p, c, n in cur.fetchall()]
+
+    totals: dict = {}
+    for p, _, n in schedule:
+        totals[p] = totals.get(p, 0) + n
+    schedule_rows = [{"period": p.date(), "schedule": s, "count": int(n), "share": round(n / totals[p], 3)}
+                     for p, s, n in schedule]
+    salary_rows.sort(key=lambda r: (r["period"], EXP_ORDER.get(r["exp_bucket"], 5), r["exp_bucket"]))
+    log.debug("Тренды (%s, %d дн.) за %.3f сек", period, days, time.perf_counter() - t0)
+    return {
+        "period": period,
+        "since": since,
+        "salary_by_experience": salary_rows,
+        "schedule_mix": schedule_rows,
+        "top_companies": company_rows,
+    }
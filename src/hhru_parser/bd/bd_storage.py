@@ -0,0 +1,110 @@
+from __future__ import annotations
+import logging
+import time
+
+from .bd_vacancy import _conn, init_db, DESCRIPTION_INLINE_MAX
+
+log = logging.getLogger(__name__)
+
+# Переход на компактное хранение для строк, записанных до него: raw_json хранил
+# json.dumps всей записи (с description и вложенным raw_json модели), а описание
+# любой длины лежало в vacancies. Переписываем пачками по id; повторный запуск
+# продолжает с того, что осталось (переписанные строки под условие уже не попадают).
+
+# старый raw_json — копия строки: в нём есть ключ url; новый — только происхождение
+LEGACY_SQL = """
+SELECT id FROM vacancies
+WHERE id > %(after)s
+  AND (raw_json ? 'url' OR length(description) > %(inline_max)s)
+ORDER BY id
+LIMIT %(limit)s;
+"""
+
+# байты данных строк (после TOAST-сжатия): raw_json + описание, где бы оно ни лежало
+SIZE_SQL = """
+SELECT (SELECT coalesce(sum(pg_column_size(raw_json)), 0) + coalesce(sum(pg_column_size(description)), 0)
+        FROM vacancies WHERE id = ANY(%(ids)s))
+     + (SELECT coalesce(sum(pg_column_size(description)), 0)
+        FROM vacancy_descriptions WHERE id = ANY(%(ids)s));
+"""
+
+MOVE_SQL = """
+INSERT INTO vacancy_descriptions (id, description)
+SELECT id, description FROM vacancies
+WHERE id = ANY(%(ids)s) AND length(description) > %(inline_max)s
+ON CONFLICT (id) DO UPDATE SET description = EXCLUDED.description;
+"""
+
+# от старого raw_json оставляем только то, чего нет в колонках (у старых строк — ничего)
+REWRITE_SQL = """
+UPDATE vacancies SET
+  raw_json = CASE WHEN raw_json ? 'url' THEN NULL ELSE raw_json END,
+  description = CASE WHEN length(description) > %(inline_max)s THEN NULL ELSE description END
+WHERE id = ANY(%(ids)s);
+"""
+
+# у секционированной vacancies собственного хранилища нет — суммируем по её секциям
+DISK_SQL = """
+SELECT (SELECT sum(pg_total_relation_size(relid))::bigint FROM pg_partition_tree('vacancies')),
+       coalesce(pg_total_relation_size(to_regclass('vacancy_descriptions')), 0);
+"""
+
+
+def _disk_sizes(cur) -> dict:
+    cur.execute(DISK_SQL)
+    vac, desc = cur.fetchone()
+    return {"vacancies": vac, "vacancy_descriptions": desc, "total": vac + desc}
+
+
+def compact_storage(batch_size: int = 1000, vacuum: str | None = "plain") -> dict:
+    """
+    Переписывает старые строки пачками (каждая — своя транзакция): длинные описания →
+    vacancy_descriptions, raw_json-копия записи → NULL. vacuum: "plain" — VACUUM ANALYZE
+    (место переиспользуется), "full" — VACUUM FULL (вернуть место ОС; блокирует таблицы),
+    None — без VACUUM. Возвращает число строк, байты данных до/после и размеры на диске.
+    """
+    t0 = time.perf_counter()
+    init_db()
+    rows = batches = 0
+    bytes_before = bytes_after = 0
+    params = {"inline_max": DESCRIPTION_INLINE_MAX}
+    with _conn() as conn, conn.cursor() as cur:
+        disk_before = _disk_sizes(cur)
+        after = ""
+        while True:
+            cur.execute(LEGACY_SQL, {**params, "after": after, "limit": batch_size})
+            ids = [r[0] for r in cur.fetchall()]
+            if not ids:
+                break
+            with conn.transaction():
+                cur.execute(SIZE_SQL, {"ids": ids})
+                bytes_before += cur.fetchone()[0]
+                cur.execute(MOVE_SQL, {**params, "ids": ids})
+                cur.execute(REWRITE_SQL, {**params, "ids": ids})
+                cur.execute(SIZE_SQL, {"ids": ids})
+                bytes_after += cur.fetchone()[0]
+            rows += len(ids)
+            batches += 1
+            after = ids[-1]
+            log.info("Компактизация: пачка %d (%d строк, всего %d), данных %d → %d байт",
+                     batches, len(ids), rows, bytes_before, bytes_after)
+
+        if vacuum:
+            for table in ("vacancies", "vacancy_descriptions"):
+                cur.execute(f"VACUUM {'FULL ' if vacuum == 'full' else ''}ANALYZE {table}")
+        disk_after = _disk_sizes(cur)
+
+    total_time = time.perf_counter() - t0
+    reclaimed = disk_before["total"] - disk_after["total"]
+    log.info("Компактизация готова: %d строк, данных освобождено %d байт, на диске %d → %d байт (%.2f сек)",
+             rows, bytes_before - bytes_after, disk_before["total"], disk_after["total"], total_time)
+    return {
+        "rows": rows,
+        "batches": batches,
+        "data_bytes_before": bytes_before,
+        "data_bytes_after": bytes_after,
+        "disk_before": disk_before,
+        "disk_after": disk_after,
+        "disk_reclaimed": reclaimed,
+        "total_time": round(total_time, 3),
+    }
@@ -1,11 +1,20 @@
 from __future__ import annotations
-import os, json
+import json, logging, time
+import hashlib
 from datetime import datetime, timezone
-import psycopg
+
+from .bd_pool import get_pool
+from .bd_migrate import Migration, migrate
+from .bd_stats import STATS_MIGRATIONS, STATS_TRIGGERS_SQL, summary_stats
+from .bd_partitions import partition_migration, assign_created_at, ensure_partitions, REGISTRY_URL_SQL
+from .bd_search import SEARCH_MIGRATION_SQL
+from .bd_skills import SKILLS_MIGRATIONS, sync_vacancy_skills, rebuild_skills
 
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv(usecwd=True), override=False)
 
+log = logging.getLogger(__name__)
+
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS vacancies (
   id TEXT PRIMARY KEY,
@@ -17,6 +26,8 @@ CREATE TABLE IF NOT EXISTS vacancies (
 );
 """
 
+UPDATED_AT_INDEX_SQL = "CREATE INDEX IF NOT EXISTS vacancies_updated_at_idx ON vacancies (updated_at)"
+
 MIGRATIONS = [
     "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS company_name TEXT",
     "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS company_url TEXT",
@@ -35,96 +46,312 @@ MIGRATIONS = [
     "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS skills TEXT[]",
     "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS salary_text TEXT",
     "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS raw_json JSONB",
+    "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS etag TEXT",
+    "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS last_modified TEXT",
+    "ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS content_hash TEXT",
+    # длинные описания — в отдельной таблице: узкая строка vacancies, а текст сжимается
+    # в TOAST уже со 128 байт (по умолчанию — только строки длиннее ~2 КБ)
+    """
+    CREATE TABLE IF NOT EXISTS vacancy_descriptions (
+      id TEXT PRIMARY KEY,
+      description TEXT NOT NULL
+    )
+    """,
+    "ALTER TABLE vacancy_descriptions SET (toast_tuple_target = 128)",
+    UPDATED_AT_INDEX_SQL,
+]
+
+ANALYTICS_INDEXES_SQL = [
+    # статистика зарплат: фильтр по валюте, группировка по опыту, агрегат по salary_mid
+    "CREATE INDEX IF NOT EXISTS vacancies_salary_stats_idx "
+    "ON vacancies (salary_currency, exp_bucket) INCLUDE (salary_mid) WHERE salary_mid IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS vacancies_schedule_idx ON vacancies (schedule)",
+    "CREATE INDEX IF NOT EXISTS vacancies_company_idx ON vacancies (company_name)",
+    # existing_ids: только полные карточки, без похода в таблицу (index-only scan)
+    "CREATE INDEX IF NOT EXISTS vacancies_card_ids_idx ON vacancies (id) WHERE source <> 'serp'",
+]
+
+# середина вилки (или единственная граница) — то, что агрегирует статистика
+SALARY_MID_SQL = """
+ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS salary_mid DOUBLE PRECISION
+GENERATED ALWAYS AS (
+  CASE
+    WHEN salary_from IS NOT NULL AND salary_to IS NOT NULL THEN (salary_from::float8 + salary_to) / 2
+    ELSE coalesce(salary_from, salary_to)::float8
+  END
+) STORED
+"""
+
+UPSERT_COLUMNS = [
+    "id", "url", "title", "source",
+    "company_name", "company_url",
+    "salary_from", "salary_to", "salary_currency", "is_gross", "salary_text",
+    "experience_text", "exp_bucket",
+    "schedule", "employment_type", "location_city",
+    "responses_count", "published_at", "description", "skills", "raw_json",
+    "etag", "last_modified", "content_hash",
+    "created_at", "updated_at",
+]
+
+# версионные шаги схемы vacancies (см. bd_migrate); первый — всё, что раньше
+# выполнялось при каждом init_db, поэтому на старых базах он безопасен (IF NOT EXISTS)
+VACANCY_MIGRATIONS: list[Migration] = [
+    (1, "base", [SCHEMA_SQL, *MIGRATIONS]),
+    (2, "salary_mid", [SALARY_MID_SQL]),
+    (3, "analytics indexes", ANALYTICS_INDEXES_SQL),
+    # помесячные секции по created_at (bd_partitions); индексы и триггеры агрегатов
+    # уходят вместе со старой таблицей — создаём их заново уже на секционированной
+    (4, "monthly partitions", partition_migration(
+        UPSERT_COLUMNS,
+        [UPDATED_AT_INDEX_SQL, *ANALYTICS_INDEXES_SQL, *STATS_TRIGGERS_SQL],
+    )),
+    (5, "full-text search", SEARCH_MIGRATION_SQL),
+    # UNIQUE (url) ушёл вместе со старой таблицей — теперь его держит реестр vacancy_ids
+    (6, "url uniqueness in vacancy_ids", REGISTRY_URL_SQL),
+]
+
+# поля, которые есть в выдаче: строка из serp-only режима (source = 'serp') обновляет
+# только их и не затирает описание, навыки и прочее, снятое с карточки
+SERP_COLUMNS = [
+    "url", "title", "company_name", "company_url",
+    "salary_from", "salary_to", "salary_currency", "is_gross", "salary_text",
+    "experience_text", "exp_bucket", "location_city",
+    "updated_at",
 ]
 
-UPSERT_SQL = """
-INSERT INTO vacancies (
-  id, url, title, source,
-  company_name, company_url,
-  salary_from, salary_to, salary_currency, is_gross, salary_text,
-  experience_text, exp_bucket,
-  schedule, employment_type, location_city,
-  responses_count, published_at, description, skills, raw_json,
-  created_at, updated_at
-) VALUES (
-  %(id)s, %(url)s, %(title)s, %(source)s,
-  %(company_name)s, %(company_url)s,
-  %(salary_from)s, %(salary_to)s, %(salary_currency)s, %(is_gross)s, %(salary_text)s,
-  %(experience_text)s, %(exp_bucket)s,
-  %(schedule)s, %(employment_type)s, %(location_city)s,
-  %(responses_count)s, %(published_at)s, %(description)s, %(skills)s, %(raw_json)s,
-  %(created_at)s, %(updated_at)s
+# content_hash = "<хэш полей выдачи>:<хэш остального содержимого>" (см. _content_hash):
+# serp-строка сравнивается и переписывает только первую половину
+_SERP_HASH = "split_part({t}.content_hash, ':', 1)"
+
+# валидаторы условного GET: строка без них (serp, перепарсинг из архива) сохраняет прежние
+_VALIDATORS = ("etag", "last_modified")
+
+def _validator(c: str) -> str:
+    return f"COALESCE(EXCLUDED.{c}, vacancies.{c})"
+
+def _upsert_assignment(c: str) -> str:
+    if c in SERP_COLUMNS:
+        return f"{c} = EXCLUDED.{c}"
+    if c == "content_hash":
+        return (f"{c} = CASE WHEN EXCLUDED.source = 'serp' "
+                f"THEN {_SERP_HASH.format(t='EXCLUDED')} || ':' || split_part(coalesce(vacancies.{c}, ''), ':', 2) "
+                f"ELSE EXCLUDED.{c} END")
+    if c in _VALIDATORS:
+        return f"{c} = {_validator(c)}"
+    return f"{c} = CASE WHEN EXCLUDED.source = 'serp' THEN vacancies.{c} ELSE EXCLUDED.{c} END"
+
+# при конфликте переписываем всё, кроме id и created_at — но только если содержимое
+# изменилось: неизменная строка не пишется вовсе (ни WAL, ни мёртвых версий, ни updated_at).
+# Исключение — новые etag/last_modified карточки: иначе следующий условный GET шёл бы
+# со старыми валидаторами и снова получал 200 вместо 304
+_UPSERT_SET = ",\n  ".join(
+    _upsert_assignment(c) for c in UPSERT_COLUMNS if c not in ("id", "created_at")
 )
-ON CONFLICT (id) DO UPDATE SET
-  url = EXCLUDED.url,
-  title = EXCLUDED.title,
-  source = EXCLUDED.source,
-  company_name = EXCLUDED.company_name,
-  company_url = EXCLUDED.company_url,
-  salary_from = EXCLUDED.salary_from,
-  salary_to = EXCLUDED.salary_to,
-  salary_currency = EXCLUDED.salary_currency,
-  is_gross = EXCLUDED.is_gross,
-  salary_text = EXCLUDED.salary_text,
-  experience_text = EXCLUDED.experience_text,
-  exp_bucket = EXCLUDED.exp_bucket,
-  schedule = EXCLUDED.schedule,
-  employment_type = EXCLUDED.employment_type,
-  location_city = EXCLUDED.location_city,
-  responses_count = EXCLUDED.responses_count,
-  published_at = EXCLUDED.published_at,
-  description = EXCLUDED.description,
-  skills = EXCLUDED.skills,
-  raw_json = EXCLUDED.raw_json,
-  updated_at = EXCLUDED.updated_at;
+
+_UPSERT_WHERE = f"""CASE WHEN EXCLUDED.source = 'serp'
+  THEN {_SERP_HASH.format(t='vacancies')} IS DISTINCT FROM {_SERP_HASH.format(t='EXCLUDED')}
+  ELSE vacancies.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+    OR ((EXCLUDED.etag IS NOT NULL OR EXCLUDED.last_modified IS NOT NULL)
+      AND (vacancies.etag, vacancies.last_modified) IS DISTINCT FROM ({_validator("etag")}, {_validator("last_modified")})) END"""
+
+# RETURNING: true — вставка, false — обновление; неизменные строки не возвращаются
+UPSERT_SQL = f"""
+INSERT INTO vacancies ({", ".join(UPSERT_COLUMNS)})
+VALUES ({", ".join(f"%({c})s" for c in UPSERT_COLUMNS)})
+ON CONFLICT (id, created_at) DO UPDATE SET
+  {_UPSERT_SET}
+WHERE {_UPSERT_WHERE}
+RETURNING (xmax = 0);
+"""
+
+# --- bulk-путь: COPY во временную таблицу + один INSERT ... SELECT на пачку ---
+STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS vacancies_stage
+  (LIKE vacancies INCLUDING DEFAULTS)
+  ON COMMIT DELETE ROWS;
 """
 
+COPY_STAGE_SQL = f"COPY vacancies_stage ({', '.join(UPSERT_COLUMNS)}) FROM STDIN"
+
+MERGE_STAGE_SQL = f"""
+INSERT INTO vacancies ({", ".join(UPSERT_COLUMNS)})
+SELECT {", ".join(UPSERT_COLUMNS)} FROM vacancies_stage
+ON CONFLICT (id, created_at) DO UPDATE SET
+  {_UPSERT_SET}
+WHERE {_UPSERT_WHERE}
+RETURNING (xmax = 0);
+"""
+
+# --- описания: короткие остаются в vacancies.description, длинные — в vacancy_descriptions ---
+DESCRIPTION_INLINE_MAX = 512
+
+DESC_UPSERT_SQL = """
+INSERT INTO vacancy_descriptions (id, description)
+SELECT * FROM unnest(%(ids)s::text[], %(texts)s::text[])
+ON CONFLICT (id) DO UPDATE SET description = EXCLUDED.description
+WHERE vacancy_descriptions.description IS DISTINCT FROM EXCLUDED.description;
+"""
+
+DESC_DELETE_SQL = "DELETE FROM vacancy_descriptions WHERE id = ANY(%s);"
+
+DESC_GET_SQL = """
+SELECT v.id, coalesce(d.description, v.description)
+FROM vacancies v LEFT JOIN vacancy_descriptions d ON d.id = v.id
+WHERE v.id = ANY(%s);
+"""
+
+def _description_writes(rows) -> tuple[dict, list[str]]:
+    """Параметры DESC_UPSERT_SQL для длинных описаний и id, у которых внешнего описания быть не должно."""
+    long = {r["id"]: r["long_description"] for r in rows if r["long_description"] is not None}
+    short = [r["id"] for r in rows if r["long_description"] is None and r["source"] != "serp"]
+    return {"ids": list(long), "texts": list(long.values())}, short
+
 def _conn():
-    url = os.getenv("DATABASE_URL")
-    if not url:
-        raise RuntimeError("DATABASE_URL not set")
-    return psycopg.connect(url, autocommit=True)
+    """Соединение из общего пула (bd_pool); возвращается в пул на выходе из with."""
+    return get_pool().connection()
 
 def init_db():
-    with _conn() as conn, conn.cursor() as cur:
-        cur.execute(SCHEMA_SQL)
-        for sql in MIGRATIONS:
-            cur.execute(sql)
+    migrate("vacancies", VACANCY_MIGRATIONS)
+    # агрегаты статистики ведут триггеры на vacancies — они должны стоять до первой записи
+    migrate("stats", STATS_MIGRATIONS)
+    if 1 in migrate("skills", SKILLS_MIGRATIONS):
+        rebuild_skills()  # первое заполнение vacancy_skills из уже собранных вакансий
+    ensure_partitions()
 
-def upsert_vacancies(vacancies: list[dict]):
+# --- обновление устаревших записей ---
+STALE_SQL = """
+SELECT id, url, etag, last_modified
+FROM vacancies
+WHERE updated_at < %s
+ORDER BY updated_at
+LIMIT %s;
+"""
+
+TOUCH_SQL = "UPDATE vacancies SET updated_at = %s WHERE id = ANY(%s);"
+
+# что входит в content_hash: поля выдачи и остальное содержимое; служебные
+# (raw_json, etag, last_modified, даты) не входят — валидаторы сравнивает _UPSERT_WHERE
+_HASH_SERP = [c for c in SERP_COLUMNS if c != "updated_at"]
+_HASH_REST = [c for c in UPSERT_COLUMNS if c not in _HASH_SERP and c not in (
+    "id", "raw_json", "etag", "last_modified", "content_hash", "created_at", "updated_at")]
+
+def _norm(x):
+    if isinstance(x, str):
+        return x.strip()
+    if isinstance(x, list):
+        return [_norm(i) for i in x]
+    return x
+
+def _digest(row: dict, cols: list[str]) -> str:
+    payload = json.dumps([_norm(row[c]) for c in cols], ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+def _content_hash(row: dict) -> str:
+    return f"{_digest(row, _HASH_SERP)}:{_digest(row, _HASH_REST)}"
+
+def _vacancy_row(v: dict, now: datetime) -> dict:
+    skills = v.get("skills") or []
+    if not isinstance(skills, list):
+        skills = [str(skills)]
+    row = {
+        "id": v.get("id"),
+        "url": v.get("url"),
+        "title": v.get("title"),
+        "source": v.get("source", "http"),
+        "company_name": v.get("company_name"),
+        "company_url": v.get("company_url"),
+        "salary_from": v.get("salary_from"),
+        "salary_to": v.get("salary_to"),
+        "salary_currency": v.get("salary_currency"),
+        "is_gross": v.get("is_gross"),
+        "salary_text": v.get("salary_text"),
+        "experience_text": v.get("experience_text"),
+        "exp_bucket": v.get("exp_bucket"),
+        "schedule": v.get("schedule"),
+        "employment_type": v.get("employment_type"),
+        "location_city": v.get("location_city"),
+        "responses_count": v.get("responses_count"),
+        "published_at": v.get("published_at"),
+        "description": v.get("description"),
+        "skills": skills if skills else None,
+        "raw_json": json.dumps(v["raw_json"], ensure_ascii=False) if v.get("raw_json") else None,
+        "etag": v.get("etag"),
+        "last_modified": v.get("last_modified"),
+        "created_at": now,
+        "updated_at": now,
+    }
+    row["content_hash"] = _content_hash(row)
+    # хэш считается по полному тексту, а в vacancies остаётся только короткий
+    desc = row["description"]
+    row["long_description"] = desc if desc and len(desc) > DESCRIPTION_INLINE_MAX else None
+    if row["long_description"] is not None:
+        row["description"] = None
+    return row
+
+def upsert_vacancies(vacancies: list[dict], bulk: bool = False) -> dict:
+    """
+    Записывает вакансии в БД. bulk=True — COPY во временную таблицу и один
+    INSERT ... ON CONFLICT в одной транзакции вместо запроса на каждую строку.
+    Строки с тем же content_hash не переписываются.
+    Возвращает {"rows", "inserted", "updated", "unchanged", "seconds", "rows_per_sec"}.
+    """
+    if bulk:
+        return upsert_vacancies_copy(vacancies)
+    t0 = time.perf_counter()
     now = datetime.now(timezone.utc)
+    written = []
+    rows = [_vacancy_row(v, now) for v in vacancies]
     with _conn() as conn, conn.cursor() as cur:
-        for v in vacancies:
-            skills = v.get("skills") or []
-            if not isinstance(skills, list):
-                skills = [str(skills)]
-            row = {
-                "id": v.get("id"),
-                "url": v.get("url"),
-                "title": v.get("title"),
-                "source": v.get("source", "http"),
-                "company_name": v.get("company_name"),
-                "company_url": v.get("company_url"),
-                "salary_from": v.get("salary_from"),
-                "salary_to": v.get("salary_to"),
-                "salary_currency": v.get("salary_currency"),
-                "is_gross": v.get("is_gross"),
-                "salary_text": v.get("salary_text"),
-                "experience_text": v.get("experience_text"),
-                "exp_bucket": v.get("exp_bucket"),
-                "schedule": v.get("schedule"),
-                "employment_type": v.get("employment_type"),
-                "location_city": v.get("location_city"),
-                "responses_count": v.get("responses_count"),
-                "published_at": v.get("published_at"),
-                "description": v.get("description"),
-                "skills": skills if skills else None,
-                "raw_json": json.dumps(v, ensure_ascii=False),
-                "created_at": now,
-                "updated_at": now,
-            }
-            cur.execute(UPSERT_SQL, row)
-            
+        # пул в autocommit: без транзакции сбой посреди пачки оставил бы вакансии без описаний и навыков
+        with conn.transaction():
+            assign_created_at(cur, rows)
+            for row in rows:
+                cur.execute(UPSERT_SQL, row)
+                written.extend(cur.fetchall())
+            _write_descriptions(cur, rows)
+            sync_vacancy_skills(cur, *_skill_writes(rows))
+    return _ingest_stats("row", len(vacancies), time.perf_counter() - t0, written)
+
+def upsert_vacancies_copy(vacancies: list[dict]) -> dict:
+    t0 = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    # ON CONFLICT не умеет дважды обновить одну строку в одном запросе — оставляем последнюю версию
+    rows = {v.get("id"): _vacancy_row(v, now) for v in vacancies}
+    if rows:
+        with _conn() as conn, conn.cursor() as cur:
+            with conn.transaction():
+                assign_created_at(cur, rows.values())
+                cur.execute(STAGE_SQL)
+                with cur.copy(COPY_STAGE_SQL) as cp:
+                    for row in rows.values():
+                        cp.write_row([row[c] for c in UPSERT_COLUMNS])
+                cur.execute(MERGE_STAGE_SQL)
+                written = cur.fetchall()
+                _write_descriptions(cur, rows.values())
+                sync_vacancy_skills(cur, *_skill_writes(rows.values()))
+    return _ingest_stats("copy", len(rows), time.perf_counter() - t0, written)
+
+def _skill_writes(rows) -> tuple[list[str], dict]:
+    """Аргументы sync_vacancy_skills: все id пачки и навыки строк с карточки (у serp их нет)."""
+    rows = list(rows)
+    return [r["id"] for r in rows], {r["id"]: r["skills"] for r in rows if r["source"] != "serp"}
+
+def _write_descriptions(cur, rows) -> None:
+    long, short = _description_writes(rows)
+    if long["ids"]:
+        cur.execute(DESC_UPSERT_SQL, long)
+    if short:
+        cur.execute(DESC_DELETE_SQL, (short,))
+
+def _ingest_stats(mode: str, rows: int, seconds: float, written: list[tuple[bool]] = ()) -> dict:
+    """written — строки RETURNING (xmax = 0): true — вставка, false — обновление."""
+    inserted = sum(1 for (ins,) in written if ins)
+    updated = len(written) - inserted
+    rps = round(rows / seconds, 1) if seconds > 0 else None
+    log.info("upsert (%s): %d строк за %.3f сек (%s строк/сек): новых %d, изменено %d, без изменений %d",
+             mode, rows, seconds, rps, inserted, updated, rows - len(written))
+    return {"rows": rows, "inserted": inserted, "updated": updated, "unchanged": rows - len(written),
+            "seconds": round(seconds, 3), "rows_per_sec": rps}
 
 
 from statistics import median
@@ -171,55 +398,74 @@ def _fetch_top_companies(limit: int = 10) -> list[tuple[str | None, int]]:
         return cur.fetchall()
     
 
-def compute_basic_stats(currency: str = "RUB") -> dict:
+# --- запросы статистики (планы проверяет scripts/check_indexes.py) ---
+# фильтр salary_mid > 0 — тот же, что у гистограммы в bd_stats (нулевая вилка не зарплата);
+# из него следует условие частичного индекса vacancies_salary_stats_idx (IS NOT NULL)
+SALARY_BY_EXP_SQL = """
+WITH base AS (
+    SELECT
+        COALESCE(NULLIF(exp_bucket, ''), 'unknown') AS exp_bucket,
+        salary_mid AS sal
+    FROM vacancies
+    WHERE salary_currency = %s
+      AND salary_mid > 0
+)
+SELECT
+    exp_bucket,
+    COUNT(*) AS count,
+    ROUND(AVG(sal))::float AS avg,
+    ROUND(PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY sal))::float AS median
+FROM base
+GROUP BY exp_bucket
+ORDER BY
+    CASE exp_bucket
+        WHEN '0-1' THEN 1
+        WHEN '1-3' THEN 2
+        WHEN '3-6' THEN 3
+        WHEN '6+'  THEN 4
+        ELSE 5
+    END, exp_bucket;
+"""
+
+# группировка по самой колонке (её можно снять с индекса), пустые → 'unknown' уже после
+SCHEDULE_DISTRIBUTION_SQL = """
+SELECT
+    COALESCE(NULLIF(schedule, ''), 'unknown') AS schedule,
+    SUM(n)::bigint AS count
+FROM (SELECT schedule, COUNT(*) AS n FROM vacancies GROUP BY schedule) s
+GROUP BY 1
+ORDER BY count DESC, schedule;
+"""
+
+TOP_COMPANIES_SQL = """
+SELECT
+    COALESCE(NULLIF(company_name, ''), 'unknown') AS company_name,
+    SUM(n)::bigint AS count
+FROM (SELECT company_name, COUNT(*) AS n FROM vacancies GROUP BY company_name) c
+GROUP BY 1
+ORDER BY count DESC, company_name
+LIMIT %s;
+"""
+
+EXISTING_IDS_SQL = "SELECT id FROM vacancies WHERE id = ANY(%s) AND source <> 'serp';"
+
+
+def compute_basic_stats(currency: str = "RUB", exact: bool = False) -> dict:
     """
     Возвращает словарь со сводной статистикой:
       - salary_by_experience: [{exp_bucket, count, avg, median, currency}]
       - schedule_distribution: [{schedule, count}]
       - top_companies: [{company_name, count}]
-    Все агрегаты считаются только по таблице vacancies без JOIN/UNNEST,
+    По умолчанию — из агрегатов (bd_stats), медиана приближённая (±1%).
+    exact=True — точный расчёт по таблице vacancies без JOIN/UNNEST,
     чтобы исключить размножение строк.
     """
+    if not exact:
+        return summary_stats(currency)
     with _conn() as conn, conn.cursor() as cur:
         # --- 1) Зарплата по группам опыта ---
-        # Нормализуем "числовую" зарплату как среднее из (salary_from, salary_to), если есть обе.
-        # Фильтруем по целевой валюте и только по тем вакансиям, где есть хотя бы одно из полей.
-        cur.execute(
-            """
-            WITH base AS (
-                SELECT
-                    COALESCE(NULLIF(exp_bucket, ''), 'unknown') AS exp_bucket,
-                    CASE
-                        WHEN salary_from IS NOT NULL AND salary_to IS NOT NULL
-                            THEN (salary_from + salary_to) / 2.0
-                        WHEN salary_from IS NOT NULL
-                            THEN salary_from::float
-                        WHEN salary_to IS NOT NULL
-                            THEN salary_to::float
-                        ELSE NULL
-                    END AS sal
-                FROM vacancies
-                WHERE salary_currency = %s
-                  AND (salary_from IS NOT NULL OR salary_to IS NOT NULL)
-            )
-            SELECT
-                exp_bucket,
-                COUNT(*) AS count,
-                ROUND(AVG(sal))::float AS avg,
-                ROUND(PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY sal))::float AS median
-            FROM base
-            GROUP BY exp_bucket
-            ORDER BY
-                CASE exp_bucket
-                    WHEN '0-1' THEN 1
-                    WHEN '1-3' THEN 2
-                    WHEN '3-6' THEN 3
-                    WHEN '6+'  THEN 4
-                    ELSE 5
-                END, exp_bucket;
-            """,
-            (currency,),
-        )
+        # "числовая" зарплата — salary_mid (генерируемая колонка): середина вилки или единственная граница
+        cur.execute(SALARY_BY_EXP_SQL, (currency,))
         salary_rows = [
             {
                 "exp_bucket": r[0],
@@ -232,30 +478,11 @@ def compute_basic_stats(currency: str = "RUB") -> dict:
         ]
 
         # --- 2) Распределение по формату работы ---
-        cur.execute(
-            """
-            SELECT
-                COALESCE(NULLIF(schedule, ''), 'unknown') AS schedule,
-                COUNT(*) AS count
-            FROM vacancies
-            GROUP BY COALESCE(NULLIF(schedule, ''), 'unknown')
-            ORDER BY count DESC, schedule;
-            """
-        )
+        cur.execute(SCHEDULE_DISTRIBUTION_SQL)
         schedule_rows = [{"schedule": r[0], "count": int(r[1])} for r in cur.fetchall()]
 
         # --- 3) Топ компаний ---
-        cur.execute(
-            """
-            SELECT
-                COALESCE(NULLIF(company_name, ''), 'unknown') AS company_name,
-                COUNT(*) AS count
-            FROM vacancies
-            GROUP BY COALESCE(NULLIF(company_name, ''), 'unknown')
-            ORDER BY count DESC, company_name
-            LIMIT 15;
-            """
-        )
+        cur.execute(TOP_COMPANIES_SQL, (15,))
         top_companies_rows = [{"company_name": r[0], "count": int(r[1])} for r in cur.fetchall()]
 
     return {
@@ -265,11 +492,35 @@ def compute_basic_stats(currency: str = "RUB") -> dict:
     }
 
 
+def stale_vacancies(older_than: datetime, limit: int = 500) -> list[tuple[str, str, str | None, str | None]]:
+    """(id, url, etag, last_modified) записей с updated_at раньше older_than, самые старые первыми."""
+    with _conn() as conn, conn.cursor() as cur:
+        cur.execute(STALE_SQL, (older_than, limit))
+        return cur.fetchall()
+
+
+def touch_vacancies(ids: list[str]) -> None:
+    """Только отметка «проверено» (ответ 304): updated_at = now, остальные поля не трогаем."""
+    if not ids:
+        return
+    with _conn() as conn, conn.cursor() as cur:
+        cur.execute(TOUCH_SQL, (datetime.now(timezone.utc), ids))
+
+
+def get_descriptions(ids: list[str]) -> dict[str, str | None]:
+    """Полные описания вакансий (из vacancy_descriptions или vacancies.description)."""
+    if not ids:
+        return {}
+    with _conn() as conn, conn.cursor() as cur:
+        cur.execute(DESC_GET_SQL, (ids,))
+        return dict(cur.fetchall())
+
+
 def existing_ids(ids: list[str]) -> set[str]:
-    """Вернёт множество id, которые уже есть в таблице vacancies."""
+    """Вернёт множество id, которые уже есть в таблице vacancies (неполные serp-строки не в счёт)."""
     if not ids:
         return set()
     with _conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT id FROM vacancies WHERE id = ANY(%s);", (ids,))
+        cur.execute(EXISTING_IDS_SQL, (ids,))
         return {row[0] for row in cur.fetchall()}
 
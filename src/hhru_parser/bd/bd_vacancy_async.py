@@ -0,0 +1,99 @@
+from __future__ import annotations
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from .bd_pool import get_async_pool
+from .bd_migrate import migrate_async
+from .bd_stats import STATS_MIGRATIONS
+from .bd_partitions import assign_created_at_async, ensure_partitions_async
+from .bd_skills import SKILLS_MIGRATIONS, sync_vacancy_skills_async, rebuild_skills
+from .bd_vacancy import (
+    VACANCY_MIGRATIONS, UPSERT_SQL, UPSERT_COLUMNS,
+    STAGE_SQL, COPY_STAGE_SQL, MERGE_STAGE_SQL, STALE_SQL, TOUCH_SQL,
+    DESC_UPSERT_SQL, DESC_DELETE_SQL, EXISTING_IDS_SQL,
+    _vacancy_row, _description_writes, _skill_writes, _ingest_stats,
+)
+
+# Async-двойник bd_vacancy на psycopg.AsyncConnection: не блокирует event loop
+# (search_async, run_pipeline_async). SQL и подготовка строк — общие с sync-версией.
+
+
+async def init_db_async():
+    await migrate_async("vacancies", VACANCY_MIGRATIONS)
+    await migrate_async("stats", STATS_MIGRATIONS)
+    if 1 in await migrate_async("skills", SKILLS_MIGRATIONS):
+        await asyncio.to_thread(rebuild_skills)
+    await ensure_partitions_async()
+
+
+async def upsert_vacancies_async(vacancies: list[dict], bulk: bool = False) -> dict:
+    if bulk:
+        return await upsert_vacancies_copy_async(vacancies)
+    t0 = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    written = []
+    rows = [_vacancy_row(v, now) for v in vacancies]
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        async with conn.transaction():
+            await assign_created_at_async(cur, rows)
+            for row in rows:
+                await cur.execute(UPSERT_SQL, row)
+                written.extend(await cur.fetchall())
+            await _write_descriptions_async(cur, rows)
+            await sync_vacancy_skills_async(cur, *_skill_writes(rows))
+    return _ingest_stats("row", len(vacancies), time.perf_counter() - t0, written)
+
+
+async def upsert_vacancies_copy_async(vacancies: list[dict]) -> dict:
+    t0 = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    rows = {v.get("id"): _vacancy_row(v, now) for v in vacancies}
+    if rows:
+        pool = await get_async_pool()
+        async with pool.connection() as conn, conn.cursor() as cur:
+            async with conn.transaction():
+                await assign_created_at_async(cur, rows.values())
+                await cur.execute(STAGE_SQL)
+                async with cur.copy(COPY_STAGE_SQL) as cp:
+                    for row in rows.values():
+                        await cp.write_row([row[c] for c in UPSERT_COLUMNS])
+                await cur.execute(MERGE_STAGE_SQL)
+                written = await cur.fetchall()
+                await _write_descriptions_async(cur, rows.values())
+                await sync_vacancy_skills_async(cur, *_skill_writes(rows.values()))
+    return _ingest_stats("copy", len(rows), time.perf_counter() - t0, written)
+
+
+async def _write_descriptions_async(cur, rows) -> None:
+    long, short = _description_writes(rows)
+    if long["ids"]:
+        await cur.execute(DESC_UPSERT_SQL, long)
+    if short:
+        await cur.execute(DESC_DELETE_SQL, (short,))
+
+
+async def existing_ids_async(ids: list[str]) -> set[str]:
+    """Вернёт множество id, которые уже есть в таблице vacancies (неполные serp-строки не в счёт)."""
+    if not ids:
+        return set()
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(EXISTING_IDS_SQL, (ids,))
+        return {row[0] for row in await cur.fetchall()}
+
+
+async def stale_vacancies_async(older_than: datetime, limit: int = 500) -> list[tuple[str, str, str | None, str | None]]:
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(STALE_SQL, (older_than, limit))
+        return await cur.fetchall()
+
+
+async def touch_vacancies_async(ids: list[str]) -> None:
+    if not ids:
+        return
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(TOUCH_SQL, (datetime.now(timezone.utc), ids))
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from .bd_pool import get_async_pool
+from .bd_migrate import migrate_async
+
+# Водяные знаки инкрементального обхода: для каждого запроса — id с верха выдачи
+# (сортировка по дате публикации) из прошлых прогонов. Следующий прогон листает,
+# пока не встретит подряд stop_after известных id (есть в vacancies или здесь), и
+# останавливается: дальше только то, что уже видели. Таблица создаётся при первом
+# обращении — инкрементальный режим HTTPParser.search* не зависит от инициализации в main.
+
+WATERMARK_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS query_watermarks (
+      query TEXT PRIMARY KEY,
+      top_ids TEXT[] NOT NULL,
+      last_new INTEGER NOT NULL DEFAULT 0,
+      last_run_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+]
+
+GET_SQL = "SELECT top_ids FROM query_watermarks WHERE query = %s;"
+
+SAVE_SQL = """
+INSERT INTO query_watermarks (query, top_ids, last_new, last_run_at)
+VALUES (%(query)s, %(top_ids)s, %(last_new)s, now())
+ON CONFLICT (query) DO UPDATE SET
+  top_ids = EXCLUDED.top_ids,
+  last_new = EXCLUDED.last_new,
+  last_run_at = EXCLUDED.last_run_at;
+"""
+
+
+async def init_watermarks_async():
+    """Создаёт query_watermarks; повторный вызов в процессе БД не трогает (см. bd_migrate)."""
+    await migrate_async("query_watermarks", [(1, "base", WATERMARK_SCHEMA_SQL)])
+
+
+async def get_watermark_async(query: str) -> list[str]:
+    """id с верха выдачи по запросу из прошлых прогонов (пусто — запрос ещё не обходили)."""
+    await init_watermarks_async()
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(GET_SQL, (query,))
+        row = await cur.fetchone()
+        return list(row[0]) if row else []
+
+
+async def save_watermark_async(query: str, top_ids: list[str], last_new: int = 0) -> None:
+    if not top_ids:
+        return
+    await init_watermarks_async()
+    pool = await get_async_pool()
+    async with pool.connection() as conn, conn.cursor() as cur:
+        await cur.execute(SAVE_SQL, {"query": query, "top_ids": top_ids, "last_new": last_new})
+
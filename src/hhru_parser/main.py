@@ -1,11 +1,240 @@
 from __future__ import annotations
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from functools import partial
+from .archive import HtmlArchive
 from .methods.http import HTTPParser
+from .methods.card import CardParser, parse_card_html
+from .bd.bd_pool import close_async_pool
 from .bd.bd_vacancy import init_db, upsert_vacancies
+from .bd.bd_vacancy_async import init_db_async, upsert_vacancies_async
+from .bd.bd_frontier import init_frontier_async, frontier_stats_async
+from .bd.bd_retry import init_retry_async, card_retry_stats_async
+from .bd.bd_watermark import init_watermarks_async
+from .sink import VacancySink
 
-def run_pipeline(query: str, limit: int = 5, cookies_file: str | None = None):
-    init_db()
-    parser = HTTPParser(cookies_file=cookies_file)
-    items, meta = parser.search(query=query, limit=limit)
-    if items:
-        upsert_vacancies(items)
+def run_pipeline(query: str, limit: int = 5, cookies_file: str | None = None,
+                 batch_size: int = 200, flush_interval: float = 5.0, keep_items: bool = True,
+                 bulk: bool = False, parse_executor: str | None = None, parse_workers: int | None = None,
+                 parser_backend: str | None = None, archive_dir: str | None = None,
+                 adaptive_concurrency: bool = False, concurrency_floor: int = 1, concurrency_ceiling: int = 12,
+                 serp_only: bool = False, incremental: bool = False, stop_after: int = 20):
+    async def _run():
+        try:
+            return await run_pipeline_async(
+                query, limit=limit, cookies_file=cookies_file,
+                batch_size=batch_size, flush_interval=flush_interval, keep_items=keep_items, bulk=bulk,
+                parse_executor=parse_executor, parse_workers=parse_workers, parser_backend=parser_backend,
+                archive_dir=archive_dir, adaptive_concurrency=adaptive_concurrency,
+                concurrency_floor=concurrency_floor, concurrency_ceiling=concurrency_ceiling, serp_only=serp_only,
+                incremental=incremental, stop_after=stop_after,
+            )
+        finally:
+            await close_async_pool()
+    return asyncio.run(_run())
+
+async def run_pipeline_async(query: str, limit: int = 5, cookies_file: str | None = None,
+                             batch_size: int = 200, flush_interval: float = 5.0, keep_items: bool = True,
+                             bulk: bool = False, parse_executor: str | None = None,
+                             parse_workers: int | None = None, parser_backend: str | None = None,
+                             archive_dir: str | None = None, adaptive_concurrency: bool = False,
+                             concurrency_floor: int = 1, concurrency_ceiling: int = 12,
+                             serp_only: bool = False, incremental: bool = False, stop_after: int = 20):
+    """
+    Карточки пишутся в БД пачками по мере парсинга, а не одним upsert в конце.
+    serp_only=True — только поля из выдачи, без загрузки карточек (см. HTTPParser.search_async).
+    incremental=True — только новое с прошлого прогона (водяные знаки в query_watermarks).
+    """
+    await init_db_async()
+    await init_retry_async()
+    await init_watermarks_async()
+    flush_fn = partial(upsert_vacancies_async, bulk=bulk)
+    async with HTTPParser(cookies_file=cookies_file, parse_executor=parse_executor,
+                          parse_workers=parse_workers, parser_backend=parser_backend,
+                          archive=HtmlArchive(archive_dir) if archive_dir else None,
+                          adaptive_concurrency=adaptive_concurrency,
+                          concurrency_floor=concurrency_floor, concurrency_ceiling=concurrency_ceiling) as parser:
+        parser.stop_after = stop_after
+        async with VacancySink(flush_fn, batch_size=batch_size, flush_interval=flush_interval) as sink:
+            items, meta = await parser.search_async(query=query, limit=limit, sink=sink, keep_items=keep_items,
+                                                    serp_only=serp_only, incremental=incremental)
+    meta["saved"] = sink.flushed
+    meta["writes"] = sink.writes
     return items, meta
+
+
+def run_batch(queries: list[str], limit: int = 100, cookies_file: str | None = None,
+              parallel_queries: int = 4, batch_size: int = 200, bulk: bool = False,
+              parse_executor: str | None = None, parse_workers: int | None = None,
+              parser_backend: str | None = None, archive_dir: str | None = None,
+              adaptive_concurrency: bool = False, concurrency_ceiling: int = 12,
+              serp_only: bool = False, split: bool = False, split_areas: list[str] | None = None,
+              result_cap: int = 2000, incremental: bool = False, stop_after: int = 20) -> dict:
+    """
+    Пакет запросов в одном event loop и одной HTTP-сессии (см. HTTPParser.search_many):
+    карточки пишутся в БД по мере парсинга, в памяти не копятся. split=True — запросы
+    шире result_cap делятся на шарды по фасетам (опыт, график, занятость, регион, дата).
+    incremental=True — только новое с прошлого прогона (см. HTTPParser.search_async).
+    """
+    async def _run():
+        try:
+            await init_db_async()
+            await init_retry_async()
+            await init_watermarks_async()
+            flush_fn = partial(upsert_vacancies_async, bulk=bulk)
+            async with HTTPParser(cookies_file=cookies_file, parse_executor=parse_executor,
+                                  parse_workers=parse_workers, parser_backend=parser_backend,
+                                  archive=HtmlArchive(archive_dir) if archive_dir else None,
+                                  adaptive_concurrency=adaptive_concurrency,
+                                  concurrency_ceiling=concurrency_ceiling) as parser, \
+                    VacancySink(flush_fn, batch_size=batch_size) as sink:
+                parser.result_cap = result_cap
+                parser.split_areas = tuple(split_areas or ())
+                parser.stop_after = stop_after
+                _, meta = await parser.search_many(queries, limit=limit, sink=sink, keep_items=False,
+                                                   parallel_queries=parallel_queries, serp_only=serp_only,
+                                                   split=split, incremental=incremental)
+            meta["saved"] = sink.flushed
+            meta["writes"] = sink.writes
+            return meta
+        finally:
+            await close_async_pool()
+    return asyncio.run(_run())
+
+
+def run_frontier_enqueue(queries: list[str], limit: int = 2000, cookies_file: str | None = None) -> dict:
+    """Обход выдачи по запросам с постановкой карточек в frontier (без их загрузки)."""
+    async def _run():
+        try:
+            await init_db_async()
+            await init_frontier_async()
+            async with HTTPParser(cookies_file=cookies_file) as parser:
+                per_query = {q: await parser.enqueue_async(q, limit=limit) for q in queries}
+            return {"queries": per_query, "frontier": await frontier_stats_async()}
+        finally:
+            await close_async_pool()
+    return asyncio.run(_run())
+
+
+def run_frontier_worker(worker_id: str | None = None, batch: int | None = None,
+                        lease_minutes: float = 5.0, max_attempts: int = 5, idle_timeout: float = 0.0,
+                        cookies_file: str | None = None, bulk: bool = False,
+                        parse_executor: str | None = None, parse_workers: int | None = None,
+                        parser_backend: str | None = None, archive_dir: str | None = None,
+                        adaptive_concurrency: bool = False, concurrency_ceiling: int = 12) -> dict:
+    """Воркер frontier: таких можно запустить сколько угодно на любых узлах."""
+    async def _run():
+        try:
+            await init_db_async()
+            await init_frontier_async()
+            async with HTTPParser(cookies_file=cookies_file, parse_executor=parse_executor,
+                                  parse_workers=parse_workers, parser_backend=parser_backend,
+                                  archive=HtmlArchive(archive_dir) if archive_dir else None,
+                                  adaptive_concurrency=adaptive_concurrency,
+                                  concurrency_ceiling=concurrency_ceiling) as parser:
+                meta = await parser.work_frontier_async(
+                    worker_id, batch=batch, lease=timedelta(minutes=lease_minutes),
+                    max_attempts=max_attempts, idle_timeout=idle_timeout, bulk=bulk)
+            meta["frontier"] = await frontier_stats_async()
+            return meta
+        finally:
+            await close_async_pool()
+    return asyncio.run(_run())
+
+
+def run_retry(limit: int = 500, cookies_file: str | None = None, batch_size: int = 200,
+              bulk: bool = False) -> dict:
+    """Повтор отложенных карточек (card_retries), чьё время пришло."""
+    async def _run():
+        try:
+            await init_db_async()
+            await init_retry_async()
+            flush_fn = partial(upsert_vacancies_async, bulk=bulk)
+            async with HTTPParser(cookies_file=cookies_file) as parser, \
+                    VacancySink(flush_fn, batch_size=batch_size) as sink:
+                meta = await parser.retry_deferred_async(limit=limit, sink=sink)
+            meta["saved"] = sink.flushed
+            meta["writes"] = sink.writes
+            meta["queue"] = await card_retry_stats_async(parser.retry_max_attempts)
+            return meta
+        finally:
+            await close_async_pool()
+    return asyncio.run(_run())
+
+
+def run_refresh(max_age_hours: float = 24.0, limit: int = 500, cookies_file: str | None = None,
+                batch_size: int = 200, bulk: bool = False) -> dict:
+    """Перепроверка устаревших вакансий условными запросами (см. HTTPParser.refresh_async)."""
+    async def _run():
+        try:
+            await init_db_async()
+            flush_fn = partial(upsert_vacancies_async, bulk=bulk)
+            async with HTTPParser(cookies_file=cookies_file) as parser, \
+                    VacancySink(flush_fn, batch_size=batch_size) as sink:
+                meta = await parser.refresh_async(timedelta(hours=max_age_hours), limit=limit, sink=sink)
+            meta["saved"] = sink.flushed
+            meta["writes"] = sink.writes
+            return meta
+        finally:
+            await close_async_pool()
+    return asyncio.run(_run())
+
+
+def run_reparse(archive_dir: str, batch_size: int = 500, since: datetime | None = None,
+                parser_backend: str | None = None, workers: int | None = None, bulk: bool = True) -> dict:
+    """
+    Офлайн-перепарсинг: последняя версия каждой карточки из архива → parse_vacancy →
+    пачечный upsert. Сеть не используется. workers > 1 — парсинг в пуле процессов.
+    """
+    log = logging.getLogger(__name__)
+    t0 = time.perf_counter()
+    init_db()
+    archive = HtmlArchive(archive_dir)
+    parser = CardParser(parser_backend=parser_backend)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers and workers > 1 else None
+    parse = partial(parse_card_html, backend=parser.backend.name)
+
+    parsed = failed = 0
+    writes = {"inserted": 0, "updated": 0, "unchanged": 0}
+    batch: list[tuple[dict, bytes]] = []
+
+    def flush():
+        nonlocal parsed, failed
+        if not batch:
+            return
+        if pool is not None:
+            futures = [pool.submit(parse, h, r["url"], r.get("encoding")) for r, h in batch]
+            results = (f.result for f in futures)
+        else:
+            results = (partial(parse, h, r["url"], r.get("encoding"), parser) for r, h in batch)
+        items = []
+        for (rec, _), get in zip(batch, results):
+            try:
+                items.append(asdict(get()))
+            except Exception as e:
+                failed += 1
+                log.warning("Перепарсинг: ошибка на %s (%s)", rec["key"], type(e).__name__)
+        if items:
+            res = upsert_vacancies(items, bulk=bulk)
+            for k in writes:
+                writes[k] += res[k]
+        parsed += len(items)
+        batch.clear()
+
+    try:
+        for rec, html in archive.iter_cards(since):
+            batch.append((rec, html))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    total_time = time.perf_counter() - t0
+    log.info("Перепарсинг: %d карточек, ошибок %d, %.2f сек", parsed, failed, total_time)
+    return {"parsed": parsed, "failed": failed, "writes": writes, "total_time": round(total_time, 3)}
@@ -0,0 +1,254 @@
+from __future__ import annotations
+import logging
+import os
+from typing import Dict, Iterator, List, Optional
+
+from bs4 import BeautifulSoup
+
+from hhru_parser.methods.extract import (
+    CARD_QA_TARGETS, RE_COUNTRY, RE_EXPERIENCE, RE_RESPONSES, RE_VACANCY_HREF,
+    SERP_HEADER_FALLBACKS, SERP_HEADER_QA, SERP_HIT_QA, SERP_TITLE_QA,
+    CardRaw, SerpHit, SerpPage, card_from_soup, hits_from_initial_state, serp_field_for_qa, serp_from_soup,
+)
+
+log = logging.getLogger(__name__)
+
+# порядок для "auto": от быстрого к медленному
+BACKENDS = ("selectolax", "lxml", "html.parser")
+DEFAULT_BACKEND = "html.parser"
+
+
+class ParserBackend:
+    """HTML → CardRaw / SerpPage. Базовая реализация — BeautifulSoup с html.parser."""
+
+    name = "html.parser"
+    features = "html.parser"
+
+    def soup(self, html: bytes | str, encoding: str | None = None) -> BeautifulSoup:
+        if isinstance(html, bytes):
+            return BeautifulSoup(html, self.features, from_encoding=encoding)
+        return BeautifulSoup(html, self.features)
+
+    def card(self, html: bytes | str, encoding: str | None = None) -> CardRaw:
+        return card_from_soup(self.soup(html, encoding))
+
+    def serp(self, html: bytes | str, encoding: str | None = None) -> SerpPage:
+        page = serp_from_soup(self.soup(html, encoding))
+        # встроенный JSON полнее разметки (структурная зарплата) — если есть, берём его
+        hits = hits_from_initial_state(html, encoding)
+        if hits is not None:
+            page.hits = hits
+        return page
+
+
+class LxmlBackend(ParserBackend):
+    """Тот же BeautifulSoup, но дерево строит lxml (в разы быстрее html.parser)."""
+
+    name = "lxml"
+    features = "lxml"
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax (lexbor): собственный обход дерева с той же семантикой полей."""
+
+    name = "selectolax"
+
+    # строки внутри этих тегов bs4 не считает текстом страницы
+    _NON_TEXT_PARENTS = frozenset({"script", "style", "template"})
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser_cls = LexborHTMLParser
+
+    def _tree(self, html: bytes | str, encoding: str | None = None):
+        if isinstance(html, bytes):
+            html = html.decode(encoding or "utf-8", errors="replace")
+        return self._parser_cls(html)
+
+    def card(self, html: bytes | str, encoding: str | None = None) -> CardRaw:
+        tree = self._tree(html, encoding)
+        qa: Dict[str, object] = {}
+        h1 = time_el = location_cls = None
+        skill_tags: List[object] = []
+        experience_str = responses_str = country_str = None
+        text_parts: List[str] = []
+
+        for node in tree.root.traverse(include_text=True):
+            tag = node.tag
+            if tag == "-text" or tag == "-comment":
+                s = node.text_content if tag == "-text" else node.comment_content
+                if not s:
+                    continue
+                if tag == "-text" and node.parent is not None and node.parent.tag not in self._NON_TEXT_PARENTS:
+                    stripped = s.strip()
+                    if stripped:
+                        text_parts.append(stripped)
+                if experience_str is None and RE_EXPERIENCE.search(s):
+                    experience_str = s
+                if responses_str is None and RE_RESPONSES.search(s):
+                    responses_str = s
+                if country_str is None and RE_COUNTRY.search(s):
+                    country_str = s
+                continue
+
+            if tag == "h1" and h1 is None:
+                h1 = node
+            elif tag == "time" and time_el is None:
+                time_el = node
+
+            attrs = node.attributes
+            data_qa = attrs.get("data-qa")
+            if data_qa is not None and data_qa in CARD_QA_TARGETS and data_qa not in qa:
+                qa[data_qa] = node
+
+            classes = (attrs.get("class") or "").split()
+            if data_qa == "skills-element" or "bloko-tag__text" in classes:
+                skill_tags.append(node)
+            if location_cls is None and "vacancy-view-location" in classes:
+                location_cls = node
+
+        raw = CardRaw(page_text=" ".join(text_parts))
+
+        el = qa.get("vacancy-title") or h1
+        raw.title = el.text(strip=True) if el else None
+
+        el = qa.get("vacancy-company-name")
+        if el:
+            raw.company_name = el.text(strip=True)
+            link = _find_parent(el, "a") or el.css_first("a")
+            if link is not None and "href" in link.attributes:
+                raw.company_url = link.attributes["href"] or ""
+
+        el = qa.get("vacancy-salary")
+        raw.salary_text = el.text(separator=" ", strip=True) if el else None
+
+        el = qa.get("vacancy-experience")
+        text = el.text(separator=" ", strip=True) if el else None
+        if not text:
+            text = experience_str.strip() if experience_str else None
+        raw.experience_text = text
+
+        el = qa.get("vacancy-view-location")
+        if el:
+            raw.location = el.text(separator=" ", strip=True)
+        elif location_cls:
+            raw.location = location_cls.text(separator=" ", strip=True)
+        elif country_str:
+            raw.location = country_str.strip()
+
+        el = qa.get("vacancy-view-creation-time") or time_el
+        raw.published_at = el.text(separator=" ", strip=True) if el else None
+
+        raw.responses_text = responses_str
+
+        el = qa.get("vacancy-description")
+        raw.description = el.text(separator="\n", strip=True) if el else None
+
+        raw.skills = [el.text(strip=True) for el in skill_tags]
+        return raw
+
+    def serp(self, html: bytes | str, encoding: str | None = None) -> SerpPage:
+        tree = self._tree(html, encoding)
+        el = None
+        for qa in SERP_HEADER_QA:
+            el = tree.css_first(f'[data-qa="{qa}"]')
+            if el is not None:
+                break
+        if el is None:
+            for sel in SERP_HEADER_FALLBACKS:
+                el = tree.css_first(sel)
+                if el is not None and el.text(strip=True):
+                    break
+
+        links = [a.attributes.get("href") for a in tree.css("a.serp-item__title") if a.attributes.get("href")]
+        if not links:
+            links = [a.attributes["href"] for a in tree.css("a[href]")
+                     if a.attributes.get("href") and RE_VACANCY_HREF.search(a.attributes["href"])]
+
+        hits = hits_from_initial_state(html, encoding)
+        return SerpPage(
+            header_text=el.text(separator=" ", strip=True) if el is not None else None,
+            links=links,
+            strings=self._stripped_strings(tree),
+            hits=hits if hits is not None else self._hits(tree),
+        )
+
+    def _hits(self, tree) -> List[SerpHit]:
+        hits: List[SerpHit] = []
+        for box in tree.css(f'[data-qa~="{SERP_HIT_QA}"]'):
+            raw = CardRaw()
+            url = None
+            for el in box.css("[data-qa]"):
+                qa = el.attributes.get("data-qa") or ""
+                if qa == SERP_TITLE_QA and url is None:
+                    a = el if el.tag == "a" else (_find_parent(el, "a") or el.css_first("a"))
+                    url = a.attributes.get("href") if a is not None else None
+                    raw.title = el.text(strip=True)
+                    continue
+                name = serp_field_for_qa(qa)
+                if name is None or getattr(raw, name) is not None:
+                    continue
+                setattr(raw, name, el.text(separator=" ", strip=True))
+                if name == "company_name":
+                    a = el if el.tag == "a" else el.css_first("a")
+                    raw.company_url = a.attributes.get("href") if a is not None else None
+            if url:
+                hits.append(SerpHit(url=url, raw=raw))
+        return hits
+
+    def _stripped_strings(self, tree) -> Iterator[str]:
+        for node in tree.root.traverse(include_text=True):
+            if node.tag != "-text" or node.parent is None or node.parent.tag in self._NON_TEXT_PARENTS:
+                continue
+            s = (node.text_content or "").strip()
+            if s:
+                yield s
+
+
+def _find_parent(node, tag: str):
+    p = node.parent
+    while p is not None:
+        if p.tag == tag:
+            return p
+        p = p.parent
+    return None
+
+
+def _is_available(name: str) -> bool:
+    try:
+        if name == "selectolax":
+            import selectolax.lexbor  # noqa: F401
+        elif name == "lxml":
+            import lxml  # noqa: F401
+    except ImportError:
+        return False
+    return name in BACKENDS
+
+
+def available_backends() -> List[str]:
+    return [b for b in BACKENDS if _is_available(b)]
+
+
+_cache: Dict[str, ParserBackend] = {}
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """
+    Бэкенд по имени: "selectolax" | "lxml" | "html.parser" | "auto" (самый быстрый из установленных).
+    None — из переменной HHRU_PARSER_BACKEND, иначе html.parser. Если нужная библиотека
+    не установлена — откат на html.parser с предупреждением.
+    """
+    key = name or os.getenv("HHRU_PARSER_BACKEND") or DEFAULT_BACKEND
+    if key in _cache:
+        return _cache[key]
+    name = available_backends()[0] if key == "auto" else key
+    if not _is_available(name):
+        log.warning("HTML-бэкенд %r недоступен — используем %s", name, DEFAULT_BACKEND)
+        name = DEFAULT_BACKEND
+    if name == "selectolax":
+        backend: ParserBackend = SelectolaxBackend()
+    elif name == "lxml":
+        backend = LxmlBackend()
+    else:
+        backend = ParserBackend()
+    _cache[key] = backend
+    return backend
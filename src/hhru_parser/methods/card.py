@@ -0,0 +1,229 @@
+from __future__ import annotations
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from hhru_parser.models import Vacancy
+from hhru_parser.methods.extract import CardRaw, SerpHit, SerpPage, card_from_soup
+from hhru_parser.methods.backends import ParserBackend, get_backend
+
+# Разбор уже скачанного HTML (карточки и выдачи) в Vacancy — без сети, сессий и
+# лимитера. HTTPParser наследует его для краулинга; перепарсинг из архива и воркеры
+# пула процессов берут CardParser напрямую.
+
+
+class CardParser:
+    def __init__(self, parser_backend: str | None = None):
+        # HTML-бэкенд для выдачи и карточек (см. methods/backends.py)
+        self.backend: ParserBackend = get_backend(parser_backend)
+
+    # ---------- helpers ----------
+    def _extract_links(self, serp: SerpPage) -> List[str]:
+        seen, uniq = set(), []
+        for u in serp.links:
+            u = u.split("?")[0]
+            if u not in seen:
+                seen.add(u); uniq.append(u)
+        return uniq
+
+    def _extract_total_found(self, serp: SerpPage) -> Optional[int]:
+        def extract_num(text: str) -> Optional[int]:
+            m = re.search(r"(\d[\d\s\u00A0]*)", text or "")
+            if not m:
+                return None
+            num = m.group(1).replace(" ", "").replace("\u00A0", "")
+            try:
+                return int(num)
+            except ValueError:
+                return None
+        if serp.header_text is not None:
+            n = extract_num(serp.header_text)
+            if n is not None:
+                return n
+        for t in serp.strings:
+            n = extract_num(t)
+            if n and n > 10:
+                return n
+        return None
+
+    # ---------- helpers: карточка вакансии ----------
+    def parse_vacancy(self, page: BeautifulSoup | CardRaw | bytes | str, url: str) -> Vacancy:
+        """page — готовый soup, сырой HTML (разбирается self.backend) или уже снятый CardRaw."""
+        if isinstance(page, BeautifulSoup):
+            idx = card_from_soup(page)
+        elif isinstance(page, CardRaw):
+            idx = page
+        else:
+            idx = self.backend.card(page)
+        vac_id = self._extract_id_from_url(url)
+        title = self._parse_title(idx)
+        company_name, company_url = self._parse_company(idx)
+        salary_from, salary_to, salary_currency, is_gross, salary_text = self._parse_salary(idx)
+        experience_text, exp_bucket = self._parse_experience(idx)
+        schedule, employment_type = self._parse_schedule_and_employment(idx)
+        location_city = self._parse_location(idx)
+        published_at = self._parse_published_at(idx)
+        responses_count = self._parse_responses_count(idx)
+        description = self._parse_description(idx)
+        skills = self._parse_skills(idx)
+
+        # только происхождение данных: сами поля уже лежат в колонках
+        raw = {"parser": self.backend.name}
+
+        return Vacancy(
+            id=vac_id,
+            url=url,
+            title=title,
+            company_name=company_name,
+            company_url=company_url,
+            salary_from=salary_from,
+            salary_to=salary_to,
+            salary_currency=salary_currency,
+            is_gross=is_gross,
+            salary_text=salary_text,
+            experience_text=experience_text,
+            exp_bucket=exp_bucket,
+            schedule=schedule,
+            employment_type=employment_type,
+            location_city=location_city,
+            responses_count=responses_count,
+            published_at=published_at,
+            description=description,
+            skills=skills,
+            raw_json=raw,
+        )
+
+    def vacancy_from_hit(self, hit: SerpHit, url: str | None = None) -> Vacancy:
+        """Неполная Vacancy из сниппета выдачи (source="serp"): та же нормализация, что у карточки."""
+        v = self.parse_vacancy(hit.raw, (url or hit.url).split("?")[0])
+        v.source = "serp"
+        comp = hit.compensation
+        if comp and not comp.get("noCompensation"):
+            currency = comp.get("currencyCode")
+            v.salary_from, v.salary_to = comp.get("from"), comp.get("to")
+            v.salary_currency = "RUB" if currency == "RUR" else currency
+            v.is_gross = True if comp.get("gross") else None
+            if v.salary_text is None and (v.salary_from or v.salary_to):
+                parts = [f"от {v.salary_from}" if v.salary_from else "",
+                         f"до {v.salary_to}" if v.salary_to else "",
+                         v.salary_currency or ""]
+                v.salary_text = " ".join(p for p in parts if p)
+            v.raw_json["compensation"] = comp
+        return v
+
+    def _extract_id_from_url(self, url: str) -> str:
+        m = re.search(r"/vacancy/(\d+)", url)
+        return m.group(1) if m else url
+
+    def _parse_title(self, idx: CardRaw) -> Optional[str]:
+        return idx.title
+
+    def _parse_company(self, idx: CardRaw) -> Tuple[Optional[str], Optional[str]]:
+        return idx.company_name, idx.company_url
+
+    def _parse_salary(self, idx: CardRaw):
+        text = idx.salary_text
+        if text is None:
+            return None, None, None, None, None
+        nums = re.findall(r"(\d[\d\s\u00A0]*)", text)
+        def to_int(s):
+            try:
+                return int(s.replace(" ", "").replace("\u00A0", ""))
+            except Exception:
+                return None
+        s_from = s_to = None
+        if len(nums) == 1:
+            s_from = to_int(nums[0])
+        elif len(nums) >= 2:
+            s_from, s_to = to_int(nums[0]), to_int(nums[1])
+        currency = None
+        low = text.lower()
+        if "₽" in text or "руб" in low:
+            currency = "RUB"
+        elif "€" in text or "eur" in low:
+            currency = "EUR"
+        elif "$" in text or "usd" in low:
+            currency = "USD"
+        is_gross = True if "до вычета" in low else None
+        return s_from, s_to, currency, is_gross, text
+
+    def _parse_experience(self, idx: CardRaw) -> Tuple[Optional[str], Optional[str]]:
+        text = idx.experience_text
+        bucket = None
+        if text:
+            m = re.search(r"(\d)[–-](\d)", text)
+            if m:
+                lo, hi = int(m.group(1)), int(m.group(2))
+                if hi <= 1: bucket = "0-1"
+                elif hi <= 3: bucket = "1-3"
+                elif hi <= 6: bucket = "3-6"
+                else: bucket = "6+"
+            else:
+                m2 = re.search(r"(\d+)\+?", text)
+                if m2:
+                    v = int(m2.group(1))
+                    if v <= 1: bucket = "0-1"
+                    elif v <= 3: bucket = "1-3"
+                    elif v <= 6: bucket = "3-6"
+                    else: bucket = "6+"
+        return text, bucket
+
+    def _parse_schedule_and_employment(self, idx: CardRaw) -> Tuple[Optional[str], Optional[str]]:
+        text = idx.page_text.lower()
+        schedule = None
+        if "удал" in text or "remote" in text:
+            schedule = "remote"
+        elif "гибрид" in text or "hybrid" in text:
+            schedule = "hybrid"
+        elif "офис" in text:
+            schedule = "office"
+
+        employment = None
+        if "полная занятость" in text or "full time" in text:
+            employment = "full-time"
+        elif "частичная занятость" in text or "part time" in text:
+            employment = "part-time"
+        elif "стажировка" in text or "intern" in text:
+            employment = "intern"
+
+        return schedule, employment
+
+    def _parse_location(self, idx: CardRaw) -> Optional[str]:
+        return idx.location
+
+    def _parse_published_at(self, idx: CardRaw) -> Optional[str]:
+        return idx.published_at
+
+    def _parse_responses_count(self, idx: CardRaw) -> Optional[int]:
+        el = idx.responses_text
+        if not el:
+            return None
+        m = re.search(r"(\d+)", el)
+        return int(m.group(1)) if m else None
+
+    def _parse_description(self, idx: CardRaw) -> Optional[str]:
+        return idx.description
+
+    def _parse_skills(self, idx: CardRaw) -> List[str]:
+        skills = []
+        for txt in idx.skills:
+            if txt and txt not in skills:
+                skills.append(txt)
+        return skills
+
+
+_card_parsers: Dict[str, CardParser] = {}
+
+def parse_card_html(html: bytes | str, url: str, encoding: str | None = None,
+                    parser: CardParser | None = None, backend: str | None = None) -> Vacancy:
+    """
+    HTML карточки → Vacancy. Функция уровня модуля, чтобы её можно было отдать
+    в ProcessPoolExecutor: на вход сырые байты и URL, на выход пиклящийся Vacancy.
+    """
+    if parser is None:
+        key = backend or ""
+        if key not in _card_parsers:
+            _card_parsers[key] = CardParser(parser_backend=backend)  # один экземпляр на процесс-воркер
+        parser = _card_parsers[key]
+    return parser.parse_vacancy(parser.backend.card(html, encoding), url)
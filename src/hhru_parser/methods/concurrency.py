@@ -0,0 +1,141 @@
+from __future__ import annotations
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Адаптивный лимит одновременных запросов (AIMD с градиентом по задержке, как в
+# Netflix concurrency-limits): окно из window последних ответов; если доля 403/429 и
+# p95 задержки в норме, а лимит реально выбирается — лимит растёт на 1, иначе
+# умножается на decrease. Нормой p95 считается latency_target, а если он не задан —
+# tolerance × лучший p95, виденный за прогон (базовая задержка без очереди).
+
+
+class ConcurrencyLimit:
+    """
+    Семафор с изменяемым лимитом: async with limit: ... ; после ответа — record(latency, blocked).
+    adaptive=False — фиксированный лимит (initial), как обычный Semaphore.
+    """
+
+    def __init__(self, initial: int = 3, floor: int = 1, ceiling: int = 16, adaptive: bool = True,
+                 window: int = 20, latency_target: float | None = None, tolerance: float = 2.0,
+                 max_block_rate: float = 0.05, decrease: float = 0.7, history: int = 500):
+        self.log = logging.getLogger(__name__)
+        self.adaptive = adaptive
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = float(min(self.ceiling, max(self.floor, initial)) if adaptive else max(1, initial))
+        self.window = window
+        self.latency_target = latency_target
+        self.tolerance = tolerance
+        self.max_block_rate = max_block_rate
+        self.decrease = decrease
+
+        self.in_flight = 0
+        self.baseline_p95: Optional[float] = None
+        self.history: Deque[Dict] = deque(maxlen=history)
+        self._samples: List[Tuple[float, bool]] = []
+        self._peak_in_flight = 0
+        self._skip = 0
+        self._cond: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    # ---------------- семафор ----------------
+    @property
+    def max_workers(self) -> int:
+        """Сколько воркеров держать: лимит не может превысить их число."""
+        return self.ceiling if self.adaptive else int(self.limit)
+
+    def _ensure_cond(self) -> asyncio.Condition:
+        # Condition привязывается к циклу: новый asyncio.run → новый Condition
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._loop is not loop:
+            self._cond, self._loop = asyncio.Condition(), loop
+            self.in_flight = 0
+        return self._cond
+
+    async def acquire(self) -> None:
+        cond = self._ensure_cond()
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self.in_flight)
+
+    async def release(self) -> None:
+        cond = self._ensure_cond()
+        async with cond:
+            self.in_flight -= 1
+            cond.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+    # ---------------- подстройка ----------------
+    async def record(self, latency: float, blocked: bool = False) -> None:
+        if not self.adaptive:
+            return
+        if self._skip:
+            # ответы на запросы, начатые при старом лимите, о новом ничего не говорят
+            self._skip -= 1
+            return
+        self._samples.append((latency, blocked))
+        if len(self._samples) < self.window:
+            return
+        samples, self._samples = self._samples, []
+        peak, self._peak_in_flight = self._peak_in_flight, self.in_flight
+
+        latencies = sorted(s[0] for s in samples if not s[1])
+        block_rate = sum(1 for s in samples if s[1]) / len(samples)
+        p95 = latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)] if latencies else None
+        if p95 is not None and (self.baseline_p95 is None or p95 < self.baseline_p95):
+            self.baseline_p95 = p95
+        target = self.latency_target or (self.baseline_p95 * self.tolerance if self.baseline_p95 else None)
+
+        old = self.limit
+        if block_rate > self.max_block_rate:
+            new, reason = max(self.floor, old * self.decrease), f"блокировки {block_rate:.0%}"
+        elif p95 is not None and target is not None and p95 > target:
+            new, reason = max(self.floor, old * self.decrease), f"p95 {p95:.2f}s > {target:.2f}s"
+        elif peak >= int(old):
+            # растём, только если текущий лимит упирался в потолок
+            new, reason = min(self.ceiling, old + 1), "норма"
+        else:
+            return
+        if int(new) == int(old):
+            self.limit = new
+            return
+        await self._set(new, reason, p95, block_rate)
+
+    async def _set(self, new: float, reason: str, p95: float | None, block_rate: float) -> None:
+        old, self.limit = self.limit, new
+        self._skip = self.in_flight
+        self.history.append({
+            "at": datetime.now(timezone.utc).isoformat(),
+            "t": round(time.monotonic(), 3),
+            "from": int(old),
+            "to": int(new),
+            "reason": reason,
+            "p95": round(p95, 3) if p95 is not None else None,
+            "block_rate": round(block_rate, 3),
+        })
+        self.log.info("Параллелизм: %d → %d (%s)", int(old), int(new), reason)
+        cond = self._ensure_cond()
+        async with cond:
+            cond.notify_all()
+
+    def stats(self) -> Dict:
+        return {
+            "limit": int(self.limit),
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "adaptive": self.adaptive,
+            "baseline_p95": round(self.baseline_p95, 3) if self.baseline_p95 is not None else None,
+            "changes": list(self.history),
+        }
@@ -0,0 +1,282 @@
+from __future__ import annotations
+import html as html_lib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+# data-qa карточки, для которых нужен первый элемент в порядке документа
+CARD_QA_TARGETS = frozenset({
+    "vacancy-title",
+    "vacancy-company-name",
+    "vacancy-salary",
+    "vacancy-experience",
+    "vacancy-view-location",
+    "vacancy-view-creation-time",
+    "vacancy-description",
+})
+
+RE_EXPERIENCE = re.compile(r"опыт", re.I)
+RE_RESPONSES = re.compile(r"тклик", re.I)
+RE_COUNTRY = re.compile(r"Россия|Украина|Казахстан|Беларус", re.I)
+RE_VACANCY_HREF = re.compile(r"/vacancy/\d+")
+
+SERP_HEADER_QA = ("vacancies-search-header", "serp__found")
+SERP_HEADER_FALLBACKS = ("h1", ".bloko-header-section-3", ".bloko-header-2")
+
+# сниппет вакансии в выдаче: контейнер и data-qa полей внутри него → поле CardRaw
+SERP_HIT_QA = "vacancy-serp__vacancy"
+SERP_TITLE_QA = "serp-item__title"
+SERP_FIELD_QA = {
+    "vacancy-serp__vacancy-employer": "company_name",
+    "vacancy-serp__vacancy-compensation": "salary_text",
+    "vacancy-serp__vacancy-address": "location",
+    "vacancy-serp__vacancy-work-experience": "experience_text",   # бывает с суффиксом: ...-between1And3
+    "vacancy-serp__vacancy-date": "published_at",
+}
+
+# начальное состояние страницы (JSON, из которого фронтенд рисует выдачу)
+RE_INITIAL_STATE = re.compile(
+    rb'id="HH-Lux-InitialState"[^>]*>(.*?)</(?:template|noscript|script)>', re.S)
+EXPERIENCE_CODES = {
+    "noExperience": "Нет опыта",
+    "between1And3": "1–3 года",
+    "between3And6": "3–6 лет",
+    "moreThan6": "Более 6 лет",
+}
+
+
+@dataclass(slots=True)
+class CardRaw:
+    """
+    Сырые тексты карточки, уже снятые с дерева (фолбэки разрешены).
+    Не зависит от HTML-бэкенда: нормализация идёт в HTTPParser._parse_*.
+    """
+    title: Optional[str] = None
+    company_name: Optional[str] = None
+    company_url: Optional[str] = None
+    salary_text: Optional[str] = None
+    experience_text: Optional[str] = None
+    location: Optional[str] = None
+    published_at: Optional[str] = None
+    responses_text: Optional[str] = None
+    description: Optional[str] = None
+    skills: List[str] = field(default_factory=list)
+    page_text: str = ""
+
+
+@dataclass(slots=True)
+class SerpPage:
+    """
+    Страница выдачи: текст заголовка с числом найденного, ссылки на вакансии
+    (как есть, без дедупа) и ленивый поток строк страницы для фолбэка.
+    """
+    header_text: Optional[str] = None
+    links: List[str] = field(default_factory=list)
+    strings: Iterable[str] = ()
+    hits: List[SerpHit] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class SerpHit:
+    """
+    Вакансия из выдачи: ссылка и те же сырые тексты, что у карточки (без описания и
+    навыков). compensation — структурированная зарплата из initial-state JSON, если была.
+    """
+    url: str
+    raw: CardRaw = field(default_factory=CardRaw)
+    compensation: Optional[Dict[str, Any]] = None
+
+
+def serp_field_for_qa(data_qa: str) -> Optional[str]:
+    for qa, name in SERP_FIELD_QA.items():
+        if data_qa == qa or data_qa.startswith(qa + "-"):
+            return name
+    return None
+
+
+def hits_from_initial_state(html: bytes | str, encoding: str | None = None) -> Optional[List[SerpHit]]:
+    """
+    Сниппеты из встроенного JSON выдачи (vacancySearchResult.vacancies). Ищется регуляркой по
+    сырому HTML, поэтому одинаково работает для любого бэкенда. None — JSON на странице нет.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    m = RE_INITIAL_STATE.search(html)
+    if not m:
+        return None
+    text = m.group(1).decode(encoding or "utf-8", errors="replace").strip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            data = json.loads(html_lib.unescape(text))
+        except ValueError:
+            return None
+    vacancies = ((data or {}).get("vacancySearchResult") or {}).get("vacancies")
+    if not isinstance(vacancies, list):
+        return None
+
+    hits: List[SerpHit] = []
+    for v in vacancies:
+        vid = v.get("vacancyId") or v.get("id")
+        if not vid:
+            continue
+        company = v.get("company") or {}
+        exp = v.get("workExperience")
+        published = v.get("publicationTime")
+        raw = CardRaw(
+            title=v.get("name"),
+            company_name=company.get("visibleName") or company.get("name"),
+            company_url=f"/employer/{company['id']}" if company.get("id") else None,
+            location=(v.get("area") or {}).get("name"),
+            experience_text=EXPERIENCE_CODES.get(exp, exp),
+            published_at=published.get("$") if isinstance(published, dict) else published,
+        )
+        url = (v.get("links") or {}).get("desktop") or f"https://hh.ru/vacancy/{vid}"
+        comp = v.get("compensation")
+        hits.append(SerpHit(url=url, raw=raw, compensation=comp if isinstance(comp, dict) else None))
+    return hits
+
+
+def card_from_soup(soup: BeautifulSoup) -> CardRaw:
+    """
+    Один обход дерева: первые элементы по data-qa, запасные теги (h1, time,
+    .vacancy-view-location), теги навыков, первые строки под regex-фолбэки и текст
+    всей страницы (как soup.get_text(" ", strip=True)). Семантика совпадает с
+    find/select_one/select/find(string=...) поштучно.
+    """
+    qa: Dict[str, Tag] = {}
+    h1 = time_el = location_cls = None
+    skill_tags: List[Tag] = []
+    experience_str = responses_str = country_str = None
+    text_parts: List[str] = []
+    text_types = soup.interesting_string_types or Tag.MAIN_CONTENT_STRING_TYPES
+
+    for node in soup.descendants:
+        if isinstance(node, NavigableString):
+            # find(string=...) смотрит на строки любого типа (в т.ч. script и комментарии),
+            # а get_text — только на «контентные»
+            if type(node) in text_types:
+                stripped = node.strip()
+                if stripped:
+                    text_parts.append(stripped)
+            if experience_str is None and RE_EXPERIENCE.search(node):
+                experience_str = node
+            if responses_str is None and RE_RESPONSES.search(node):
+                responses_str = node
+            if country_str is None and RE_COUNTRY.search(node):
+                country_str = node
+            continue
+        if not isinstance(node, Tag):
+            continue
+
+        name = node.name
+        if name == "h1" and h1 is None:
+            h1 = node
+        elif name == "time" and time_el is None:
+            time_el = node
+
+        attrs = node.attrs
+        data_qa = attrs.get("data-qa")
+        if data_qa is not None and data_qa in CARD_QA_TARGETS and data_qa not in qa:
+            qa[data_qa] = node
+
+        classes = attrs.get("class")
+        if isinstance(classes, str):
+            classes = classes.split()
+        if data_qa == "skills-element" or (classes and "bloko-tag__text" in classes):
+            skill_tags.append(node)
+        if location_cls is None and classes and "vacancy-view-location" in classes:
+            location_cls = node
+
+    raw = CardRaw(page_text=" ".join(text_parts))
+
+    el = qa.get("vacancy-title") or h1
+    raw.title = el.get_text(strip=True) if el else None
+
+    el = qa.get("vacancy-company-name")
+    if el:
+        raw.company_name = el.get_text(strip=True)
+        link = el.find_parent("a") or el.find("a")
+        raw.company_url = link.get("href") if link and link.has_attr("href") else None
+
+    el = qa.get("vacancy-salary")
+    raw.salary_text = el.get_text(" ", strip=True) if el else None
+
+    el = qa.get("vacancy-experience")
+    text = el.get_text(" ", strip=True) if el else None
+    if not text:
+        text = experience_str.strip() if experience_str else None
+    raw.experience_text = text
+
+    el = qa.get("vacancy-view-location")
+    if el:
+        raw.location = el.get_text(" ", strip=True)
+    elif location_cls:
+        raw.location = location_cls.get_text(" ", strip=True)
+    elif country_str:
+        raw.location = country_str.strip()
+
+    el = qa.get("vacancy-view-creation-time") or time_el
+    raw.published_at = el.get_text(" ", strip=True) if el else None
+
+    raw.responses_text = str(responses_str) if responses_str is not None else None
+
+    el = qa.get("vacancy-description")
+    raw.description = el.get_text("\n", strip=True) if el else None
+
+    raw.skills = [el.get_text(strip=True) for el in skill_tags]
+    return raw
+
+
+def serp_from_soup(soup: BeautifulSoup) -> SerpPage:
+    el = None
+    for qa in SERP_HEADER_QA:
+        el = soup.select_one(f'[data-qa="{qa}"]')
+        if el:
+            break
+    if not el:
+        for sel in SERP_HEADER_FALLBACKS:
+            el = soup.select_one(sel)
+            if el and el.get_text(strip=True):
+                break
+
+    links = [a.get("href") for a in soup.select("a.serp-item__title") if a.get("href")]
+    if not links:
+        links = [a["href"] for a in soup.find_all("a", href=True) if RE_VACANCY_HREF.search(a["href"])]
+
+    return SerpPage(
+        header_text=el.get_text(" ", strip=True) if el else None,
+        links=links,
+        strings=soup.stripped_strings,
+        hits=serp_hits_from_soup(soup),
+    )
+
+
+def serp_hits_from_soup(soup: BeautifulSoup) -> List[SerpHit]:
+    """Сниппеты из разметки выдачи: контейнеры data-qa="vacancy-serp__vacancy ..."."""
+    hits: List[SerpHit] = []
+    containers = soup.find_all(attrs={"data-qa": lambda v: v and SERP_HIT_QA in v.split()})
+    for box in containers:
+        raw = CardRaw()
+        url = None
+        for el in box.find_all(attrs={"data-qa": True}):
+            qa = el["data-qa"]
+            if qa == SERP_TITLE_QA and url is None:
+                a = el if el.name == "a" else el.find_parent("a") or el.find("a")
+                url = a.get("href") if a else None
+                raw.title = el.get_text(strip=True)
+                continue
+            name = serp_field_for_qa(qa)
+            if name is None or getattr(raw, name) is not None:
+                continue
+            setattr(raw, name, el.get_text(" ", strip=True))
+            if name == "company_name":
+                a = el if el.name == "a" else el.find("a")
+                raw.company_url = a.get("href") if a else None
+        if url:
+            hits.append(SerpHit(url=url, raw=raw))
+    return hits
@@ -1,40 +1,113 @@
 from __future__ import annotations
 import logging, json, os, sys
-import re
+import socket
 import time
 import random
 import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from statistics import mean, median
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import requests
 import aiohttp
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 from dataclasses import asdict
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
 
 from hhru_parser.models import Vacancy
-from hhru_parser.bd.bd_vacancy import existing_ids
-
-
-class HTTPParser:
+from hhru_parser.archive import HtmlArchive
+from hhru_parser.methods.extract import SerpPage
+from hhru_parser.methods.card import CardParser, parse_card_html
+from hhru_parser.methods.ratelimit import RateLimiter
+from hhru_parser.methods.concurrency import ConcurrencyLimit
+from hhru_parser.methods.shards import Facet, SearchShard, default_facets
+from hhru_parser.bd.bd_pool import close_async_pool
+from hhru_parser.bd.bd_vacancy_async import (
+    existing_ids_async, stale_vacancies_async, touch_vacancies_async, upsert_vacancies_async,
+)
+from hhru_parser.bd.bd_retry import (
+    due_card_retries_async, record_card_failures_async, resolve_card_retries_async,
+)
+from hhru_parser.bd.bd_watermark import get_watermark_async, save_watermark_async
+from hhru_parser.bd.bd_frontier import (
+    frontier_claim_async, frontier_complete_async, frontier_enqueue_async, frontier_release_async,
+)
+
+
+class HTTPParser(CardParser):
     SEARCH_URL = "https://hh.ru/search/vacancy"
+    RETRYABLE = ("blocked", "error")   # статусы _fetch_card_status, которые имеет смысл повторить
 
-    def __init__(self, cookies_file: str | None = None):
+    def __init__(self, cookies_file: str | None = None,
+                 parse_executor: str | None = None, parse_workers: int | None = None,
+                 parser_backend: str | None = None, archive: HtmlArchive | None = None,
+                 rate_limiter: RateLimiter | None = None, adaptive_concurrency: bool = False,
+                 concurrency_floor: int = 1, concurrency_ceiling: int = 12):
         self.log = logging.getLogger(__name__)
 
+        # архив сырого HTML (карточки и выдача) для офлайн-перепарсинга
+        self.archive = archive
+
+        super().__init__(parser_backend)
+
         # анти-бан
         self.base_delay = 2.0
         self.jitter = 0.6
         self.backoff_factor = 2.0
         self.max_delay = 60.0
         self.success_to_relax = 5
-        self.current_delay = self.base_delay
-        self._success_streak = 0
 
-        # одновременных запросов
+        # одновременных запросов (стартовое значение; в адаптивном режиме —
+        # от concurrency_floor до concurrency_ceiling по p95 задержки и доле 403/429)
         self.max_concurrency = 3
-        self._lock: asyncio.Lock | None = None
+        self.concurrency = ConcurrencyLimit(
+            initial=self.max_concurrency,
+            floor=concurrency_floor,
+            ceiling=concurrency_ceiling,
+            adaptive=adaptive_concurrency,
+        )
+
+        # общий бюджет запросов: token bucket + AIMD (см. methods/ratelimit.py);
+        # по умолчанию ~ max_concurrency запросов за base_delay, стор — из HHRU_RATE_LIMIT_STORE
+        self.limiter = rate_limiter or RateLimiter.from_url(
+            os.getenv("HHRU_RATE_LIMIT_STORE"),
+            rate=self.max_concurrency / self.base_delay,
+            burst=self.max_concurrency,
+            min_rate=1 / self.max_delay,
+            # в адаптивном режиме потолок скорости — под потолок параллелизма
+            max_rate=self.concurrency.max_workers / self.base_delay,
+            decrease=1 / self.backoff_factor,
+            success_to_increase=self.success_to_relax,
+            jitter=self.jitter,
+        )
+
+        # пагинация выдачи
+        self.max_pages = 40        # hh.ru не отдаёт дальше ~2000 результатов
+        self.queue_size = 100      # ссылок в очереди между выдачей и воркерами
+        self.serp_retries = 2
+
+        # шардирование широких запросов (search_many(split=True), см. methods/shards.py)
+        self.result_cap = 2000     # сколько результатов реально можно пролистать в одной выдаче
+        self.split_areas: Tuple[str, ...] = ()   # id регионов hh для фасета area (пусто — без него)
+        self.facets: List[Facet] | None = None   # None → default_facets(split_areas)
+
+        # инкрементальный обход (incremental=True): выдача по дате, стоп после stop_after известных подряд
+        self.stop_after = 20
+        self.watermark_size = 100  # сколько id с верха выдачи хранить в query_watermarks
+
+        # повторы карточек (403/429, сетевые ошибки): retry_in_run попыток в конце прогона
+        # с экспоненциальной паузой, остальное — в card_retries для следующих запусков
+        self.retry_in_run = 2
+        self.retry_base_delay = 10.0
+        self.retry_max_delay = 6 * 3600.0
+        self.retry_max_attempts = 10
+
+        # парсинг карточек вне event loop: None | "thread" | "process"
+        self.parse_executor = parse_executor
+        self.parse_workers = parse_workers   # None → os.cpu_count()
+        self._parse_pool: Executor | None = None
+        self._session: aiohttp.ClientSession | None = None   # открыта внутри async with
 
         ua_pool = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
@@ -110,358 +183,783 @@ class HTTPParser:
         return jar
 
     # ---------------- анти-бан ----------------
-    async def _ensure_lock(self):
-        if self._lock is None:
-            self._lock = asyncio.Lock()
+    @property
+    def current_delay(self) -> float:
+        """Средний интервал между запросами при текущей скорости лимитера, сек."""
+        return 1 / self.limiter.rate if self.limiter.rate else float("inf")
 
     async def _sleep_with_jitter_async(self):
-        j = random.uniform(-self.jitter, self.jitter)
-        pause = max(0.0, self.current_delay + j)
-        if pause >= 0.01:
-            self.log.debug("sleep %.2fs (delay=%.2f, jitter=%+.2f)", pause, self.current_delay, j)
-            await asyncio.sleep(pause)
+        await self.limiter.acquire()
 
     async def _on_block_async(self, status: int, url: str):
-        await self._ensure_lock()
-        async with self._lock:
-            old = self.current_delay
-            self.current_delay = min(self.current_delay * self.backoff_factor, self.max_delay)
-            self._success_streak = 0
-            self.log.warning("Block %s on %s → backoff delay: %.2fs → %.2fs", status, url, old, self.current_delay)
+        await self.limiter.on_block(status, url)
 
     async def _on_success_async(self):
-        await self._ensure_lock()
-        async with self._lock:
-            self._success_streak += 1
-            if self._success_streak >= self.success_to_relax and self.current_delay > self.base_delay:
-                old = self.current_delay
-                self.current_delay = max(self.base_delay, self.base_delay + 0.9 * (self.current_delay - self.base_delay))
-                self._success_streak = 0
-                self.log.info("Relax delay: %.2fs → %.2fs", old, self.current_delay)
+        await self.limiter.on_success()
+
+    # ---------------- жизненный цикл ----------------
+    async def __aenter__(self) -> "HTTPParser":
+        """
+        async with HTTPParser(...) as p: — одна сессия (TCP/TLS-соединения, куки) и один пул
+        парсинга на все search_async / search_many / refresh_async внутри блока.
+        """
+        self._session = self._client_session()
+        self._parse_pool = self._make_parse_pool()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+
+    @asynccontextmanager
+    async def _session_scope(self):
+        """Сессия контекста, если он открыт; иначе — временная на один вызов (как раньше)."""
+        if self._session is not None:
+            yield self._session
+            return
+        self._parse_pool = self._make_parse_pool()
+        try:
+            async with self._client_session() as session:
+                yield session
+        finally:
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown(wait=False, cancel_futures=True)
+                self._parse_pool = None
 
     # ---------------- публичное API ----------------
     def search(self, query: str, limit: int = 5) -> Tuple[List[Dict], Dict]:
         """Синхронная оболочка над async-реализацией (совместимость со скриптами)."""
-        return asyncio.run(self.search_async(query=query, limit=limit))
-
-    async def search_async(self, query: str, limit: int = 5) -> Tuple[List[Dict], Dict]:
-        await self._ensure_lock()
-        t0 = time.perf_counter()
+        async def _run():
+            try:
+                return await self.search_async(query=query, limit=limit)
+            finally:
+                await close_async_pool()
+        return asyncio.run(_run())
+
+    async def search_async(self, query: str, limit: int = 5, sink=None, keep_items: bool = True,
+                           serp_only: bool = False, incremental: bool = False) -> Tuple[List[Dict], Dict]:
+        """
+        sink — объект с async add(item) (см. hhru_parser.sink.VacancySink): каждая карточка
+        отдаётся в него сразу после парсинга. keep_items=False не копит карточки в памяти
+        (возвращается пустой список, счётчик — в meta["count"]).
+        serp_only=True — неполные строки (название, компания, зарплата, город, опыт) прямо
+        из выдачи, без загрузки карточек; описание и навыки остаются пустыми.
+        incremental=True — только новое с прошлого прогона: выдача сортируется по дате
+        публикации и листается до stop_after известных id подряд (см. bd_watermark).
+        """
         self.log.info("Поиск (async): %r (limit=%d)", query, limit)
+        async with self._session_scope() as session:
+            pbar = self._progress_bar()
+            try:
+                out, meta = await self._search_one(session, query, limit, sink, keep_items, pbar,
+                                                   serp_only=serp_only, incremental=incremental)
+            finally:
+                pbar.close()
+        self.log.info(
+            "Готово (async): обработано %d, общая длительность %.2f сек, среднее на карточку %s сек, медиана %s сек",
+            meta["count"], meta["total_time"], meta["avg_sec"], meta["med_sec"]
+        )
+        return out, meta
 
-        cookie_jar = self._cookies_for_aiohttp()
-        headers = dict(self.sess.headers)
-        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
-
-        async with aiohttp.ClientSession(cookie_jar=cookie_jar, connector=connector, headers=headers) as session:
-            # 1) выдача
-            async with session.get(self.SEARCH_URL, params={"text": query},
-                                   timeout=aiohttp.ClientTimeout(sock_connect=5, total=20)) as r:
-                r.raise_for_status()
-                html = await r.text()
-
-            soup = BeautifulSoup(html, "html.parser")
-            total_found = self._extract_total_found(soup)
-            if total_found is not None:
-                self.log.info("Найдено всего по запросу: %s", total_found)
-
-            links = [a.get("href") for a in soup.select("a.serp-item__title") if a.get("href")]
-            if not links:
-                links = []
-                for a in soup.find_all("a", href=True):
-                    if re.search(r"/vacancy/\d+", a["href"]):
-                        links.append(a["href"].split("?")[0])
-
-            seen, uniq = set(), []
-            for u in links:
-                u = u.split("?")[0]
-                if u not in seen:
-                    seen.add(u); uniq.append(u)
-            uniq = uniq[:limit]
-            self.log.info("Ссылок к обработке: %d", len(uniq))
-
-            # --- кэш по БД ---
-            def id_from_url(u: str) -> str:
-                m = re.search(r"/vacancy/(\d+)", u)
-                return m.group(1) if m else u
-
-            ids_all = [id_from_url(u) for u in uniq]
-            known = existing_ids(ids_all)
-            if known:
-                before = len(uniq)
-                uniq = [u for u in uniq if id_from_url(u) not in known]
-                self.log.info("После кэша в БД к загрузке осталось: %d (из %d)", len(uniq), before)
-
-            # 2) карточки — параллельно
-            sem = asyncio.Semaphore(self.max_concurrency)
-
-            async def worker(u: str) -> tuple[dict | None, float]:
-                async with sem:
-                    await self._sleep_with_jitter_async()
-                    t1 = time.perf_counter()
+    async def search_many(self, queries: Iterable[str | SearchShard], limit: int = 100, sink=None,
+                          keep_items: bool = True, parallel_queries: int = 4,
+                          serp_only: bool = False, split: bool = False,
+                          incremental: bool = False) -> Tuple[List[Dict], Dict]:
+        """
+        Несколько запросов в одной сессии: до parallel_queries выдач листаются одновременно,
+        карточки всех запросов делят общий бюджет self.concurrency, а id вакансий
+        дедуплицируются между запросами до загрузки (каждая карточка качается один раз).
+        split=True — запросы, чья выдача больше result_cap, сначала делятся на шарды по
+        фасетам (plan_shards_async), и шарды обходятся так же, как отдельные запросы.
+        incremental=True — у каждого запроса/шарда свой водяной знак (см. search_async).
+        meta["queries"] — meta по каждому запросу/шарду (count — карточки, засчитанные ему).
+        """
+        t0 = time.perf_counter()
+        queries = list(dict.fromkeys(q for q in queries if q))
+        if incremental:
+            # сортировку задаём до деления на шарды: их первые страницы тоже пойдут в дело
+            queries = [self._by_date(q) for q in queries]
+        self.log.info("Пакетный поиск: %d запросов (limit=%d на запрос, параллельно %d)",
+                      len(queries), limit, parallel_queries)
+        seen_ids: set[str] = set()
+        gate = asyncio.Semaphore(max(1, parallel_queries))
+        out: List[Dict] = []
+        per_query: Dict[str, Dict] = {}
+
+        async with self._session_scope() as session:
+            # первая страница шарда уже скачана при планировании — второй раз не запрашиваем
+            jobs: List[Tuple[str | SearchShard, Optional[SerpPage]]] = [(q, None) for q in queries]
+            if split:
+                plans = await asyncio.gather(*(self.plan_shards_async(session, q) for q in queries))
+                jobs = [job for plan in plans for job in plan]
+                self.log.info("Шардов к обходу: %d", len(jobs))
+
+            pbar = self._progress_bar()
+
+            async def one(q: str | SearchShard, first_page: Optional[SerpPage]):
+                async with gate:
                     try:
-                        async with session.get(u, timeout=aiohttp.ClientTimeout(sock_connect=5, total=20)) as resp:
-                            if resp.status in (403, 429):
-                                await self._on_block_async(resp.status, u)
-                                return None, time.perf_counter() - t1
-                            resp.raise_for_status()
-                            html2 = await resp.text()
-                    except aiohttp.ClientResponseError as e:
-                        self.log.warning("HTTP error %s on %s", e.status, u)
-                        return None, time.perf_counter() - t1
+                        items, per_query[str(q)] = await self._search_one(
+                            session, q, limit, sink, keep_items, pbar, seen_ids, serp_only, first_page,
+                            incremental)
                     except Exception as e:
-                        self.log.warning("Network error %s on %s", type(e).__name__, u)
-                        return None, time.perf_counter() - t1
-
-                    s2 = BeautifulSoup(html2, "html.parser")
-                    item = self.parse_vacancy(s2, u)
-                    await self._on_success_async()
-                    dt = time.perf_counter() - t1
-                    self.log.debug("OK %s (%.2f сек) | delay=%.2fs", u, dt, self.current_delay)
-                    return asdict(item), dt
+                        self.log.warning("Запрос %r не выполнен: %s", str(q), type(e).__name__)
+                        per_query[str(q)] = {"error": type(e).__name__}
+                        return
+                    out.extend(items)
 
-            tasks = [asyncio.create_task(worker(u)) for u in uniq]
-            out: List[Dict] = []
-            per_item_times: List[float] = []
-
-            # единый прогресс-бар (stdout)
-            pbar = tqdm(total=len(tasks), desc="Вакансии", unit="шт",
-                        file=sys.stdout, dynamic_ncols=True, leave=False)
             try:
-                for task in asyncio.as_completed(tasks):
-                    item, dt = await task
-                    if item:
-                        out.append(item)
-                    if dt is not None:
-                        per_item_times.append(dt)
-
-                    # компактный статус прямо в полосе
-                    if item:
-                        vid = item.get("id")
-                        ttl = (item.get("title") or "")
-                        if len(ttl) > 40:
-                            ttl = ttl[:37] + "…"
-                        pbar.set_postfix_str(f"{len(out)}/{len(tasks)} id={vid} {dt:.2f}s {ttl}")
-                    else:
-                        pbar.set_postfix_str(f"{len(out)}/{len(tasks)}")
-                    pbar.update(1)
+                await asyncio.gather(*(one(q, first) for q, first in jobs))
             finally:
                 pbar.close()
 
         total_time = time.perf_counter() - t0
-        avg_sec = round(mean(per_item_times), 3) if per_item_times else None
-        med_sec = round(median(per_item_times), 3) if per_item_times else None
-        self.log.info(
-            "Готово (async): обработано %d, общая длительность %.2f сек, среднее на карточку %s сек, медиана %s сек",
-            len(out), total_time, avg_sec, med_sec
-        )
+        count = sum(m.get("count", 0) for m in per_query.values())
+        self.log.info("Пакетный поиск готов: запросов %d, карточек %d, уникальных id %d, %.2f сек",
+                      len(queries), count, len(seen_ids), total_time)
+        meta = {
+            "queries": per_query,
+            "count": count,
+            "unique_ids": len(seen_ids),
+            "rate": round(self.limiter.rate, 3),
+            "blocks": self.limiter.blocks,
+            "concurrency": self.concurrency.stats(),
+            "total_time": round(total_time, 3),
+        }
+        return out, meta
 
+    async def plan_shards_async(self, session: aiohttp.ClientSession, query: str | SearchShard
+                                ) -> List[Tuple[SearchShard, Optional[SerpPage]]]:
+        """
+        Делит запрос по фасетам, пока у каждого шарда total_found <= result_cap. Возвращает
+        листья вместе с их первой страницей выдачи; пустые шарды отбрасываются. Если фасеты
+        кончились, а шард всё ещё велик — он обходится как есть (с предупреждением).
+        """
+        facets = self.facets if self.facets is not None else default_facets(self.split_areas)
+        root = query if isinstance(query, SearchShard) else SearchShard(query)
+
+        async def split(shard: SearchShard, facet_idx: int) -> List[Tuple[SearchShard, Optional[SerpPage]]]:
+            await self._sleep_with_jitter_async()
+            try:
+                serp = await self._fetch_serp_page(session, shard, 0)
+            except Exception as e:
+                if shard == root:
+                    raise
+                self.log.warning("Шард %s: выдача не получена (%s) — обойду без деления", shard, type(e).__name__)
+                return [(shard, None)]
+            if serp is None:
+                return []
+            total = self._extract_total_found(serp)
+            if total is None or total <= self.result_cap:
+                return [(shard, serp)] if total != 0 and serp.links else []
+            for i in range(facet_idx, len(facets)):
+                children = facets[i](shard)
+                if children:
+                    self.log.info("Шард %s: найдено %d > %d — делю на %d", shard, total, self.result_cap, len(children))
+                    # фасет, который ещё можно делить (окно дат), остаётся в работе
+                    parts = await asyncio.gather(*(split(c, i) for c in children))
+                    return [leaf for part in parts for leaf in part]
+            self.log.warning("Шард %s: найдено %d > %d, делить больше нечем — усечён до %d",
+                             shard, total, self.result_cap, self.result_cap)
+            return [(shard, serp)]
+
+        leaves = await split(root, 0)
+        self.log.info("Запрос %r: шардов %d", str(root), len(leaves))
+        return leaves
+
+    async def _search_one(self, session: aiohttp.ClientSession, query: str | SearchShard, limit: int, sink,
+                          keep_items: bool, pbar: tqdm, seen_ids: set[str] | None = None,
+                          serp_only: bool = False, first_page: Optional[SerpPage] = None,
+                          incremental: bool = False) -> Tuple[List[Dict], Dict]:
+        t0 = time.perf_counter()
+        out: List[Dict] = []
+        count = 0
+        per_item_times: List[float] = []
+        state: Dict = {"total_found": None, "pages": 0, "enqueued": 0, "seen_ids": seen_ids, "failed": [],
+                       "first_page": first_page}
+        if incremental:
+            if self._by_date(query) != query:
+                query, state["first_page"] = self._by_date(query), None
+            watermark = await get_watermark_async(str(query))
+            state.update(incremental=True, watermark=set(watermark), known_run=0, stopped=False, top_ids=[])
+            self.log.info("Инкрементальный обход %s: водяной знак %d id", query, len(watermark))
+        enqueued = 0
+
+        async def emit(item: dict | None, dt: float | None):
+            nonlocal count
+            if item:
+                count += 1
+                if sink is not None:
+                    await sink.add(item)
+                if keep_items:
+                    out.append(item)
+            if dt is not None:
+                per_item_times.append(dt)
+            # компактный статус прямо в полосе
+            if item:
+                vid = item.get("id")
+                ttl = (item.get("title") or "")
+                if len(ttl) > 40:
+                    ttl = ttl[:37] + "…"
+                took = f" {dt:.2f}s" if dt is not None else ""
+                pbar.set_postfix_str(f"{count}/{state['enqueued']} id={vid}{took} {ttl}")
+            else:
+                pbar.set_postfix_str(f"{count}/{state['enqueued']}")
+
+        crawl = self._crawl_serp_only if serp_only else self._crawl_async
+        async for item, dt in crawl(session, query, limit, state):
+            # total растёт по мере прихода страниц выдачи (полоса может быть общей на несколько запросов)
+            if state["enqueued"] != enqueued:
+                pbar.total += state["enqueued"] - enqueued
+                enqueued = state["enqueued"]
+                pbar.refresh()
+            await emit(item, dt)
+            pbar.update(1)
+
+        # --- повтор заблокированных/упавших карточек в конце прогона, остаток — в card_retries ---
+        failed: List[Tuple[str, str]] = state["failed"]
+        retried_ok = 0
+        if failed and self.retry_in_run:
+            self.log.info("Повтор в конце прогона: %d карточек (до %d попыток)", len(failed), self.retry_in_run)
+            still: List[Tuple[str, str]] = []
+            async for u, status, item, dt in self._retry_cards_async(session, failed):
+                if status == "ok":
+                    retried_ok += 1
+                    await emit(item, dt)
+                elif status in self.RETRYABLE:
+                    still.append((u, status))
+            failed = still
+        if failed:
+            # учёт повторов — побочный: ошибка БД здесь не должна терять уже собранные карточки
+            try:
+                await record_card_failures_async(
+                    [(self._extract_id_from_url(u), u, reason) for u, reason in failed], str(query),
+                    attempts=1 + self.retry_in_run, base_delay=self.retry_base_delay,
+                    max_delay=self.retry_max_delay)
+                self.log.warning("Отложено на повтор (card_retries): %d карточек", len(failed))
+            except Exception as e:
+                self.log.warning("Не удалось отложить %d карточек в card_retries: %s", len(failed), type(e).__name__)
+        if incremental:
+            seen_now = set(state["top_ids"])
+            top = state["top_ids"] + [i for i in watermark if i not in seen_now]
+            try:
+                await save_watermark_async(str(query), top[:self.watermark_size], count)
+            except Exception as e:
+                # без нового водяного знака следующий прогон просто пролистает глубже
+                self.log.warning("Водяной знак %s не сохранён: %s", query, type(e).__name__)
+
+        total_time = time.perf_counter() - t0
         meta = {
-            "total_found": total_found,
-            "avg_sec": avg_sec,
-            "med_sec": med_sec,
-            "count": len(out),
+            "total_found": state["total_found"],
+            "avg_sec": round(mean(per_item_times), 3) if per_item_times else None,
+            "med_sec": round(median(per_item_times), 3) if per_item_times else None,
+            "count": count,
+            "pages": state["pages"],
+            "retried_ok": retried_ok,
+            "deferred": len(failed),
+            "stopped_early": state.get("stopped", False),
+            "rate": round(self.limiter.rate, 3),
+            "blocks": self.limiter.blocks,
+            "concurrency": self.concurrency.stats(),
             "total_time": round(total_time, 3),
         }
         return out, meta
 
-    # ---------- helpers ----------
-    def _extract_total_found(self, soup) -> Optional[int]:
-        el = soup.select_one('[data-qa="vacancies-search-header"]') or soup.select_one('[data-qa="serp__found"]')
-        if not el:
-            for sel in ("h1", ".bloko-header-section-3", ".bloko-header-2"):
-                el = soup.select_one(sel)
-                if el and el.get_text(strip=True):
+    @staticmethod
+    def _progress_bar() -> tqdm:
+        # единый прогресс-бар (stdout)
+        return tqdm(total=0, desc="Вакансии", unit="шт", file=sys.stdout, dynamic_ncols=True, leave=False)
+
+    async def refresh_async(self, max_age: timedelta, limit: int = 500, sink=None) -> Dict:
+        """
+        Обновление устаревших записей: берёт до limit вакансий с updated_at старше max_age
+        и перезапрашивает их условным GET (If-None-Match / If-Modified-Since).
+        304 → только отметка updated_at; 200 → парсинг и запись через sink (upsert пропустит
+        строку, если не изменились ни content_hash, ни валидаторы, поэтому отметку ставим и ей).
+        """
+        t0 = time.perf_counter()
+        rows = await stale_vacancies_async(datetime.now(timezone.utc) - max_age, limit)
+        self.log.info("Обновление: устаревших записей к проверке %d (старше %s)", len(rows), max_age)
+
+        counts = {"ok": 0, "not_modified": 0, "gone": 0, "blocked": 0, "error": 0}
+        to_touch: List[str] = []
+        async with self._session_scope() as session:
+            async def one(vid: str, url: str, etag: str | None, lm: str | None):
+                async with self.concurrency:
+                    return vid, await self._fetch_card_status(session, url, etag, lm)
+
+            tasks = [asyncio.create_task(one(*row)) for row in rows]
+            pbar = tqdm(total=len(tasks), desc="Обновление", unit="шт",
+                        file=sys.stdout, dynamic_ncols=True, leave=False)
+            try:
+                for task in asyncio.as_completed(tasks):
+                    vid, (status, item, dt) = await task
+                    counts[status] += 1
+                    if status == "ok" and sink is not None:
+                        await sink.add(item)
+                    if status in ("ok", "not_modified", "gone"):
+                        # снятые тоже отмечаем проверенными, иначе они вечно стоят в голове очереди
+                        to_touch.append(vid)
+                        if len(to_touch) >= 200:
+                            await touch_vacancies_async(to_touch)
+                            to_touch = []
+                    pbar.set_postfix_str(f"200={counts['ok']} 304={counts['not_modified']}")
+                    pbar.update(1)
+                await touch_vacancies_async(to_touch)
+            finally:
+                pbar.close()
+                for t in tasks:
+                    t.cancel()
+
+        total_time = time.perf_counter() - t0
+        self.log.info("Обновление готово: изменилось %d, без изменений %d, снято %d, ошибок %d, %.2f сек",
+                      counts["ok"], counts["not_modified"], counts["gone"],
+                      counts["blocked"] + counts["error"], total_time)
+        return {"checked": len(rows), **counts, "total_time": round(total_time, 3)}
+
+    async def retry_deferred_async(self, limit: int = 500, sink=None) -> Dict:
+        """
+        Повтор отложенных карточек из card_retries, чьё время пришло. Снятые удаляются сразу,
+        скачанные — при следующей выборке (когда они уже записаны в vacancies), новая
+        неудача — ещё +1 попытка и вдвое большая пауза.
+        """
+        t0 = time.perf_counter()
+        rows = await due_card_retries_async(limit, self.retry_max_attempts)
+        self.log.info("Отложенные повторы: к загрузке %d", len(rows))
+        counts = {"ok": 0, "gone": 0, "blocked": 0, "error": 0}
+        gone: List[str] = []
+        by_query: Dict[str | None, List[Tuple[str, str, str]]] = {}
+        async with self._session_scope() as session:
+            async def one(vid: str, url: str, query: str | None):
+                async with self.concurrency:
+                    return vid, url, query, await self._fetch_card_status(session, url)
+
+            for task in asyncio.as_completed([one(vid, url, q) for vid, url, q, _, _ in rows]):
+                vid, url, query, (status, item, _) = await task
+                counts[status] += 1
+                if status == "ok" and sink is not None:
+                    await sink.add(item)
+                elif status == "gone":
+                    gone.append(vid)
+                elif status in self.RETRYABLE:
+                    by_query.setdefault(query, []).append((vid, url, status))
+
+        await resolve_card_retries_async(gone)
+        for query, fails in by_query.items():
+            await record_card_failures_async(fails, query, base_delay=self.retry_base_delay,
+                                             max_delay=self.retry_max_delay)
+        total_time = time.perf_counter() - t0
+        self.log.info("Отложенные повторы: загружено %d, снято %d, снова не удалось %d, %.2f сек",
+                      counts["ok"], counts["gone"], counts["blocked"] + counts["error"], total_time)
+        return {"due": len(rows), **counts, "total_time": round(total_time, 3)}
+
+    async def _retry_cards_async(self, session: aiohttp.ClientSession, failed: List[Tuple[str, str]]):
+        """
+        Повтор в конце прогона: у каждой карточки свои до retry_in_run попыток с паузой
+        retry_base_delay · 2^(n-1) (±50%). Отдаёт (url, status, item, dt) по мере готовности;
+        для неудачных status — причина последней попытки.
+        """
+        results_q: asyncio.Queue = asyncio.Queue()
+
+        async def one(u: str, reason: str):
+            status, item, dt = reason, None, None
+            for attempt in range(1, self.retry_in_run + 1):
+                await asyncio.sleep(self._retry_backoff(attempt))
+                async with self.concurrency:
+                    status, item, dt = await self._fetch_card_status(session, u)
+                if status not in self.RETRYABLE:
                     break
-        def extract_num(text: str) -> Optional[int]:
-            m = re.search(r"(\d[\d\s\u00A0]*)", text or "")
-            if not m:
-                return None
-            num = m.group(1).replace(" ", "").replace("\u00A0", "")
+            await results_q.put((u, status, item, dt))
+
+        tasks = [asyncio.create_task(one(u, reason)) for u, reason in failed]
+        try:
+            for _ in tasks:
+                yield await results_q.get()
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _retry_backoff(self, attempt: int) -> float:
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    # ---------------- распределённый режим (frontier в Postgres) ----------------
+    async def enqueue_async(self, query: str, limit: int = 2000) -> Dict:
+        """
+        Только обход выдачи: новые id/url кладутся в таблицу frontier (см. bd/bd_frontier.py),
+        карточки качают воркеры work_frontier_async на любых узлах.
+        """
+        t0 = time.perf_counter()
+        state: Dict = {"total_found": None, "pages": 0, "enqueued": 0}
+        links_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        queued = 0
+        async with self._session_scope() as session:
+            producer = asyncio.create_task(self._produce_links(session, query, limit, links_q, 1, state))
+            batch: List[Tuple[str, str]] = []
             try:
-                return int(num)
-            except ValueError:
-                return None
-        if el:
-            n = extract_num(el.get_text(" ", strip=True))
-            if n is not None:
-                return n
-        for t in soup.stripped_strings:
-            n = extract_num(t)
-            if n and n > 10:
-                return n
-        return None
+                while True:
+                    u = await links_q.get()
+                    if u is not None:
+                        batch.append((self._extract_id_from_url(u), u))
+                    if batch and (u is None or len(batch) >= 100):
+                        queued += await frontier_enqueue_async(batch, str(query))
+                        batch = []
+                    if u is None:
+                        break
+                await producer
+            finally:
+                if not producer.done():
+                    producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
 
-    # ---------- helpers: карточка вакансии ----------
-    def parse_vacancy(self, soup: BeautifulSoup, url: str) -> Vacancy:
-        vac_id = self._extract_id_from_url(url)
-        title = self._parse_title(soup)
-        company_name, company_url = self._parse_company(soup)
-        salary_from, salary_to, salary_currency, is_gross, salary_text = self._parse_salary(soup)
-        experience_text, exp_bucket = self._parse_experience(soup)
-        schedule, employment_type = self._parse_schedule_and_employment(soup)
-        location_city = self._parse_location(soup)
-        published_at = self._parse_published_at(soup)
-        responses_count = self._parse_responses_count(soup)
-        description = self._parse_description(soup)
-        skills = self._parse_skills(soup)
-
-        raw = {
-            "title": title,
-            "company_name": company_name,
-            "company_url": company_url,
-            "salary_text": salary_text,
-            "experience_text": experience_text,
-            "schedule": schedule,
-            "employment_type": employment_type,
-            "location_city": location_city,
-            "published_at": published_at,
-            "responses_count": responses_count,
-            "skills": skills,
-        }
+        total_time = time.perf_counter() - t0
+        self.log.info("Очередь: %r — страниц %d, в frontier поставлено %d, %.2f сек",
+                      query, state["pages"], queued, total_time)
+        return {"total_found": state["total_found"], "pages": state["pages"],
+                "queued": queued, "total_time": round(total_time, 3)}
+
+    async def work_frontier_async(self, worker_id: str | None = None, batch: int | None = None,
+                                  lease: timedelta = timedelta(minutes=5), max_attempts: int = 5,
+                                  idle_timeout: float = 0.0, poll_interval: float = 5.0,
+                                  bulk: bool = False) -> Dict:
+        """
+        Воркер frontier: забирает пачку под аренду (FOR UPDATE SKIP LOCKED), качает карточки
+        в рамках self.concurrency, пишет их в vacancies и только после записи отмечает done.
+        Блокировки и ошибки возвращают строку в очередь (после max_attempts — failed).
+        idle_timeout=0 — выйти, как только очередь пуста; иначе ждать новую работу столько секунд.
+        """
+        t0 = time.perf_counter()
+        worker = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        batch = batch or 4 * self.concurrency.max_workers
+        counts = {"ok": 0, "gone": 0, "blocked": 0, "error": 0}
+        idle_since: float | None = None
+        self.log.info("Воркер frontier %s: пачка %d, аренда %s", worker, batch, lease)
+
+        async with self._session_scope() as session:
+            async def one(vid: str, url: str):
+                async with self.concurrency:
+                    return vid, await self._fetch_card_status(session, url)
+
+            while True:
+                claimed = await frontier_claim_async(worker, batch, lease)
+                if not claimed:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since >= idle_timeout:
+                        break
+                    await asyncio.sleep(poll_interval)
+                    continue
+                idle_since = None
+
+                results = await asyncio.gather(*(one(vid, url) for vid, url, _ in claimed))
+                items = [item for _, (status, item, _) in results if status == "ok"]
+                if items:
+                    await upsert_vacancies_async(items, bulk=bulk)
+
+                by_status: Dict[str, List[str]] = {}
+                for vid, (status, _, _) in results:
+                    counts[status] += 1
+                    by_status.setdefault(status, []).append(vid)
+                await frontier_complete_async(by_status.get("ok", []), worker, "done")
+                await frontier_complete_async(by_status.get("gone", []), worker, "gone")
+                for status in ("blocked", "error"):
+                    await frontier_release_async(by_status.get(status, []), worker, status, max_attempts)
+                self.log.info("Frontier %s: пачка %d — ok %d, снято %d, блок %d, ошибок %d",
+                              worker, len(claimed), len(by_status.get("ok", [])), len(by_status.get("gone", [])),
+                              len(by_status.get("blocked", [])), len(by_status.get("error", [])))
 
-        return Vacancy(
-            id=vac_id,
-            url=url,
-            title=title,
-            company_name=company_name,
-            company_url=company_url,
-            salary_from=salary_from,
-            salary_to=salary_to,
-            salary_currency=salary_currency,
-            is_gross=is_gross,
-            salary_text=salary_text,
-            experience_text=experience_text,
-            exp_bucket=exp_bucket,
-            schedule=schedule,
-            employment_type=employment_type,
-            location_city=location_city,
-            responses_count=responses_count,
-            published_at=published_at,
-            description=description,
-            skills=skills,
-            raw_json=raw,
-        )
+        total_time = time.perf_counter() - t0
+        self.log.info("Воркер frontier %s завершён: загружено %d, снято %d, блок %d, ошибок %d, %.2f сек",
+                      worker, counts["ok"], counts["gone"], counts["blocked"], counts["error"], total_time)
+        return {"worker": worker, **counts, "total_time": round(total_time, 3)}
+
+    def _client_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=self.concurrency.max_workers)
+        return aiohttp.ClientSession(cookie_jar=self._cookies_for_aiohttp(), connector=connector,
+                                     headers=dict(self.sess.headers))
+
+    # ---------- конвейер: выдача → очередь → карточки ----------
+    async def _crawl_async(self, session: aiohttp.ClientSession, query: str | SearchShard, limit: int, state: Dict):
+        """
+        Продюсер листает страницы выдачи и кладёт ссылки в ограниченную очередь,
+        воркеры параллельно качают карточки. Результаты (item, dt) отдаются по мере готовности.
+        """
+        links_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        results_q: asyncio.Queue = asyncio.Queue()
+        # воркеров — по потолку; сколько из них реально качают, решает self.concurrency
+        n_workers = self.concurrency.max_workers
+
+        async def consumer():
+            try:
+                while True:
+                    u = await links_q.get()
+                    if u is None:
+                        break
+                    try:
+                        async with self.concurrency:
+                            status, item, dt = await self._fetch_card_status(session, u)
+                    except Exception as e:
+                        # упавший воркер не должен молча терять карточку и оставлять продюсера без читателей
+                        self.log.warning("Карточка %s не обработана: %s", u, type(e).__name__)
+                        status, item, dt = "error", None, None
+                    if status in self.RETRYABLE:
+                        state["failed"].append((u, status))
+                    await results_q.put((item, dt))
+            finally:
+                await results_q.put(None)
 
-    def _extract_id_from_url(self, url: str) -> str:
-        m = re.search(r"/vacancy/(\d+)", url)
-        return m.group(1) if m else url
-
-    def _parse_title(self, soup: BeautifulSoup) -> Optional[str]:
-        tag = soup.find(attrs={"data-qa": "vacancy-title"}) or soup.find("h1")
-        return tag.get_text(strip=True) if tag else None
-
-    def _parse_company(self, soup: BeautifulSoup) -> Tuple[Optional[str], Optional[str]]:
-        el = soup.select_one('[data-qa="vacancy-company-name"]')
-        if el:
-            name = el.get_text(strip=True)
-            link = el.find_parent("a") or el.find("a")
-            href = link.get("href") if link and link.has_attr("href") else None
-            return name, href
-        return None, None
-
-    def _parse_salary(self, soup: BeautifulSoup):
-        el = soup.select_one('[data-qa="vacancy-salary"]')
-        if not el:
-            return None, None, None, None, None
-        text = el.get_text(" ", strip=True)
-        nums = re.findall(r"(\d[\d\s\u00A0]*)", text)
-        def to_int(s):
+        producer = asyncio.create_task(self._produce_links(session, query, limit, links_q, n_workers, state))
+        workers = [asyncio.create_task(consumer()) for _ in range(n_workers)]
+        try:
+            done = 0
+            while done < n_workers:
+                res = await results_q.get()
+                if res is None:
+                    done += 1
+                    continue
+                yield res
+            await producer
+        finally:
+            for t in (producer, *workers):
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(producer, *workers, return_exceptions=True)
+
+    async def _serp_pages(self, session: aiohttp.ClientSession, query: str | SearchShard, limit: int, state: Dict):
+        """Листает выдачу, пока не набран limit или не кончились новые ссылки: отдаёт (page, serp, fresh)."""
+        seen: set[str] = set()
+        for page in range(self.max_pages):
+            if state["enqueued"] >= limit or state.get("stopped"):
+                break
+            if page:
+                await self._sleep_with_jitter_async()
             try:
-                return int(s.replace(" ", "").replace("\u00A0", ""))
-            except Exception:
-                return None
-        s_from = s_to = None
-        if len(nums) == 1:
-            s_from = to_int(nums[0])
-        elif len(nums) >= 2:
-            s_from, s_to = to_int(nums[0]), to_int(nums[1])
-        currency = None
-        low = text.lower()
-        if "₽" in text or "руб" in low:
-            currency = "RUB"
-        elif "€" in text or "eur" in low:
-            currency = "EUR"
-        elif "$" in text or "usd" in low:
-            currency = "USD"
-        is_gross = True if "до вычета" in low else None
-        return s_from, s_to, currency, is_gross, text
-
-    def _parse_experience(self, soup: BeautifulSoup) -> Tuple[Optional[str], Optional[str]]:
-        el = soup.select_one('[data-qa="vacancy-experience"]')
-        text = el.get_text(" ", strip=True) if el else None
-        if not text:
-            cand = soup.find(string=re.compile(r"опыт", re.I))
-            text = cand.strip() if cand else None
-        bucket = None
-        if text:
-            m = re.search(r"(\d)[–-](\d)", text)
-            if m:
-                lo, hi = int(m.group(1)), int(m.group(2))
-                if hi <= 1: bucket = "0-1"
-                elif hi <= 3: bucket = "1-3"
-                elif hi <= 6: bucket = "3-6"
-                else: bucket = "6+"
+                if page == 0 and state.get("first_page") is not None:
+                    serp = state.pop("first_page")
+                else:
+                    serp = await self._fetch_serp_page(session, query, page)
+            except Exception as e:
+                if page == 0:
+                    raise
+                self.log.warning("Страница выдачи %d не получена (%s) — останавливаю пагинацию", page, type(e).__name__)
+                break
+            if serp is None:
+                break
+            state["pages"] = page + 1
+
+            if page == 0:
+                state["total_found"] = self._extract_total_found(serp)
+                if state["total_found"] is not None:
+                    self.log.info("Найдено всего по запросу: %s", state["total_found"])
+
+            fresh = [u for u in self._extract_links(serp) if u not in seen]
+            if not fresh:
+                self.log.info("Страница выдачи %d пуста — конец выдачи", page)
+                break
+            seen.update(fresh)
+            yield page, serp, fresh
+
+    @staticmethod
+    def _by_date(query: str | SearchShard) -> SearchShard:
+        shard = query if isinstance(query, SearchShard) else SearchShard(query)
+        if shard.get("order_by") == "publication_time":
+            return shard
+        return shard.with_filter("order_by", "publication_time")
+
+    def _cut_known(self, ids: List[str], known: set[str], state: Dict) -> List[str]:
+        """
+        Инкрементальный режим: ids страницы до места, где набралось stop_after известных
+        (в БД или в водяном знаке) подряд; там обход останавливается. Одиночные известные
+        не останавливают: поднятые работодателем старые вакансии тоже всплывают наверх.
+        """
+        if not state.get("incremental"):
+            return ids
+        out: List[str] = []
+        for i in ids:
+            if len(state["top_ids"]) < self.watermark_size:
+                state["top_ids"].append(i)
+            out.append(i)
+            if i in known or i in state["watermark"]:
+                state["known_run"] += 1
+                if state["known_run"] >= self.stop_after:
+                    state["stopped"] = True
+                    self.log.info("%d известных id подряд — дальше старые вакансии, обход остановлен",
+                                  state["known_run"])
+                    break
             else:
-                m2 = re.search(r"(\d+)\+?", text)
-                if m2:
-                    v = int(m2.group(1))
-                    if v <= 1: bucket = "0-1"
-                    elif v <= 3: bucket = "1-3"
-                    elif v <= 6: bucket = "3-6"
-                    else: bucket = "6+"
-        return text, bucket
-
-    def _parse_schedule_and_employment(self, soup: BeautifulSoup) -> Tuple[Optional[str], Optional[str]]:
-        text = soup.get_text(" ", strip=True).lower()
-        schedule = None
-        if "удал" in text or "remote" in text:
-            schedule = "remote"
-        elif "гибрид" in text or "hybrid" in text:
-            schedule = "hybrid"
-        elif "офис" in text:
-            schedule = "office"
-
-        employment = None
-        if "полная занятость" in text or "full time" in text:
-            employment = "full-time"
-        elif "частичная занятость" in text or "part time" in text:
-            employment = "part-time"
-        elif "стажировка" in text or "intern" in text:
-            employment = "intern"
-
-        return schedule, employment
-
-    def _parse_location(self, soup: BeautifulSoup) -> Optional[str]:
-        el = soup.select_one('[data-qa="vacancy-view-location"]')
-        if el:
-            return el.get_text(" ", strip=True)
-        cand = soup.select_one(".vacancy-view-location") or soup.find(string=re.compile(r"Россия|Украина|Казахстан|Беларус", re.I))
-        return cand.strip() if isinstance(cand, str) else (cand.get_text(" ", strip=True) if cand else None)
-
-    def _parse_published_at(self, soup: BeautifulSoup) -> Optional[str]:
-        el = soup.select_one('[data-qa="vacancy-view-creation-time"]') or soup.find("time")
-        if el:
-            return el.get_text(" ", strip=True)
+                state["known_run"] = 0
+        return out
+
+    def _claim_shared(self, ids: List[str], limit: int, state: Dict) -> List[str]:
+        """Дедуп между запросами search_many (без await между проверкой и записью) и обрезка по limit."""
+        shared = state.get("seen_ids")
+        if shared is not None:
+            ids = [i for i in ids if i not in shared]
+        ids = ids[:max(0, limit - state["enqueued"])]
+        if shared is not None:
+            shared.update(ids)
+        return ids
+
+    async def _produce_links(self, session: aiohttp.ClientSession, query: str | SearchShard, limit: int,
+                             links_q: asyncio.Queue, n_workers: int, state: Dict):
+        try:
+            async for page, serp, fresh in self._serp_pages(session, query, limit, state):
+                # --- кэш по БД ---
+                urls = {self._extract_id_from_url(u): u for u in fresh}
+                known = await existing_ids_async(list(urls))
+                ids = [i for i in self._cut_known(list(urls), known, state) if i not in known]
+                todo = [urls[i] for i in self._claim_shared(ids, limit, state)]
+                self.log.info("Страница %d: ссылок %d, новых %d, к загрузке %d",
+                              page, len(fresh), len(fresh) - len(known), len(todo))
+
+                for u in todo:
+                    await links_q.put(u)
+                    state["enqueued"] += 1
+        finally:
+            for _ in range(n_workers):
+                await links_q.put(None)
+
+    async def _crawl_serp_only(self, session: aiohttp.ClientSession, query: str | SearchShard, limit: int, state: Dict):
+        """
+        Быстрый режим: строки Vacancy прямо из выдачи (один запрос на ~20 вакансий), без
+        загрузки карточек. Уже известные id тоже отдаются — upsert обновит у них только
+        поля выдачи (см. SERP_COLUMNS в bd_vacancy).
+        """
+        async for page, serp, fresh in self._serp_pages(session, query, limit, state):
+            hits = {self._extract_id_from_url(h.url): h for h in serp.hits}
+            fresh_ids = [self._extract_id_from_url(u) for u in fresh]
+            if state.get("incremental"):
+                known = await existing_ids_async(fresh_ids)
+                fresh_ids = self._cut_known(fresh_ids, known, state)
+            urls = dict(zip(fresh_ids, fresh))
+            # ссылка без сниппета (сменилась разметка, нет initial state) дала бы строку из одних
+            # None, а upsert затёр бы ими поля выдачи у полной карточки — такие пропускаем
+            no_hit = [i for i in fresh_ids if i not in hits]
+            if no_hit:
+                self.log.warning("Страница %d: %d ссылок без сниппета пропущено", page, len(no_hit))
+            ids = self._claim_shared([i for i in fresh_ids if i in hits], limit, state)
+            self.log.info("Страница %d: ссылок %d, сниппетов %d, к записи %d", page, len(fresh), len(hits), len(ids))
+            for vid in ids:
+                state["enqueued"] += 1
+                yield asdict(self.vacancy_from_hit(hits[vid], urls[vid])), None
+
+    async def _fetch_serp_page(self, session: aiohttp.ClientSession, query: str | SearchShard,
+                               page: int) -> Optional[SerpPage]:
+        params = {**(query.params() if isinstance(query, SearchShard) else {"text": query}), "page": page}
+        for attempt in range(self.serp_retries + 1):
+            async with session.get(self.SEARCH_URL, params=params,
+                                   timeout=aiohttp.ClientTimeout(sock_connect=5, total=20)) as r:
+                if r.status in (403, 429):
+                    await self._on_block_async(r.status, f"{self.SEARCH_URL}?page={page}")
+                    if attempt < self.serp_retries:
+                        await self._sleep_with_jitter_async()
+                        continue
+                if r.status == 404 and page:
+                    return None
+                r.raise_for_status()
+                html = await r.read()
+                encoding = r.get_encoding()
+            await self._archive_put("serp", f"{query}|{page}", str(r.url), html, encoding)
+            return self.backend.serp(html, encoding)
         return None
 
-    def _parse_responses_count(self, soup: BeautifulSoup) -> Optional[int]:
-        el = soup.find(string=re.compile(r"тклик", re.I))
-        if not el:
-            return None
-        m = re.search(r"(\d+)", el)
-        return int(m.group(1)) if m else None
+    async def _fetch_card_status(self, session: aiohttp.ClientSession, u: str,
+                                 etag: str | None = None, last_modified: str | None = None
+                                 ) -> tuple[str, dict | None, float]:
+        """
+        Загрузка карточки; etag/last_modified превращают запрос в условный.
+        status: "ok" | "not_modified" (304) | "gone" (404/410) | "blocked" | "error".
+        """
+        await self._sleep_with_jitter_async()
+        t1 = time.perf_counter()
+        cond = {}
+        if etag:
+            cond["If-None-Match"] = etag
+        if last_modified:
+            cond["If-Modified-Since"] = last_modified
+        status = "error"
+        try:
+            async with session.get(u, headers=cond or None,
+                                   timeout=aiohttp.ClientTimeout(sock_connect=5, total=20)) as resp:
+                if resp.status in (403, 429):
+                    status = "blocked"
+                    await self._on_block_async(resp.status, u)
+                elif resp.status == 304:
+                    status = "not_modified"
+                    await self._on_success_async()
+                elif resp.status in (404, 410):
+                    status = "gone"
+                    self.log.info("Вакансия снята (%s): %s", resp.status, u)
+                else:
+                    resp.raise_for_status()
+                    html2 = await resp.read()
+                    encoding = resp.get_encoding()
+                    resp_etag = resp.headers.get("ETag")
+                    resp_lm = resp.headers.get("Last-Modified")
+                    status = "ok"
+        except aiohttp.ClientResponseError as e:
+            self.log.warning("HTTP error %s on %s", e.status, u)
+        except Exception as e:
+            self.log.warning("Network error %s on %s", type(e).__name__, u)
 
-    def _parse_description(self, soup: BeautifulSoup) -> Optional[str]:
-        el = soup.select_one('[data-qa="vacancy-description"]')
-        if el:
-            return el.get_text("\n", strip=True)
-        return None
+        # задержка сети (без парсинга) — сигнал для адаптивного параллелизма
+        await self.concurrency.record(time.perf_counter() - t1, blocked=status == "blocked")
+        if status != "ok":
+            return status, None, time.perf_counter() - t1
 
-    def _parse_skills(self, soup: BeautifulSoup) -> List[str]:
-        skills = []
-        for el in soup.select('[data-qa="skills-element"], .bloko-tag__text'):
-            txt = el.get_text(strip=True)
-            if txt and txt not in skills:
-                skills.append(txt)
-        return skills
+        await self._archive_put("card", self._extract_id_from_url(u), u, html2, encoding)
+        try:
+            item = await self._parse_card_async(html2, u, encoding)
+        except Exception as e:
+            # как сетевая ошибка: карточка уходит на повтор (HTML уже в архиве для reparse)
+            self.log.warning("Parse error %s on %s", type(e).__name__, u)
+            return "error", None, time.perf_counter() - t1
+        item.etag, item.last_modified = resp_etag, resp_lm
+        await self._on_success_async()
+        dt = time.perf_counter() - t1
+        self.log.debug("OK %s (%.2f сек) | delay=%.2fs", u, dt, self.current_delay)
+        return "ok", asdict(item), dt
+
+    async def _archive_put(self, kind: str, key: str, url: str, html: bytes, encoding: str | None):
+        if self.archive is None:
+            return
+        try:
+            await asyncio.to_thread(self.archive.put, kind, key, url, html, encoding)
+        except OSError as e:
+            self.log.warning("Архив: не удалось сохранить %s (%s)", url, e)
+
+    # ---------- парсинг карточек: inline или в пуле ----------
+    def _make_parse_pool(self) -> Executor | None:
+        if not self.parse_executor:
+            return None
+        workers = self.parse_workers or os.cpu_count() or 1
+        if self.parse_executor == "process":
+            pool: Executor = ProcessPoolExecutor(max_workers=workers)
+        elif self.parse_executor == "thread":
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+        else:
+            raise ValueError(f"Неизвестный parse_executor: {self.parse_executor!r}")
+        self.log.info("Парсинг карточек в пуле: %s × %d", self.parse_executor, workers)
+        return pool
+
+    async def _parse_card_async(self, html: bytes, url: str, encoding: str | None = None) -> Vacancy:
+        pool = self._parse_pool
+        if pool is None:
+            return parse_card_html(html, url, encoding, parser=self)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, parse_card_html, html, url, encoding, None, self.backend.name)
+        except BrokenExecutor:
+            # умерший процесс ломает весь пул; пересоздаёт его первый заметивший воркер
+            if self._parse_pool is pool:
+                self.log.warning("Пул парсинга сломан — пересоздаю")
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._parse_pool = self._make_parse_pool()
+            raise
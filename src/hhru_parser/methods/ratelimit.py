@@ -0,0 +1,344 @@
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from hhru_parser.bd.bd_pool import get_async_pool
+
+# Token bucket с AIMD-подстройкой скорости. Состояние (скорость, токены, время
+# последнего снижения) живёт в сторе: в памяти процесса, в SQLite-файле (общий бюджет
+# для процессов на хосте) или в строке Postgres (общий бюджет для всех узлов).
+
+
+class LocalStore:
+    """Состояние в памяти процесса (поведение по умолчанию)."""
+
+    def __init__(self):
+        self._state: Dict[str, Tuple[float, float, float, float]] = {}
+        self._events: Dict[str, Deque[Dict]] = {}
+
+    async def take(self, name: str, rate: float, burst: float) -> Tuple[float, float]:
+        now = time.time()
+        cur_rate, tokens, updated, last_dec = self._state.get(name, (rate, burst, now, 0.0))
+        tokens = min(burst, tokens + (now - updated) * cur_rate) - 1
+        self._state[name] = (cur_rate, tokens, now, last_dec)
+        return tokens, cur_rate
+
+    async def adjust(self, name: str, rate: float, burst: float, factor: float, add: float,
+                     min_rate: float, max_rate: float, cooldown: float) -> Tuple[float, float]:
+        now = time.time()
+        cur_rate, tokens, updated, last_dec = self._state.get(name, (rate, burst, now, 0.0))
+        new_rate = cur_rate
+        if factor < 1:
+            if now - last_dec >= cooldown:
+                new_rate, last_dec = cur_rate * factor, now
+        else:
+            new_rate = cur_rate * factor + add
+        new_rate = max(min_rate, min(max_rate, new_rate))
+        self._state[name] = (new_rate, tokens, updated, last_dec)
+        return cur_rate, new_rate
+
+    async def add_event(self, name: str, event: Dict) -> None:
+        self._events.setdefault(name, deque(maxlen=1000)).append(event)
+
+    async def events(self, name: str, limit: int = 100) -> List[Dict]:
+        return list(self._events.get(name, ()))[-limit:]
+
+    async def rate(self, name: str) -> Optional[float]:
+        st = self._state.get(name)
+        return st[0] if st else None
+
+
+class SqliteStore:
+    """Общее состояние для процессов на одном хосте через SQLite-файл (BEGIN IMMEDIATE)."""
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS rate_limits (
+             name TEXT PRIMARY KEY, rate REAL NOT NULL, tokens REAL NOT NULL,
+             updated_at REAL NOT NULL, last_decrease_at REAL NOT NULL DEFAULT 0)""",
+        """CREATE TABLE IF NOT EXISTS rate_limit_events (
+             id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, at TEXT NOT NULL,
+             pid INTEGER, status INTEGER, url TEXT, rate_before REAL, rate_after REAL)""",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            for sql in self.SCHEMA:
+                db.execute(sql)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _row(self, db: sqlite3.Connection, name: str, rate: float, burst: float):
+        now = time.time()
+        db.execute("INSERT OR IGNORE INTO rate_limits (name, rate, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                   (name, rate, burst, now))
+        return db.execute("SELECT rate, tokens, updated_at, last_decrease_at FROM rate_limits WHERE name = ?",
+                          (name,)).fetchone(), now
+
+    def _take(self, name: str, rate: float, burst: float) -> Tuple[float, float]:
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            (cur_rate, tokens, updated, _), now = self._row(db, name, rate, burst)
+            tokens = min(burst, tokens + max(0.0, now - updated) * cur_rate) - 1
+            db.execute("UPDATE rate_limits SET tokens = ?, updated_at = ? WHERE name = ?", (tokens, now, name))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return tokens, cur_rate
+
+    def _adjust(self, name, rate, burst, factor, add, min_rate, max_rate, cooldown) -> Tuple[float, float]:
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            (cur_rate, _, _, last_dec), now = self._row(db, name, rate, burst)
+            new_rate = cur_rate
+            if factor < 1:
+                if now - last_dec >= cooldown:
+                    new_rate, last_dec = cur_rate * factor, now
+            else:
+                new_rate = cur_rate * factor + add
+            new_rate = max(min_rate, min(max_rate, new_rate))
+            db.execute("UPDATE rate_limits SET rate = ?, last_decrease_at = ? WHERE name = ?",
+                       (new_rate, last_dec, name))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return cur_rate, new_rate
+
+    async def take(self, name: str, rate: float, burst: float) -> Tuple[float, float]:
+        return await asyncio.to_thread(self._take, name, rate, burst)
+
+    async def adjust(self, name, rate, burst, factor, add, min_rate, max_rate, cooldown) -> Tuple[float, float]:
+        return await asyncio.to_thread(self._adjust, name, rate, burst, factor, add, min_rate, max_rate, cooldown)
+
+    def _add_event(self, name: str, event: Dict) -> None:
+        self._connect().execute(
+            "INSERT INTO rate_limit_events (name, at, pid, status, url, rate_before, rate_after) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (name, event["at"], event["pid"], event["status"], event["url"], event["rate_before"], event["rate_after"]),
+        )
+
+    async def add_event(self, name: str, event: Dict) -> None:
+        await asyncio.to_thread(self._add_event, name, event)
+
+    def _events(self, name: str, limit: int) -> List[Dict]:
+        rows = self._connect().execute(
+            "SELECT at, pid, status, url, rate_before, rate_after FROM rate_limit_events "
+            "WHERE name = ? ORDER BY id DESC LIMIT ?", (name, limit)).fetchall()
+        keys = ("at", "pid", "status", "url", "rate_before", "rate_after")
+        return [dict(zip(keys, r)) for r in reversed(rows)]
+
+    async def events(self, name: str, limit: int = 100) -> List[Dict]:
+        return await asyncio.to_thread(self._events, name, limit)
+
+    async def rate(self, name: str) -> Optional[float]:
+        row = await asyncio.to_thread(
+            lambda: self._connect().execute("SELECT rate FROM rate_limits WHERE name = ?", (name,)).fetchone())
+        return row[0] if row else None
+
+
+class PostgresStore:
+    """Общее состояние для всех узлов: строка в rate_limits, атомарно через UPDATE ... RETURNING."""
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS rate_limits (
+             name TEXT PRIMARY KEY, rate DOUBLE PRECISION NOT NULL, tokens DOUBLE PRECISION NOT NULL,
+             updated_at DOUBLE PRECISION NOT NULL, last_decrease_at DOUBLE PRECISION NOT NULL DEFAULT 0)""",
+        """CREATE TABLE IF NOT EXISTS rate_limit_events (
+             id BIGSERIAL PRIMARY KEY, name TEXT NOT NULL, at TIMESTAMPTZ NOT NULL,
+             pid INTEGER, status INTEGER, url TEXT,
+             rate_before DOUBLE PRECISION, rate_after DOUBLE PRECISION)""",
+    )
+
+    # время берём с сервера БД, чтобы часы узлов не расходились
+    ENSURE_SQL = """
+    INSERT INTO rate_limits (name, rate, tokens, updated_at)
+    VALUES (%(name)s, %(rate)s, %(burst)s, extract(epoch FROM clock_timestamp()))
+    ON CONFLICT (name) DO NOTHING
+    """
+    TAKE_SQL = """
+    UPDATE rate_limits SET
+      tokens = LEAST(%(burst)s, tokens + GREATEST(0, extract(epoch FROM clock_timestamp()) - updated_at) * rate) - 1,
+      updated_at = extract(epoch FROM clock_timestamp())
+    WHERE name = %(name)s
+    RETURNING tokens, rate
+    """
+    ADJUST_SQL = """
+    UPDATE rate_limits r SET
+      rate = GREATEST(%(min_rate)s, LEAST(%(max_rate)s, CASE
+               WHEN %(factor)s >= 1 THEN old.rate * %(factor)s + %(add)s
+               WHEN extract(epoch FROM clock_timestamp()) - old.last_decrease_at >= %(cooldown)s
+                 THEN old.rate * %(factor)s
+               ELSE old.rate END)),
+      last_decrease_at = CASE
+               WHEN %(factor)s < 1 AND extract(epoch FROM clock_timestamp()) - old.last_decrease_at >= %(cooldown)s
+                 THEN extract(epoch FROM clock_timestamp())
+               ELSE old.last_decrease_at END
+    FROM (SELECT name, rate, last_decrease_at FROM rate_limits WHERE name = %(name)s FOR UPDATE) old
+    WHERE r.name = old.name
+    RETURNING old.rate, r.rate
+    """
+
+    def __init__(self):
+        self._ensured: set[str] = set()
+
+    async def _ensure(self, conn, name: str, rate: float, burst: float):
+        if name in self._ensured:
+            return
+        for sql in self.SCHEMA:
+            await conn.execute(sql)
+        await conn.execute(self.ENSURE_SQL, {"name": name, "rate": rate, "burst": burst})
+        self._ensured.add(name)
+
+    async def take(self, name: str, rate: float, burst: float) -> Tuple[float, float]:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            await self._ensure(conn, name, rate, burst)
+            cur = await conn.execute(self.TAKE_SQL, {"name": name, "burst": burst})
+            tokens, cur_rate = await cur.fetchone()
+        return tokens, cur_rate
+
+    async def adjust(self, name, rate, burst, factor, add, min_rate, max_rate, cooldown) -> Tuple[float, float]:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            await self._ensure(conn, name, rate, burst)
+            cur = await conn.execute(self.ADJUST_SQL, {
+                "name": name, "factor": factor, "add": add,
+                "min_rate": min_rate, "max_rate": max_rate, "cooldown": cooldown,
+            })
+            before, after = await cur.fetchone()
+        return before, after
+
+    async def add_event(self, name: str, event: Dict) -> None:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            await conn.execute(
+                "INSERT INTO rate_limit_events (name, at, pid, status, url, rate_before, rate_after) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                (name, event["at"], event["pid"], event["status"], event["url"],
+                 event["rate_before"], event["rate_after"]),
+            )
+
+    async def events(self, name: str, limit: int = 100) -> List[Dict]:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            cur = await conn.execute(
+                "SELECT at, pid, status, url, rate_before, rate_after FROM rate_limit_events "
+                "WHERE name = %s ORDER BY id DESC LIMIT %s", (name, limit))
+            rows = await cur.fetchall()
+        keys = ("at", "pid", "status", "url", "rate_before", "rate_after")
+        return [dict(zip(keys, r)) for r in reversed(rows)]
+
+    async def rate(self, name: str) -> Optional[float]:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            cur = await conn.execute("SELECT rate FROM rate_limits WHERE name = %s", (name,))
+            row = await cur.fetchone()
+        return row[0] if row else None
+
+
+class RateLimiter:
+    """
+    Token bucket: acquire() ждёт своей очереди на запрос. Скорость (запросов/сек) —
+    AIMD: при блокировке умножается на decrease (не чаще раза в cooldown сек на весь
+    стор, чтобы N процессов не обвалили её N раз за один всплеск), после
+    success_to_increase успехов подряд растёт на increase.
+    """
+
+    def __init__(self, store=None, name: str = "hh.ru", rate: float = 1.5, burst: float = 3.0,
+                 min_rate: float = 1 / 60, max_rate: float | None = None,
+                 decrease: float = 0.5, increase: float | None = None,
+                 success_to_increase: int = 5, cooldown: float = 5.0, jitter: float = 0.6):
+        self.log = logging.getLogger(__name__)
+        self.store = store or LocalStore()
+        self.name = name
+        self.initial_rate = rate
+        self.burst = max(1.0, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.decrease = decrease
+        self.increase = increase if increase is not None else self.max_rate * 0.1
+        self.success_to_increase = success_to_increase
+        self.cooldown = cooldown
+        self.jitter = jitter
+
+        self.rate = rate          # последнее известное значение (из стора)
+        self.blocks = 0           # блокировки, увиденные этим процессом
+        self._success_streak = 0
+
+    @classmethod
+    def from_url(cls, url: str | None, **kw) -> "RateLimiter":
+        """None/"local" — в памяти; "sqlite:///path/to/file.db" — общий файл; "postgres" — строка в БД."""
+        if not url or url == "local":
+            store = LocalStore()
+        elif url.startswith("sqlite:///"):
+            store = SqliteStore(url[len("sqlite:///"):])
+        elif url in ("postgres", "postgresql"):
+            store = PostgresStore()
+        else:
+            raise ValueError(f"Неизвестный стор лимитера: {url!r}")
+        return cls(store, **kw)
+
+    async def acquire(self) -> float:
+        """Берёт токен (возможно, в долг) и спит, сколько нужно. Возвращает паузу в секундах."""
+        tokens, self.rate = await self.store.take(self.name, self.initial_rate, self.burst)
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        if self.jitter:
+            wait += random.uniform(0, self.jitter)
+        if wait >= 0.01:
+            self.log.debug("limiter: sleep %.2fs (rate=%.3f rps, tokens=%.2f)", wait, self.rate, tokens)
+            await asyncio.sleep(wait)
+        return wait
+
+    async def on_block(self, status: int, url: str) -> None:
+        self._success_streak = 0
+        self.blocks += 1
+        before, self.rate = await self.store.adjust(
+            self.name, self.initial_rate, self.burst, self.decrease, 0.0,
+            self.min_rate, self.max_rate, self.cooldown)
+        await self.store.add_event(self.name, {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "pid": os.getpid(),
+            "status": status,
+            "url": url,
+            "rate_before": before,
+            "rate_after": self.rate,
+        })
+        self.log.warning("Block %s on %s → rate: %.3f → %.3f rps", status, url, before, self.rate)
+
+    async def on_success(self) -> None:
+        self._success_streak += 1
+        if self._success_streak >= self.success_to_increase and self.rate < self.max_rate:
+            self._success_streak = 0
+            before, self.rate = await self.store.adjust(
+                self.name, self.initial_rate, self.burst, 1.0, self.increase,
+                self.min_rate, self.max_rate, self.cooldown)
+            if self.rate != before:
+                self.log.info("Relax rate: %.3f → %.3f rps", before, self.rate)
+
+    async def stats(self, events: int = 20) -> Dict:
+        rate = await self.store.rate(self.name)
+        return {
+            "rate": rate if rate is not None else self.rate,
+            "min_rate": self.min_rate,
+            "max_rate": self.max_rate,
+            "blocks_seen": self.blocks,
+            "recent_blocks": await self.store.events(self.name, events),
+        }
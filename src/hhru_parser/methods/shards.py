@@ -0,0 +1,102 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Разбиение запроса на шарды по фасетам выдачи hh.ru, чтобы каждый шард уместился
+# в лимит пагинации (~2000 результатов). Фасеты — разбиения без пропусков: у каждой
+# вакансии ровно один опыт, один график и т. д., поэтому объединение шардов = исходная
+# выдача. Последний фасет — окно публикации (date_from/date_to), которое делится пополам,
+# пока шард не влезет; открытое окно «старше N дней» отдаёт закрытые окна, растущие назад вдвое.
+
+
+@dataclass(frozen=True, slots=True)
+class SearchShard:
+    """Запрос + фильтры выдачи. str() — читаемая метка для логов, архива и БД."""
+    text: str
+    filters: Tuple[Tuple[str, str], ...] = ()
+
+    def params(self) -> Dict[str, str]:
+        return {"text": self.text, **dict(self.filters)}
+
+    def with_filter(self, name: str, value: str) -> "SearchShard":
+        return replace(self, filters=tuple((k, v) for k, v in self.filters if k != name) + ((name, value),))
+
+    def get(self, name: str) -> Optional[str]:
+        return dict(self.filters).get(name)
+
+    def __str__(self) -> str:
+        if not self.filters:
+            return self.text
+        return f"{self.text} [{', '.join(f'{k}={v}' for k, v in self.filters)}]"
+
+
+EXPERIENCE = ("noExperience", "between1And3", "between3And6", "moreThan6")
+SCHEDULE = ("fullDay", "shift", "flexible", "remote", "flyInFlyOut")
+EMPLOYMENT = ("full", "part", "project", "volunteer", "probation")
+
+DATE_FMT = "%Y-%m-%dT%H:%M:%S"
+MIN_DATE_WINDOW = timedelta(hours=1)
+MAX_DATE_AGE = timedelta(days=3 * 365)  # старше — не делим: открытый шард обходится как есть
+
+Facet = Callable[[SearchShard], Optional[List[SearchShard]]]
+
+
+def enum_facet(name: str, values: Sequence[str]) -> Facet:
+    def split(shard: SearchShard) -> Optional[List[SearchShard]]:
+        if shard.get(name) is not None:
+            return None
+        return [shard.with_filter(name, v) for v in values]
+    return split
+
+
+def date_facet(days: int = 30, min_window: timedelta = MIN_DATE_WINDOW,
+               max_age: timedelta = MAX_DATE_AGE) -> Facet:
+    """
+    Окно публикации. Первое деление: «старше days дней» (только date_to) + две половины
+    последних days дней. Открытое окно «старше date_to» делится на закрытое окно длиной
+    (сейчас − date_to) и открытое «старше» его начала: [−2d, −d] + (…, −2d), затем
+    [−4d, −2d] + (…, −4d) и т. д. до max_age. Закрытые окна делятся пополам до min_window.
+    """
+    def split(shard: SearchShard) -> Optional[List[SearchShard]]:
+        lo, hi = shard.get("date_from"), shard.get("date_to")
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        if hi is None:
+            start = now - timedelta(days=days)
+            mid = start + (now - start) / 2
+            return [shard.with_filter("date_to", start.strftime(DATE_FMT)),
+                    _window(shard, start, mid), _window(shard, mid, now)]
+        end = _parse_date(hi)
+        if lo is None:
+            span = max(now - end, timedelta(days=days))
+            if now - end >= max_age:
+                return None
+            start = end - span
+            return [shard.with_filter("date_to", start.strftime(DATE_FMT)), _window(shard, start, end)]
+        start = _parse_date(lo)
+        if end - start <= min_window:
+            return None
+        mid = (start + (end - start) / 2).replace(microsecond=0)
+        return [_window(shard, start, mid), _window(shard, mid, end)]
+    return split
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.strptime(value, DATE_FMT).replace(tzinfo=timezone.utc)
+
+
+def _window(shard: SearchShard, start: datetime, end: datetime) -> SearchShard:
+    return shard.with_filter("date_from", start.strftime(DATE_FMT)).with_filter("date_to", end.strftime(DATE_FMT))
+
+
+def default_facets(areas: Sequence[str] = ()) -> List[Facet]:
+    """
+    Порядок: опыт → график → занятость → регион (только если задан список areas: у hh нет
+    фильтра «все остальные», поэтому полноту даёт лишь исчерпывающий список) → дата.
+    """
+    facets = [enum_facet("experience", EXPERIENCE), enum_facet("schedule", SCHEDULE),
+              enum_facet("employment", EMPLOYMENT)]
+    if areas:
+        facets.append(enum_facet("area", tuple(areas)))
+    facets.append(date_facet())
+    return facets
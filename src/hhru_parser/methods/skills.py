@@ -0,0 +1,78 @@
+from __future__ import annotations
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Нормализация тегов навыков: «Python», «python3» и «Python 3» — один навык.
+# Ключ навыка — casefold + схлопнутые пробелы; синонимы сводятся к каноническому
+# ключу по словарю SKILL_ALIASES, номер версии в конце отбрасывается, только если
+# без него получается известный навык («Python 3» → python, а «Kafka 3» без словаря
+# остаётся как есть). Сырые теги по-прежнему лежат в vacancies.skills; нормализованные —
+# в bd_skills (skills + vacancy_skills). После правки словаря: scripts/skills.py rebuild.
+
+# каноническое написание → синонимы (регистр и лишние пробелы не важны)
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "Python": ["python3", "питон"],
+    "JavaScript": ["js", "java script", "ecmascript", "es6"],
+    "TypeScript": ["ts"],
+    "Go": ["golang", "go lang"],
+    "C#": ["c sharp", "csharp"],
+    "C++": ["cpp", "c/c++"],
+    "1С": ["1c", "1с: предприятие", "1c: предприятие", "1с:предприятие", "1c:предприятие", "1с предприятие"],
+    "PostgreSQL": ["postgres", "postgre", "postgre sql", "postgresql", "psql", "pgsql"],
+    "MS SQL Server": ["mssql", "ms sql", "sql server", "microsoft sql server"],
+    "MySQL": ["my sql"],
+    "SQL": ["sql запросы", "язык запросов sql"],
+    "React": ["react.js", "reactjs", "react js"],
+    "Vue.js": ["vue", "vuejs", "vue js"],
+    "Node.js": ["nodejs", "node js", "node"],
+    "Django": ["django framework"],
+    "FastAPI": ["fast api"],
+    "Kubernetes": ["k8s"],
+    "Docker": ["docker compose", "docker-compose"],
+    "Linux": ["unix/linux", "linux/unix"],
+    "REST API": ["rest", "restful", "restful api", "rest api"],
+    "Machine Learning": ["ml", "машинное обучение"],
+    "Английский язык": ["английский", "english", "английский — b1", "английский — b2", "английский — c1"],
+}
+
+_SPACES = re.compile(r"\s+")
+_VERSION = re.compile(r"[\s\-]*v?\d+(\.\d+)*$")
+
+
+def _key(text: str) -> str:
+    return _SPACES.sub(" ", text).strip().strip(".,;").casefold()
+
+
+def _build_index() -> Dict[str, Tuple[str, str]]:
+    index: Dict[str, Tuple[str, str]] = {}
+    for title, aliases in SKILL_ALIASES.items():
+        canon = _key(title)
+        for alias in (title, *aliases):
+            index[_key(alias)] = (canon, title)
+    return index
+
+
+_INDEX = _build_index()
+
+
+def normalize_skill(raw: str) -> Optional[Tuple[str, str]]:
+    """Сырой тег → (ключ, отображаемое название); None — пустой тег."""
+    key = _key(raw or "")
+    if not key:
+        return None
+    if key in _INDEX:
+        return _INDEX[key]
+    base = _VERSION.sub("", key)
+    if base and base != key and base in _INDEX:
+        return _INDEX[base]
+    return key, _SPACES.sub(" ", raw).strip()
+
+
+def normalize_skills(raw: Optional[List[str]]) -> List[Tuple[str, str]]:
+    """Навыки вакансии без дублей после нормализации, в исходном порядке."""
+    seen: Dict[str, str] = {}
+    for tag in raw or ():
+        norm = normalize_skill(tag)
+        if norm and norm[0] not in seen:
+            seen[norm[0]] = norm[1]
+    return list(seen.items())
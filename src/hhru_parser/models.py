@@ -31,3 +31,7 @@ class Vacancy:
     skills: List[str] = field(default_factory=list)
 
     raw_json: Optional[Dict[str, Any]] = None
+
+    # валидаторы для условных запросов при обновлении (ETag / Last-Modified ответа)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import asyncio
+import inspect
+import logging
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from hhru_parser.bd.bd_vacancy_async import upsert_vacancies_async
+
+
+class VacancySink:
+    """
+    Асинхронный сток: копит распарсенные вакансии и сбрасывает их в БД пачками —
+    по размеру (batch_size) или по времени (flush_interval, сек), что наступит раньше.
+    flush_fn — корутина (по умолчанию upsert_vacancies_async) или обычная функция;
+    синхронная запись уходит в отдельный поток, чтобы не блокировать event loop.
+    """
+
+    def __init__(self, flush_fn: Optional[Callable[[List[Dict]], Any]] = None,
+                 batch_size: int = 200, flush_interval: float = 5.0):
+        self.log = logging.getLogger(__name__)
+        self.flush_fn = flush_fn or upsert_vacancies_async
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        self._buf: List[Dict] = []
+        self._flush_lock: asyncio.Lock | None = None
+        self._timer: Optional[asyncio.Task] = None
+        self._last_flush = time.monotonic()
+
+        self.flushed = 0
+        self.batches = 0
+        # итоги upsert по content_hash (если flush_fn их возвращает)
+        self.writes: Dict[str, int] = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    async def __aenter__(self) -> "VacancySink":
+        self._flush_lock = asyncio.Lock()
+        if self.flush_interval and self.flush_interval > 0:
+            self._timer = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        # дописываем хвост даже при ошибке/прерывании — готовая работа не должна пропасть
+        await asyncio.shield(self.flush())
+        self.log.info("Сток: записано %d вакансий за %d пачек (новых %d, изменено %d, без изменений %d)",
+                      self.flushed, self.batches, self.writes["inserted"], self.writes["updated"],
+                      self.writes["unchanged"])
+
+    async def add(self, item: Dict) -> None:
+        self._buf.append(item)
+        if len(self._buf) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            self._last_flush = time.monotonic()
+            if not self._buf:
+                return
+            batch, self._buf = self._buf, []
+            t0 = time.perf_counter()
+            try:
+                if _is_async(self.flush_fn):
+                    res = await self.flush_fn(batch)
+                else:
+                    res = await asyncio.to_thread(self.flush_fn, batch)
+            except BaseException:
+                self._buf[:0] = batch  # вернём пачку, чтобы не потерять при следующей попытке
+                raise
+            self.flushed += len(batch)
+            self.batches += 1
+            if isinstance(res, dict):
+                for k in self.writes:
+                    self.writes[k] += res.get(k) or 0
+            self.log.debug("Сток: пачка %d шт. записана за %.2f сек (всего %d)",
+                           len(batch), time.perf_counter() - t0, self.flushed)
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buf and time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    self.log.warning("Сток: ошибка записи пачки (%s): %s", type(e).__name__, e)
+
+
+def _is_async(fn) -> bool:
+    while isinstance(fn, partial):
+        fn = fn.func
+    return inspect.iscoroutinefunction(fn)